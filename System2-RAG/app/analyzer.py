@@ -0,0 +1,89 @@
+"""
+Text analyzer shared by the TechConnect and System2 vector stores.
+Lowercases, splits on a precompiled word pattern, drops stop words and
+short tokens, optionally applies a light plural stemmer, and caches query
+analyses in an LRU.
+"""
+
+import re
+import zlib
+from functools import lru_cache
+from typing import FrozenSet, Iterable, List, Tuple
+
+TOKEN_PATTERN = re.compile(r'\w+')
+
+STOP_WORDS: FrozenSet[str] = frozenset({
+    'the', 'a', 'an', 'and', 'or', 'is', 'in', 'to', 'of', 'for', 'with',
+})
+
+# Tokens shorter than this are dropped
+MIN_TOKEN_LENGTH = 3
+
+
+@lru_cache(maxsize=65536)
+def stem(token: str) -> str:
+    """
+    Light plural stemmer (Harman's S-stemmer plus -sses/-ches/-shes/-xes/-zes).
+
+    Deliberately conservative: it conflates "agents"/"agent" and
+    "policies"/"policy" but leaves every other suffix alone.
+    """
+    if len(token) > 4 and token.endswith("ies") and not token.endswith(("eies", "aies")):
+        return token[:-3] + "y"
+    if len(token) > 4 and token.endswith(("sses", "ches", "shes", "xes", "zes")):
+        return token[:-2]
+    if len(token) > 3 and token.endswith("s") and not token.endswith(("us", "ss", "is")):
+        return token[:-1]
+    return token
+
+
+class Analyzer:
+    """
+    Tokenizer/normalizer used for both documents and queries.
+
+    ``analyze`` handles document text; ``analyze_query`` returns a cached
+    tuple, so repeated queries skip the regex and stemming entirely.
+    ``version`` changes with every setting that affects the tokens, so
+    snapshots built with another analyzer are not reused.
+    """
+
+    def __init__(
+        self,
+        stop_words: Iterable[str] = STOP_WORDS,
+        min_length: int = MIN_TOKEN_LENGTH,
+        stemming: bool = False,
+        cache_size: int = 4096
+    ):
+        """
+        Args:
+            stop_words: Tokens to drop
+            min_length: Minimum token length kept
+            stemming: Apply the light plural stemmer
+            cache_size: Query analyses kept in the LRU (0 disables)
+        """
+        self.stop_words = frozenset(stop_words)
+        self.min_length = min_length
+        self.stemming = stemming
+        self.cache_size = cache_size
+        stop_key = zlib.crc32(" ".join(sorted(self.stop_words)).encode('utf-8'))
+        self.version = f"analyzer-v1-min{min_length}-sw{stop_key:08x}{'-stem' if stemming else ''}"
+        self.analyze_query = lru_cache(maxsize=cache_size)(self._analyze_query)
+
+    def analyze(self, text: str) -> List[str]:
+        """Tokens of a text, in order (repeats kept for term frequencies)."""
+        stop_words = self.stop_words
+        min_length = self.min_length
+        tokens = [
+            t for t in TOKEN_PATTERN.findall(text.lower())
+            if len(t) >= min_length and t not in stop_words
+        ]
+        if self.stemming:
+            tokens = [stem(t) for t in tokens]
+        return tokens
+
+    def _analyze_query(self, text: str) -> Tuple[str, ...]:
+        return tuple(self.analyze(text))
+
+    def __reduce__(self):
+        # The per-instance LRU is not picklable; rebuild it in the receiving process
+        return Analyzer, (self.stop_words, self.min_length, self.stemming, self.cache_size)
@@ -18,6 +18,9 @@ from datetime import datetime
 from collections import Counter
 from typing import List, Dict, Optional
 
+# Shared analyzer (same tokens as the TechConnect vector store)
+from .analyzer import Analyzer
+
 # Import CSA enhancements
 from .csa_enhancements import (
     get_rbac_requirements,
@@ -62,8 +65,9 @@ SOLUTIONS = load_catalog()
 
 # Simple Vector Store for semantic search (TF-IDF like matching)
 class VectorStore:
-    def __init__(self, solutions):
+    def __init__(self, solutions, analyzer: Optional[Analyzer] = None):
         self.solutions = solutions
+        self.analyzer = analyzer or Analyzer()
         self._build_index()
     
     def _build_index(self):
@@ -78,18 +82,16 @@ class VectorStore:
                 " ".join(sol.get("key_technologies", [])),
                 " ".join(sol.get("use_cases", []))
             ]
-            combined_text = " ".join(texts).lower()
-            words = combined_text.split()
+            words = self.analyzer.analyze(" ".join(texts))
             
             for word in set(words):
-                if word and len(word) > 2:
-                    if word not in self.index:
-                        self.index[word] = []
-                    self.index[word].append(sol["id"])
+                if word not in self.index:
+                    self.index[word] = []
+                self.index[word].append(sol["id"])
     
     def search(self, query: str, top_k: int = 5, area_filter: Optional[str] = None) -> List[Dict]:
         """Semantic search with optional area filter"""
-        query_words = query.lower().split()
+        query_words = self.analyzer.analyze_query(query)
         scores = Counter()
         
         # Score solutions based on word matches
@@ -0,0 +1,154 @@
+"""
+In-process background jobs for the TechConnect broker API.
+Slow work (git clones) runs as asyncio tasks behind a shared concurrency
+limit, so handlers return a job id at once and the event loop stays free.
+"""
+
+import asyncio
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+# queued -> running -> succeeded (every item) / partial (some) / failed (none) / cancelled
+FINISHED_STATES = ("succeeded", "partial", "failed", "cancelled")
+
+Runner = Callable[[str], Awaitable[Any]]
+
+
+class Job:
+    """
+    One submitted job: a list of items (e.g. repo ids) handled by one runner.
+
+    Each item's outcome is recorded as it finishes, so progress can be
+    polled while the job runs.
+    """
+
+    def __init__(self, kind: str, items: List[str]):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.items = list(items)
+        self.status = "queued"
+        self.running: List[str] = []
+        self.results: Dict[str, Dict[str, Any]] = {}
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED_STATES
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-ready status: progress counts, per-item results and timestamps."""
+        succeeded = [item for item in self.items if self.results.get(item, {}).get("status") == "succeeded"]
+        failed = [item for item in self.items if self.results.get(item, {}).get("status") == "failed"]
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "total": len(self.items),
+            "completed": len(self.results),
+            "running": list(self.running),
+            "succeeded": succeeded,
+            "failed": failed,
+            "results": dict(self.results),
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class JobQueue:
+    """
+    Runs submitted jobs as asyncio tasks with at most ``concurrency`` items
+    in flight across all jobs.
+
+    A runner is an async callable taking one item; its return value is the
+    item's result and any exception marks the item failed. Finished jobs
+    are kept for polling, up to ``max_finished`` of them (oldest dropped
+    first).
+    """
+
+    def __init__(self, concurrency: int = 4, max_finished: int = 256):
+        """
+        Args:
+            concurrency: Items processed at once, over all jobs (at least 1)
+            max_finished: Finished jobs kept for GET /jobs/{id}
+
+        Raises:
+            ValueError: If concurrency < 1
+        """
+        if concurrency < 1:
+            raise ValueError("concurrency must be at least 1")
+        self.concurrency = concurrency
+        self.max_finished = max_finished
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    def submit(self, kind: str, items: List[str], runner: Runner) -> Job:
+        """
+        Start a job in the background and return it immediately.
+
+        Must be called from the running event loop (e.g. an async handler).
+        """
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        job = Job(kind, items)
+        self._jobs[job.id] = job
+        self._evict()
+        job._task = asyncio.get_running_loop().create_task(self._run(job, runner))
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """Job by id, or None if unknown or already evicted."""
+        return self._jobs.get(job_id)
+
+    def jobs(self) -> List[Job]:
+        """Known jobs, newest first."""
+        return list(reversed(self._jobs.values()))
+
+    async def _run_item(self, job: Job, item: str, runner: Runner) -> None:
+        async with self._semaphore:
+            if job.started_at is None:
+                job.status = "running"
+                job.started_at = time.time()
+            job.running.append(item)
+            try:
+                result = await runner(item)
+                job.results[item] = {"status": "succeeded", "result": result}
+            except Exception as e:
+                job.results[item] = {"status": "failed", "error": str(e)}
+            finally:
+                job.running.remove(item)
+
+    async def _run(self, job: Job, runner: Runner) -> None:
+        try:
+            await asyncio.gather(*(self._run_item(job, item, runner) for item in job.items))
+        except asyncio.CancelledError:
+            job.status = "cancelled"
+            raise
+        else:
+            n_failed = sum(1 for result in job.results.values() if result["status"] == "failed")
+            if n_failed == 0:
+                job.status = "succeeded"
+            elif n_failed < len(job.items):
+                job.status = "partial"
+            else:
+                job.status = "failed"
+        finally:
+            job.finished_at = time.time()
+            self._evict()
+
+    def _evict(self) -> None:
+        finished = [job_id for job_id, job in self._jobs.items() if job.finished]
+        for job_id in finished[:max(len(finished) - self.max_finished, 0)]:
+            del self._jobs[job_id]
+
+    async def close(self) -> None:
+        """Cancel unfinished jobs (killing their subprocesses) and wait for them to stop."""
+        tasks = [job._task for job in self._jobs.values() if job._task is not None and not job._task.done()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
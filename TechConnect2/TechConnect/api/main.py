@@ -4,15 +4,26 @@ FastAPI REST service that returns structured context blocks for downstream agent
 Ingests catalog, searches vector store, and formats output with XML tagging.
 """
 
-from typing import Optional, List
+from contextlib import asynccontextmanager
+from typing import Any, Dict, Optional, List, Union
 from pathlib import Path
-from fastapi import FastAPI, HTTPException, Query
+from fastapi import FastAPI, HTTPException, Query, Response
 from pydantic import BaseModel
+import json
+import os
 import textwrap
+import time
 
-from models.schemas import ContextBlock, CatalogItem
+from api.jobs import JobQueue
+from models.schemas import CatalogData, ContextBlock, CatalogItem
 from ingestion.scraper import CatalogScraper
 from ingestion.github_crawler import GitHubRepoCrawler
+from vector_store.analyzer import Analyzer
+from vector_store.embedding_cache import EmbeddingCache
+from vector_store.filters import FilterValue, with_range
+from vector_store.segmented import SegmentedVectorStore
+from vector_store.sharded import ShardedVectorStore
+from vector_store.snapshot import content_hash
 from vector_store.store import VectorStore
 
 
@@ -21,11 +32,32 @@ from vector_store.store import VectorStore
 # ============================================================================
 
 class ContextRequest(BaseModel):
-    """Request body for context block endpoint."""
+    """
+    Request body for context block endpoint.
+    
+    Filter fields accept a single value or a list of values (any may match).
+    `complexity_min`/`complexity_max` bound the complexity level inclusively;
+    levels between the catalog's (e.g. "L250") are valid bounds.
+    `exclude` maps facet fields (solution_area, technical_complexity,
+    responsible_ai_tag, deployment_type, products, languages) to values
+    that must not match.
+    `debug` adds per-stage search timings to the response.
+    """
     scenario_title: str
-    solution_area: Optional[str] = None
-    complexity: Optional[str] = None
+    solution_area: Optional[Union[str, List[str]]] = None
+    complexity: Optional[Union[str, List[str]]] = None
+    complexity_min: Optional[str] = None
+    complexity_max: Optional[str] = None
+    responsible_ai_tag: Optional[bool] = None
+    deployment_type: Optional[Union[str, List[str]]] = None
+    exclude: Optional[Dict[str, Union[str, bool, List[str]]]] = None
     num_results: int = 3
+    debug: bool = False
+
+
+class BatchContextRequest(BaseModel):
+    """Request body for resolving many scenarios in one round-trip."""
+    requests: List[ContextRequest]
 
 
 class AddRepoRequest(BaseModel):
@@ -55,22 +87,53 @@ class ContextResponse(BaseModel):
     request_id: str
     blocks: List[ContextBlock]
     count: int
+    debug: Optional[Dict[str, Any]] = None
+
+
+class BatchContextResponse(BaseModel):
+    """One ContextResponse per request, in request order."""
+    results: List[ContextResponse]
+    count: int
+
+
+class FacetResponse(BaseModel):
+    """Accelerator counts per facet value (field -> value -> count, most frequent first)."""
+    total: int
+    facets: Dict[str, Dict[str, int]]
 
 
 # ============================================================================
 # Initialize FastAPI and Modules
 # ============================================================================
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Pre-load scraper, context blocks and vector store on startup; stop background jobs and shard workers on shutdown."""
+    try:
+        get_scraper()
+        get_context_blocks()
+        get_vector_store()
+    except Exception as e:
+        print(f"Warning: Could not initialize modules on startup: {e}")
+    yield
+    if _job_queue is not None:
+        await _job_queue.close()
+    close_vector_store()
+
+
 app = FastAPI(
     title="TechConnect Contextual Broker",
     version="1.0.0",
-    description="RAG system providing context blocks for instruction-generating agents"
+    description="RAG system providing context blocks for instruction-generating agents",
+    lifespan=lifespan
 )
 
 # Initialize scraper and vector store (singleton pattern for MVP)
 _scraper: Optional[CatalogScraper] = None
-_vector_store: Optional[VectorStore] = None
+_vector_store: Optional[Union[VectorStore, ShardedVectorStore, SegmentedVectorStore]] = None
 _repo_crawler: Optional[GitHubRepoCrawler] = None
+_context_blocks: Optional["MaterializedBlocks"] = None
+_job_queue: Optional[JobQueue] = None
 
 
 def get_scraper() -> CatalogScraper:
@@ -83,22 +146,71 @@ def get_scraper() -> CatalogScraper:
     return _scraper
 
 
-def get_vector_store() -> VectorStore:
-    """Lazy-load vector store and ingest catalog."""
+def get_vector_store() -> Union[VectorStore, ShardedVectorStore, SegmentedVectorStore]:
+    """
+    Lazy-load vector store.
+    
+    With VECTOR_STORE_SHARDS > 1 the store runs as that many worker
+    processes (ShardedVectorStore); with VECTOR_STORE_SEGMENTED set it
+    keeps immutable on-disk segments behind an in-memory memtable
+    (SegmentedVectorStore). Reuses the on-disk snapshot when it was
+    built from the current catalog.json; otherwise ingests the catalog and
+    writes a new snapshot.
+    """
     global _vector_store
     if _vector_store is None:
-        # Use persistent storage in .chroma directory
-        persist_dir = Path(__file__).parent.parent / ".chroma"
-        _vector_store = VectorStore(persist_dir=persist_dir)
+        # Snapshots live in the .chroma directory
+        options = dict(
+            persist_dir=Path(__file__).parent.parent / ".chroma",
+            scorer=os.getenv("VECTOR_STORE_SCORER", "jaccard"),
+            mode=os.getenv("VECTOR_STORE_MODE", "lexical"),
+            cache_size=int(os.getenv("VECTOR_STORE_CACHE_SIZE", "1024")),
+            cache_ttl=float(os.getenv("VECTOR_STORE_CACHE_TTL", "300")),
+            ann=os.getenv("VECTOR_STORE_ANN") or None,
+            nprobe=int(os.getenv("VECTOR_STORE_NPROBE", "8")),
+            hybrid_candidates=int(os.getenv("VECTOR_STORE_HYBRID_CANDIDATES", "50")),
+            rerank=os.getenv("VECTOR_STORE_RERANK") or None,
+            rerank_depth=int(os.getenv("VECTOR_STORE_RERANK_DEPTH", "50")),
+            quantize=os.getenv("VECTOR_STORE_QUANTIZE", "").lower() in ("1", "true", "yes"),
+            embedding_cache=EmbeddingCache(
+                os.environ["VECTOR_STORE_EMBEDDING_CACHE"],
+                max_bytes=int(os.getenv("VECTOR_STORE_EMBEDDING_CACHE_MB", "512")) * 1024 * 1024
+            ) if os.getenv("VECTOR_STORE_EMBEDDING_CACHE") else None,
+            analyzer=Analyzer(stemming=os.getenv("VECTOR_STORE_STEMMING", "").lower() in ("1", "true", "yes"))
+        )
+        shards = int(os.getenv("VECTOR_STORE_SHARDS", "1"))
+        if shards > 1:
+            store = ShardedVectorStore(shards=shards, **options)
+        elif os.getenv("VECTOR_STORE_SEGMENTED", "").lower() in ("1", "true", "yes"):
+            store = SegmentedVectorStore(
+                flush_threshold=int(os.getenv("VECTOR_STORE_FLUSH_THRESHOLD", "1024")),
+                **options
+            )
+        else:
+            store = VectorStore(**options)
         
-        # Ingest catalog if store is empty
         scraper = get_scraper()
-        catalog = scraper.load_catalog()
-        _vector_store.ingest_accelerators(catalog.solution_accelerators)
+        catalog_hash = content_hash(scraper.catalog_path)
+        if not store.load(source_hash=catalog_hash):
+            catalog = scraper.load_catalog()
+            store.ingest_accelerators(catalog.solution_accelerators)
+            try:
+                store.save(source_hash=catalog_hash)
+            except OSError as e:
+                print(f"Warning: Could not write vector store snapshot: {e}")
+        _vector_store = store
     
     return _vector_store
 
 
+def close_vector_store() -> None:
+    """Release the vector store (stops shard processes or the segment merger, if any)."""
+    global _vector_store
+    if isinstance(_vector_store, (ShardedVectorStore, SegmentedVectorStore)):
+        _vector_store.close()
+    _vector_store = None
+
+
 def get_repo_crawler() -> GitHubRepoCrawler:
     """Lazy-load repo crawler."""
     global _repo_crawler
@@ -109,6 +221,22 @@ def get_repo_crawler() -> GitHubRepoCrawler:
     return _repo_crawler
 
 
+def get_job_queue() -> JobQueue:
+    """Lazy-load the background job queue (REPO_CLONE_CONCURRENCY clones at once)."""
+    global _job_queue
+    if _job_queue is None:
+        _job_queue = JobQueue(concurrency=int(os.getenv("REPO_CLONE_CONCURRENCY", "4")))
+    return _job_queue
+
+
+async def _clone_job_runner(repo_id: str) -> str:
+    """Job runner: clone one registry repo without blocking the event loop; returns its local path."""
+    local_path = await get_repo_crawler().clone_repo_async(repo_id)
+    if not local_path:
+        raise RuntimeError(f"Failed to clone repo {repo_id}. Check logs for details.")
+    return str(local_path)
+
+
 # ============================================================================
 # Utility Functions
 # ============================================================================
@@ -152,19 +280,22 @@ def _format_products_xml(products: List[str]) -> str:
     return f"<products>{items}</products>"
 
 
+_RAI_DISCLAIMER = textwrap.dedent("""
+    ⚠️ RESPONSIBLE AI DISCLAIMER (RAI):
+    This AI solution must be deployed with governance guardrails including:
+    - Monitoring of model outputs for bias and accuracy
+    - Human review of high-impact decisions
+    - Transparency about AI capabilities and limitations to end users
+    - Compliance with Microsoft Responsible AI principles
+""").strip()
+
+
 def _get_rai_disclaimer(responsible_ai_tag: bool, solution_area: str) -> Optional[str]:
     """Generate RAI disclaimer if required."""
     if not responsible_ai_tag or solution_area != "AI":
         return None
     
-    return textwrap.dedent("""
-        ⚠️ RESPONSIBLE AI DISCLAIMER (RAI):
-        This AI solution must be deployed with governance guardrails including:
-        - Monitoring of model outputs for bias and accuracy
-        - Human review of high-impact decisions
-        - Transparency about AI capabilities and limitations to end users
-        - Compliance with Microsoft Responsible AI principles
-    """).strip()
+    return _RAI_DISCLAIMER
 
 
 def _create_context_block(
@@ -200,6 +331,116 @@ def _create_context_block(
     return block
 
 
+def _json(value: Any) -> bytes:
+    """Compact UTF-8 JSON, as FastAPI serializes responses."""
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+# Per-request ContextBlock fields; every other field is fixed per accelerator
+_SECTION_FIELDS = {"best_section", "best_section_source"}
+
+
+class MaterializedBlocks:
+    """
+    ContextBlocks for every catalog accelerator, built once per loaded catalog.
+    
+    `blocks` maps id -> ContextBlock; `json` holds each block already
+    serialized as the /accelerators/{id} response body, and `prefixes`
+    the same JSON without the per-request best-section fields (and the
+    closing brace). A /context response is then the search plus
+    concatenating these fragments.
+    """
+    
+    def __init__(self, catalog: CatalogData):
+        self.catalog = catalog
+        self.blocks: Dict[str, ContextBlock] = {}
+        self.json: Dict[str, bytes] = {}
+        self.prefixes: Dict[str, bytes] = {}
+        for accelerator in catalog.solution_accelerators:
+            block = _create_context_block(accelerator)
+            self.blocks[accelerator.id] = block
+            self.json[accelerator.id] = block.model_dump_json().encode("utf-8")
+            self.prefixes[accelerator.id] = block.model_dump_json(exclude=_SECTION_FIELDS).encode("utf-8")[:-1]
+    
+    def block_json(self, accelerator_id: str, section: Optional[Dict[str, Any]] = None) -> Optional[bytes]:
+        """Serialized block with a best-matching passage (from best_passages()) filled in, or None if unknown."""
+        prefix = self.prefixes.get(accelerator_id)
+        if prefix is None:
+            return None
+        if not section:
+            return self.json[accelerator_id]
+        metadata = section["metadata"]
+        source = f"{metadata['path']}#{metadata['heading']} (line {metadata['start_line']})"
+        return b"".join((
+            prefix,
+            b',"best_section":', _json(section["document"]),
+            b',"best_section_source":', _json(source),
+            b"}"
+        ))
+
+
+def get_context_blocks() -> MaterializedBlocks:
+    """Lazy-build the materialized context blocks; rebuilt whenever the scraper reloads the catalog."""
+    global _context_blocks
+    scraper = get_scraper()
+    catalog = scraper.catalog_data or scraper.load_catalog()
+    if _context_blocks is None or _context_blocks.catalog is not catalog:
+        _context_blocks = MaterializedBlocks(catalog)
+    return _context_blocks
+
+
+def _request_filters(request: ContextRequest) -> Dict[str, Optional[FilterValue]]:
+    """
+    Facet filters of a context request, keyed by vector store field.
+    
+    Raises:
+        ValueError: If a complexity bound is not a level
+    """
+    return {
+        "solution_area": request.solution_area,
+        "technical_complexity": with_range(request.complexity, request.complexity_min, request.complexity_max),
+        "responsible_ai_tag": request.responsible_ai_tag,
+        "deployment_type": request.deployment_type
+    }
+
+
+def _context_response(
+    request: ContextRequest,
+    accelerator_ids: List[str],
+    debug: Optional[Dict[str, Any]] = None
+) -> bytes:
+    """
+    Serialize the ContextResponse for a request from its ranked accelerator ids.
+    
+    Blocks come pre-serialized from the materialized blocks; only the
+    best-matching passages are encoded per request. When the request
+    asked for debug output, the search's debug entry is attached with
+    the time spent building the blocks added as 'context'.
+    
+    Returns:
+        ContextResponse JSON
+    """
+    start = time.perf_counter()
+    materialized = get_context_blocks()
+    
+    # Best-matching README/repo passage per accelerator (only their passages are scored)
+    sections = get_vector_store().best_passages(request.scenario_title, accelerator_ids)
+    
+    blocks = [materialized.block_json(accelerator_id, sections.get(accelerator_id)) for accelerator_id in accelerator_ids]
+    blocks = [block for block in blocks if block is not None]
+    
+    if request.debug and debug is not None:
+        debug = dict(debug, timings_ms=dict(debug["timings_ms"], context=round((time.perf_counter() - start) * 1000, 3)))
+    
+    return b"".join((
+        b'{"request_id":', _json(f"req_{hash(request.scenario_title)}"),
+        b',"blocks":[', b",".join(blocks),
+        b'],"count":', str(len(blocks)).encode("ascii"),
+        b',"debug":', _json(debug if request.debug else None),
+        b"}"
+    ))
+
+
 # ============================================================================
 # Endpoints
 # ============================================================================
@@ -213,6 +454,22 @@ async def health_check():
     }
 
 
+@app.get("/stats")
+async def get_stats():
+    """Vector store statistics: query cache hits and misses, and memory per document."""
+    try:
+        vector_store = get_vector_store()
+        return {
+            "documents": len(vector_store),
+            "mode": vector_store.mode,
+            "scorer": vector_store.scorer.name,
+            "query_cache": vector_store.cache_stats(),
+            "memory": vector_store.memory_report()
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @app.post("/context", response_model=ContextResponse)
 async def get_context(request: ContextRequest):
     """
@@ -223,6 +480,7 @@ async def get_context(request: ContextRequest):
     2. Search vector store for relevant accelerators
     3. Format results as ContextBlocks with XML tagging
     4. Inject RAI disclaimers if needed
+    5. Attach each accelerator's best-matching README/repo section, if indexed
     
     Args:
         request: ContextRequest with scenario_title and optional filters
@@ -234,37 +492,72 @@ async def get_context(request: ContextRequest):
         vector_store = get_vector_store()
         
         # Search vector store
-        search_results = vector_store.search(
-            query=request.scenario_title,
-            n_results=request.num_results,
-            solution_area=request.solution_area,
-            complexity=request.complexity
-        )
-        
-        # If no results, return empty response
-        if not search_results or not search_results['ids']:
-            return ContextResponse(
-                request_id=f"req_{hash(request.scenario_title)}",
-                blocks=[],
-                count=0
+        try:
+            search_results = vector_store.search(
+                query=request.scenario_title,
+                n_results=request.num_results,
+                filters=_request_filters(request),
+                exclude=request.exclude,
+                debug=request.debug
             )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
         
-        # Retrieve full accelerator details for context blocks
-        scraper = get_scraper()
-        blocks = []
+        # Context blocks are pre-serialized; the response is concatenated from them
+        return Response(
+            content=_context_response(request, search_results['ids'], search_results.get('debug')),
+            media_type="application/json"
+        )
+    
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/context/batch", response_model=BatchContextResponse)
+async def get_context_batch(batch: BatchContextRequest):
+    """
+    Resolve many scenarios in one round-trip.
+    
+    All scenarios are searched together with VectorStore.search_many, so
+    each posting list is walked once for every scenario sharing its term.
+    Each request keeps its own filters and num_results.
+    
+    Args:
+        batch: BatchContextRequest with a list of ContextRequests
         
-        for accelerator_id in search_results['ids']:
-            accelerator = scraper.get_accelerator_by_id(accelerator_id)
-            if accelerator:
-                block = _create_context_block(accelerator)
-                blocks.append(block)
+    Returns:
+        BatchContextResponse: One ContextResponse per request, in order
+    """
+    try:
+        vector_store = get_vector_store()
+        requests = batch.requests
+        if not requests:
+            return BatchContextResponse(results=[], count=0)
         
-        return ContextResponse(
-            request_id=f"req_{hash(request.scenario_title)}",
-            blocks=blocks,
-            count=len(blocks)
+        try:
+            search_results = vector_store.search_many(
+                [request.scenario_title for request in requests],
+                filters=[_request_filters(request) for request in requests],
+                n_results=max(request.num_results for request in requests),
+                exclude=[request.exclude for request in requests],
+                debug=any(request.debug for request in requests)
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        
+        results = [
+            _context_response(request, result['ids'][:request.num_results], result.get('debug'))
+            for request, result in zip(requests, search_results)
+        ]
+        return Response(
+            content=b'{"results":[' + b",".join(results) + b'],"count":' + str(len(results)).encode("ascii") + b"}",
+            media_type="application/json"
         )
     
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -279,17 +572,59 @@ async def list_accelerators():
         raise HTTPException(status_code=500, detail=str(e))
 
 
+# Declared before /accelerators/{accelerator_id} so "facets" is not taken for an id
+@app.get("/accelerators/facets", response_model=FacetResponse)
+async def accelerator_facets(
+    q: Optional[str] = None,
+    n_results: int = Query(100, ge=1),
+    solution_area: Optional[List[str]] = Query(None),
+    complexity: Optional[List[str]] = Query(None),
+    complexity_min: Optional[str] = None,
+    complexity_max: Optional[str] = None,
+    deployment_type: Optional[List[str]] = Query(None),
+    products: Optional[List[str]] = Query(None),
+    languages: Optional[List[str]] = Query(None),
+    fields: Optional[List[str]] = Query(None)
+):
+    """
+    Accelerator counts per solution area, complexity, product, language (and the other facets).
+    
+    Counts come straight from the vector store's filter bitmaps, so
+    dashboards get aggregates without pulling the catalog. Repeated
+    filter parameters match any of their values; `complexity_min` and
+    `complexity_max` bound the complexity level. With `q` the counts
+    cover the query's top `n_results` matches only.
+    """
+    try:
+        vector_store = get_vector_store()
+        try:
+            filters = {
+                "solution_area": solution_area,
+                "technical_complexity": with_range(complexity, complexity_min, complexity_max),
+                "deployment_type": deployment_type,
+                "products": products,
+                "languages": languages
+            }
+            counts = vector_store.facet_counts(query=q, n_results=n_results, filters=filters, fields=fields)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        return FacetResponse(**counts)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 @app.get("/accelerators/{accelerator_id}", response_model=ContextBlock)
 async def get_accelerator(accelerator_id: str):
-    """Retrieve a specific accelerator as a context block."""
+    """Retrieve a specific accelerator as a context block (served pre-serialized)."""
     try:
-        scraper = get_scraper()
-        accelerator = scraper.get_accelerator_by_id(accelerator_id)
+        block = get_context_blocks().json.get(accelerator_id)
         
-        if not accelerator:
+        if block is None:
             raise HTTPException(status_code=404, detail="Accelerator not found")
         
-        return _create_context_block(accelerator)
+        return Response(content=block, media_type="application/json")
     except HTTPException:
         raise
     except Exception as e:
@@ -362,52 +697,62 @@ async def remove_repo(repo_id: str):
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.post("/repos/{repo_id}/clone")
+@app.post("/repos/{repo_id}/clone", status_code=202)
 async def clone_repo(repo_id: str):
-    """Clone a specific repo from GitHub."""
+    """
+    Clone a specific repo from GitHub in the background.
+    
+    Returns the job at once; poll GET /jobs/{job_id} for progress and
+    the clone's local path.
+    """
     try:
         crawler = get_repo_crawler()
-        local_path = crawler.clone_repo(repo_id)
+        repo = crawler.get_repo(repo_id)
         
-        if not local_path:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Failed to clone repo {repo_id}. Check logs for details."
-            )
+        if not repo:
+            raise HTTPException(status_code=404, detail=f"Repo {repo_id} not found in registry")
+        if not repo.get("enabled", True):
+            raise HTTPException(status_code=400, detail=f"Repo {repo_id} is disabled in registry")
         
-        return {
-            "status": "success",
-            "message": f"Repo {repo_id} cloned successfully",
-            "local_path": str(local_path)
-        }
+        job = get_job_queue().submit("clone", [repo_id], _clone_job_runner)
+        return dict(job.to_dict(), status_url=f"/jobs/{job.id}")
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.post("/repos/clone-all")
+@app.post("/repos/clone-all", status_code=202)
 async def clone_all_repos():
-    """Clone all enabled repos from the registry."""
+    """
+    Clone all enabled repos from the registry in the background.
+    
+    Clones run concurrently up to REPO_CLONE_CONCURRENCY; poll
+    GET /jobs/{job_id} for per-repo results.
+    """
     try:
         crawler = get_repo_crawler()
-        results = crawler.clone_all_repos()
-        
-        successful = [repo_id for repo_id, success in results.items() if success]
-        failed = [repo_id for repo_id, success in results.items() if not success]
-        
-        return {
-            "status": "success",
-            "total": len(results),
-            "successful": len(successful),
-            "failed": len(failed),
-            "successful_repos": successful,
-            "failed_repos": failed
-        }
+        job = get_job_queue().submit("clone-all", crawler.enabled_repo_ids(), _clone_job_runner)
+        return dict(job.to_dict(), status_url=f"/jobs/{job.id}")
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.get("/jobs")
+async def list_jobs():
+    """Background jobs still held by the queue, newest first."""
+    return [job.to_dict() for job in get_job_queue().jobs()]
+
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Progress and per-item results of a background job."""
+    job = get_job_queue().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return job.to_dict()
+
+
 @app.get("/repos/{repo_id}/files")
 async def list_repo_files(repo_id: str):
     """List all indexable files in a cloned repo."""
@@ -460,16 +805,6 @@ async def get_repo_readme(repo_id: str):
 # Startup/Shutdown
 # ============================================================================
 
-@app.on_event("startup")
-async def startup():
-    """Pre-load scraper and vector store on startup."""
-    try:
-        get_scraper()
-        get_vector_store()
-    except Exception as e:
-        print(f"Warning: Could not initialize modules on startup: {e}")
-
-
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
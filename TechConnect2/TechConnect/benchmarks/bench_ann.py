@@ -0,0 +1,102 @@
+"""
+IVF approximate search benchmark for the TechConnect vector store.
+Measures recall@k against the exact dense scan and per-query latency
+for a range of nprobe values, on a synthetic topic-clustered catalog.
+Recall is tie-aware: a hit counts if it scores at least as well as the
+exact k-th result.
+
+Run from the TechConnect directory:
+    python benchmarks/bench_ann.py [--docs 50000] [--nprobe 1 2 4 8 16 32] [--k 10]
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from models.schemas import CatalogItem
+from vector_store.store import VectorStore
+
+TOPICS = [
+    "agent automation orchestration workflow copilot planner tools",
+    "fabric lakehouse analytics warehouse pipeline spark notebook",
+    "security identity sentinel defender threat compliance policy",
+    "retrieval search index chunk embedding grounding citation",
+    "speech vision document intelligence extraction forms ocr",
+    "container kubernetes functions deployment bicep terraform azd",
+    "cosmos database postgres replication backup migration schema",
+    "monitoring telemetry logging alerts dashboards tracing insights",
+]
+COMMON = "azure solution accelerator sample reference architecture guide".split()
+
+
+def _synthetic_items(n_docs: int, seed: int = 11):
+    """Items mixing one dominant topic with noise, so vectors form loose clusters."""
+    rng = random.Random(seed)
+    topics = [topic.split() for topic in TOPICS]
+    vocabulary = [word for topic in topics for word in topic]
+    for i in range(n_docs):
+        words = rng.choices(topics[rng.randrange(len(topics))], k=12)
+        words += rng.choices(vocabulary, k=6) + rng.choices(COMMON, k=4)
+        yield CatalogItem(
+            id=f"doc-{i}",
+            name=f"Accelerator {i}",
+            solution_area="AI",
+            technical_complexity="L300",
+            repository_url=f"https://github.com/example/doc-{i}",
+            description=" ".join(words),
+        )
+
+
+def _queries(n_queries: int, seed: int = 5):
+    rng = random.Random(seed)
+    return [" ".join(rng.choices(rng.choice(TOPICS).split() + COMMON, k=5)) for _ in range(n_queries)]
+
+
+def run(n_docs: int, nprobes, k: int, n_queries: int):
+    items = list(_synthetic_items(n_docs))
+    queries = _queries(n_queries)
+
+    exact = VectorStore(mode="dense", cache_size=0)
+    start = time.perf_counter()
+    exact.ingest_accelerators(items)
+    print(f"Indexed {n_docs} docs exactly in {time.perf_counter() - start:.1f}s")
+
+    approximate = VectorStore(mode="dense", ann="ivf", cache_size=0)
+    start = time.perf_counter()
+    approximate.ingest_accelerators(items)
+    ivf = approximate._segment.ann
+    print(f"Indexed {n_docs} docs with IVF ({len(ivf.centroids)} lists) in {time.perf_counter() - start:.1f}s\n")
+
+    thresholds = []  # exact k-th best distance per query
+    start = time.perf_counter()
+    for query in queries:
+        thresholds.append(exact.search(query, n_results=k)["distances"][-1])
+    exact_ms = (time.perf_counter() - start) * 1000 / n_queries
+
+    print(f"{'nprobe':>7} {f'recall@{k}':>10} {'ms/query':>9} {'speedup':>8}")
+    print(f"{'exact':>7} {1.0:>10.3f} {exact_ms:>9.2f} {1.0:>7.1f}x")
+    for nprobe in nprobes:
+        approximate.nprobe = nprobe
+        hits = 0
+        start = time.perf_counter()
+        for query, threshold in zip(queries, thresholds):
+            distances = approximate.search(query, n_results=k)["distances"]
+            hits += sum(distance <= threshold + 1e-6 for distance in distances)
+        ms = (time.perf_counter() - start) * 1000 / n_queries
+        print(f"{nprobe:>7} {hits / (k * n_queries):>10.3f} {ms:>9.2f} {exact_ms / ms:>7.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--docs", type=int, default=50_000)
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32])
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+    run(args.docs, args.nprobe, args.k, args.queries)
@@ -0,0 +1,63 @@
+"""
+Resident memory benchmark for the TechConnect vector store.
+Indexes a synthetic catalog with README-length descriptions over a Zipfian
+vocabulary and prints memory_report() next to the tracemalloc heap delta.
+
+Run from the TechConnect directory:
+    python benchmarks/bench_memory.py [--docs 20000] [--words 200]
+"""
+
+import argparse
+import gc
+import json
+import random
+import sys
+import tracemalloc
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from models.schemas import CatalogItem
+from vector_store.store import VectorStore
+
+
+def _synthetic_items(n_docs: int, words_per_doc: int, vocabulary: int = 20_000, seed: int = 3):
+    """Items whose descriptions draw words from a Zipf(1.1) distribution, as real text does."""
+    rng = random.Random(seed)
+    words = [f"w{rank}x" for rank in range(vocabulary)]
+    weights = [1.0 / (rank + 1) ** 1.1 for rank in range(vocabulary)]
+    areas = ["AI", "Security", "Azure (Data & AI)"]
+    for i in range(n_docs):
+        yield CatalogItem(
+            id=f"doc-{i}",
+            name=f"Accelerator {i}",
+            solution_area=areas[i % len(areas)],
+            technical_complexity="L300",
+            repository_url=f"https://github.com/example/doc-{i}",
+            description=" ".join(rng.choices(words, weights, k=words_per_doc)),
+        )
+
+
+def run(n_docs: int, words_per_doc: int):
+    items = list(_synthetic_items(n_docs, words_per_doc))
+    gc.collect()
+    tracemalloc.start()
+    store = VectorStore(cache_size=0)
+    store.ingest_accelerators(items)
+    gc.collect()
+    heap, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    report = store.memory_report()
+    print(json.dumps(report, indent=2))
+    print(f"\ntracemalloc heap delta: {heap / n_docs:.0f} bytes/document")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--docs", type=int, default=20_000)
+    parser.add_argument("--words", type=int, default=200)
+    args = parser.parse_args()
+    run(args.docs, args.words)
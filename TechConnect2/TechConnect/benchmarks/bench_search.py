@@ -0,0 +1,294 @@
+"""
+Search benchmark suite for the TechConnect and System2 vector stores.
+Generates synthetic catalogs (1k to 1M items) from the vocabulary of the
+real catalog.json and measures ingest throughput, query latency
+percentiles and peak RSS for every scorer and index mode, one fresh
+process per configuration. Results are written as JSON for comparing
+releases.
+
+Run from the TechConnect directory:
+    python benchmarks/bench_search.py [--sizes 1000 10000 100000] [--configs lexical-bm25 ...]
+        [--queries 200] [--output results.json] [--compare baseline.json]
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import random
+import re
+import resource
+import subprocess
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from models.schemas import CatalogItem
+
+SYSTEM2_ROOT = project_root.parent.parent / "System2-RAG"
+
+# name -> SimpleVectorStore options ("system2" is System2's VectorStore)
+CONFIGS: Dict[str, Optional[Dict[str, Any]]] = {
+    "lexical-jaccard": {"mode": "lexical", "scorer": "jaccard"},
+    "lexical-bm25": {"mode": "lexical", "scorer": "bm25"},
+    "lexical-bm25-rerank": {"mode": "lexical", "scorer": "bm25", "rerank": "bm25f,products"},
+    "dense-exact": {"mode": "dense"},
+    "dense-int8": {"mode": "dense", "quantize": True},
+    "dense-ivf": {"mode": "dense", "ann": "ivf"},
+    "dense-ivf-int8": {"mode": "dense", "ann": "ivf", "quantize": True},
+    "hybrid-jaccard": {"mode": "hybrid", "scorer": "jaccard"},
+    "hybrid-bm25": {"mode": "hybrid", "scorer": "bm25"},
+    "system2": None,
+}
+
+# Every n-th query also filters on solution_area
+FILTER_EVERY = 4
+
+# Long-tail terms added after the real catalog words
+TAIL_VOCABULARY = 50_000
+
+
+def catalog_vocabulary(catalog_path: Path) -> Tuple[List[str], Dict[str, List[str]]]:
+    """
+    Words of the real catalog ordered by frequency, plus the value lists of its facet fields.
+
+    Returns:
+        (words, fields) where fields maps solution_area, technical_complexity,
+        deployment_type, products_and_services and languages to their values
+    """
+    with open(catalog_path, 'r', encoding='utf-8') as f:
+        items = json.load(f)["solution_accelerators"]
+    counts: Counter = Counter()
+    fields: Dict[str, set] = {
+        "solution_area": set(), "technical_complexity": set(), "deployment_type": set(),
+        "products_and_services": set(), "languages": set(),
+    }
+    for item in items:
+        text = " ".join([item["name"], item["description"], *item.get("products_and_services", [])])
+        counts.update(word for word in re.findall(r"[a-z][a-z0-9]+", text.lower()) if len(word) >= 3)
+        for field, values in fields.items():
+            value = item.get(field)
+            values.update(value if isinstance(value, list) else [value] if value else [])
+    return [word for word, _ in counts.most_common()], {field: sorted(values) for field, values in fields.items()}
+
+
+def synthetic_catalog(n_items: int, catalog_path: Path, seed: int = 1) -> Iterator[CatalogItem]:
+    """
+    Deterministic synthetic CatalogItems.
+
+    Descriptions draw 30-120 words from a Zipf(1.1) distribution whose head
+    is the real catalog's words (most frequent first) and whose tail is
+    synthetic terms, so posting-list lengths follow real text. Facet values
+    and products are sampled from the real catalog.
+    """
+    rng = random.Random(seed)
+    words, fields = catalog_vocabulary(catalog_path)
+    vocabulary = words + [f"term{rank}" for rank in range(TAIL_VOCABULARY)]
+    cumulative = np.cumsum([1.0 / (rank + 1) ** 1.1 for rank in range(len(vocabulary))]).tolist()
+    for i in range(n_items):
+        description = rng.choices(vocabulary, cum_weights=cumulative, k=rng.randint(30, 120))
+        yield CatalogItem(
+            id=f"synthetic-{i}",
+            name=" ".join(rng.choices(words[:200], k=3)).title(),
+            solution_area=rng.choice(fields["solution_area"]),
+            technical_complexity=rng.choice(fields["technical_complexity"]),
+            repository_url=f"https://github.com/example/synthetic-{i}",
+            description=" ".join(description),
+            products_and_services=rng.sample(fields["products_and_services"], k=min(3, len(fields["products_and_services"]))),
+            languages=rng.sample(fields["languages"], k=min(2, len(fields["languages"]))),
+            responsible_ai_tag=rng.random() < 0.3,
+            deployment_type=rng.choice(fields["deployment_type"]),
+        )
+
+
+def synthetic_queries(n_queries: int, catalog_path: Path, seed: int = 2) -> List[Tuple[str, Optional[str]]]:
+    """(query, solution_area filter or None) pairs built from the catalog's common words."""
+    rng = random.Random(seed)
+    words, fields = catalog_vocabulary(catalog_path)
+    return [
+        (" ".join(rng.sample(words[:300], k=rng.randint(2, 6))),
+         rng.choice(fields["solution_area"]) if q % FILTER_EVERY == 0 else None)
+        for q in range(n_queries)
+    ]
+
+
+def _rss_mb() -> float:
+    """Current resident set size in MB (Linux), or 0 where /proc is unavailable."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError):
+        return 0.0
+
+
+def _peak_rss_mb() -> float:
+    """Peak resident set size of this process in MB (ru_maxrss is KB on Linux, bytes on macOS)."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 2**20 if sys.platform == "darwin" else peak / 2**10
+
+
+def _system2_store_class():
+    """System2's VectorStore class, importing its app package."""
+    sys.path.insert(0, str(SYSTEM2_ROOT))
+    from app.main import VectorStore as System2VectorStore
+    return System2VectorStore
+
+
+def _run_config(name: str, n_items: int, n_queries: int, n_results: int, catalog_path: str) -> Dict[str, Any]:
+    """Benchmark one configuration at one size (runs in its own process)."""
+    catalog_path = Path(catalog_path)
+    items = list(synthetic_catalog(n_items, catalog_path))
+    queries = synthetic_queries(n_queries, catalog_path)
+    baseline_rss = _rss_mb()
+
+    if CONFIGS[name] is None:
+        store_class = _system2_store_class()
+        solutions = [
+            {"id": item.id, "name": item.name, "description": item.description,
+             "solution_area": item.solution_area.value, "technical_complexity": item.technical_complexity.value,
+             "key_technologies": item.products_and_services, "use_cases": []}
+            for item in items
+        ]
+        del items
+        start = time.perf_counter()
+        store = store_class(solutions)
+        ingest = time.perf_counter() - start
+        search = lambda query, area: store.search(query, top_k=n_results, area_filter=area)
+    else:
+        from vector_store.store import VectorStore
+        store = VectorStore(cache_size=0, **CONFIGS[name])
+        start = time.perf_counter()
+        store.ingest_accelerators(items)
+        ingest = time.perf_counter() - start
+        del items
+        search = lambda query, area: store.search(query, n_results=n_results, solution_area=area)
+
+    search(*queries[0])  # warm-up (scorer statistics, lazy structures)
+    latencies = []
+    for query, area in queries:
+        start = time.perf_counter()
+        search(query, area)
+        latencies.append((time.perf_counter() - start) * 1000)
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99]).tolist()
+
+    return {
+        "store": "system2" if CONFIGS[name] is None else "techconnect",
+        "config": name,
+        "documents": n_items,
+        "ingest_seconds": round(ingest, 3),
+        "ingest_docs_per_second": round(n_items / ingest, 1) if ingest else None,
+        "queries": len(latencies),
+        "latency_ms": {
+            "p50": round(p50, 3), "p95": round(p95, 3), "p99": round(p99, 3),
+            "mean": round(float(np.mean(latencies)), 3),
+        },
+        "baseline_rss_mb": round(baseline_rss, 1),
+        "peak_rss_mb": round(_peak_rss_mb(), 1),
+    }
+
+
+def _run_isolated(name: str, n_items: int, n_queries: int, n_results: int, catalog_path: Path) -> Dict[str, Any]:
+    """Run one configuration in a fresh spawned process, so peak RSS is its own."""
+    context = multiprocessing.get_context("spawn")
+    with context.Pool(1) as pool:
+        try:
+            return pool.apply(_run_config, (name, n_items, n_queries, n_results, str(catalog_path)))
+        except (ImportError, SyntaxError) as e:
+            # e.g. System2's app needs fastapi and Python 3.12
+            return {"store": "system2" if CONFIGS[name] is None else "techconnect", "config": name,
+                    "documents": n_items, "skipped": f"{type(e).__name__}: {e}"}
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=project_root,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results: List[Dict], baseline: List[Dict], tolerance: float = 0.2) -> List[str]:
+    """
+    Regressions against a baseline run, matched by (config, documents).
+
+    Flags p95 latency or peak RSS more than ``tolerance`` above the
+    baseline, and ingest throughput more than ``tolerance`` below it.
+    """
+    previous = {(r["config"], r["documents"]): r for r in baseline if "skipped" not in r}
+    regressions = []
+    for result in results:
+        old = previous.get((result["config"], result["documents"]))
+        if old is None or "skipped" in result:
+            continue
+        label = f"{result['config']} @ {result['documents']}"
+        checks = [
+            ("p95 latency", result["latency_ms"]["p95"], old["latency_ms"]["p95"], 1),
+            ("peak RSS", result["peak_rss_mb"], old["peak_rss_mb"], 1),
+            ("ingest throughput", result["ingest_docs_per_second"], old["ingest_docs_per_second"], -1),
+        ]
+        for metric, new_value, old_value, direction in checks:
+            if new_value and old_value and direction * (new_value - old_value) > tolerance * old_value:
+                regressions.append(f"{label}: {metric} {old_value} -> {new_value}")
+    return regressions
+
+
+def run(sizes: List[int], configs: List[str], n_queries: int, n_results: int, catalog_path: Path) -> Dict[str, Any]:
+    results = []
+    print(f"{'config':<20} {'docs':>8} {'ingest/s':>10} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'peak MB':>8}")
+    for n_items in sizes:
+        for name in configs:
+            result = _run_isolated(name, n_items, n_queries, n_results, catalog_path)
+            results.append(result)
+            if "skipped" in result:
+                print(f"{name:<20} {n_items:>8} skipped ({result['skipped']})")
+                continue
+            latency = result["latency_ms"]
+            print(f"{name:<20} {n_items:>8} {result['ingest_docs_per_second']:>10.0f} {latency['p50']:>8.2f} "
+                  f"{latency['p95']:>8.2f} {latency['p99']:>8.2f} {result['peak_rss_mb']:>8.0f}")
+    return {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "queries": n_queries,
+            "n_results": n_results,
+        },
+        "results": results,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--configs", nargs="+", choices=list(CONFIGS), default=list(CONFIGS))
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--catalog", type=Path, default=project_root / "catalog.json")
+    parser.add_argument("--output", type=Path, default=project_root / "benchmarks" / "results" / f"search-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    parser.add_argument("--compare", type=Path, help="Earlier results file to check for regressions")
+    args = parser.parse_args()
+
+    report = run(args.sizes, args.configs, args.queries, args.k, args.catalog)
+    args.output.parent.mkdir(parents=True, exist_ok=True)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nWrote {args.output}")
+
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            regressions = compare(report["results"], json.load(f)["results"])
+        print("\n".join(["Regressions:"] + regressions) if regressions else "No regressions")
+        sys.exit(1 if regressions else 0)
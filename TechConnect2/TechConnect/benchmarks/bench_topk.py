@@ -0,0 +1,100 @@
+"""
+Top-k selection micro-benchmark for the TechConnect vector store.
+Compares the old full-sort ranking (materialize, sort, re-look up documents)
+with the bounded-heap selection used by search(), at 10k and 100k documents.
+
+Run from the TechConnect directory:
+    python benchmarks/bench_topk.py [--sizes 10000 100000] [--repeat 20]
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+# Add project root to path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from models.schemas import CatalogItem
+from vector_store.store import VectorStore
+
+WORDS = (
+    "agent automation fabric lakehouse governance purview copilot retrieval "
+    "search chat foundry openai analytics pipeline security identity monitoring "
+    "deployment bicep container functions cosmos databricks streaming vision speech"
+).split()
+
+QUERY = "azure agent automation with governance"
+
+
+def _synthetic_items(n_docs: int, seed: int = 7):
+    """n_docs catalog items; every description mentions 'azure' so most docs match."""
+    rng = random.Random(seed)
+    for i in range(n_docs):
+        yield CatalogItem(
+            id=f"doc-{i}",
+            name=f"Accelerator {i}",
+            solution_area="AI",
+            technical_complexity="L300",
+            repository_url=f"https://github.com/example/doc-{i}",
+            description="azure " + " ".join(rng.choices(WORDS, k=20)),
+        )
+
+
+def _full_sort(store: VectorStore, scores, n_results: int):
+    """Ranking as search() did it before: sort every candidate, then re-look up documents."""
+    doc_ids = store._segment.index.doc_ids
+    ranked = [(doc_ids[ordinal], score) for ordinal, score in scores.items()]
+    ranked.sort(key=lambda x: x[1], reverse=True)
+    ids = [doc_id for doc_id, _ in ranked[:n_results]]
+    return {
+        "ids": ids,
+        "documents": [store.documents[doc_id].text for doc_id in ids],
+        "metadatas": [store.documents[doc_id].metadata for doc_id in ids],
+        "distances": [store.scorer.to_distance(score) for _, score in ranked[:n_results]],
+    }
+
+
+def _heap(store: VectorStore, scores, n_results: int):
+    """Ranking as search() does it now."""
+    segment = store._segment
+    return store._results(store._rank_lexical(segment, scores, n_results, segment.facets.live))
+
+
+def _best_ms(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def run(sizes, repeat: int, n_results: int = 5):
+    print(f"{'docs':>8} {'scorer':>8} {'candidates':>11} {'full sort':>11} {'heap':>9} {'speedup':>8} {'search()':>10}")
+    for n_docs in sizes:
+        for scorer in ("jaccard", "bm25"):
+            store = VectorStore(scorer=scorer, cache_size=0)
+            store.ingest_accelerators(list(_synthetic_items(n_docs)))
+            segment = store._segment
+            segment.prepare()
+            scores = store.scorer.score(segment.index, set(store._tokenize(QUERY)), segment.facets.live)
+
+            assert _heap(store, scores, n_results)["distances"] == _full_sort(store, scores, n_results)["distances"]
+            full_ms = _best_ms(lambda: _full_sort(store, scores, n_results), repeat)
+            heap_ms = _best_ms(lambda: _heap(store, scores, n_results), repeat)
+            search_ms = _best_ms(lambda: store.search(QUERY, n_results=n_results), repeat)
+            print(
+                f"{n_docs:>8} {scorer:>8} {len(scores):>11} {full_ms:>9.2f}ms "
+                f"{heap_ms:>7.2f}ms {full_ms / heap_ms:>7.1f}x {search_ms:>8.2f}ms"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    run(args.sizes, args.repeat)
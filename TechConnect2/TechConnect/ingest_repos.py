@@ -1,14 +1,18 @@
 """
 Ingest cloned GitHub repos into the vector store
 Extracts README, key files, and metadata for indexing
+README and repo files are also chunked into passages indexed under each accelerator
 """
 
 import json
 import logging
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Any, Dict, List, Optional
+from ingestion.chunker import iter_repo_passages
 from ingestion.github_crawler import GitHubRepoCrawler
 from models.schemas import CatalogItem, CatalogData
+from vector_store.embedding_cache import EmbeddingCache
+from vector_store.snapshot import content_hash
 from vector_store.store import VectorStore
 
 logging.basicConfig(level=logging.INFO)
@@ -16,16 +20,40 @@ logger = logging.getLogger(__name__)
 
 
 class RepoIngester:
-    """Ingest GitHub repos into vector store."""
+    """
+    Ingest GitHub repos into vector store.
+    
+    In dense and hybrid modes, passage vectors are cached on disk under
+    embedding_cache_dir, so a re-run only embeds new or changed chunks.
+    
+    Ingesting updates the in-memory catalog and store only; flush() writes
+    catalog.json and the store snapshot once for everything ingested since
+    the last flush. ingest_all_repos() flushes at the end, and using the
+    ingester as a context manager flushes on exit.
+    """
     
     def __init__(self, registry_path: str = "repos-registry.json", 
                  repos_dir: str = "./repos",
                  catalog_path: str = "catalog.json",
-                 persist_dir: str = ".chroma"):
+                 persist_dir: str = ".chroma",
+                 embedding_cache_dir: Optional[str] = ".embedding-cache",
+                 embedding_cache_mb: int = 512,
+                 **store_options: Any):
         self.crawler = GitHubRepoCrawler(registry_path, repos_dir)
         self.catalog_path = Path(catalog_path)
-        self.vector_store = VectorStore(persist_dir=persist_dir)
+        embedding_cache = None
+        if embedding_cache_dir:
+            embedding_cache = EmbeddingCache(embedding_cache_dir, max_bytes=embedding_cache_mb * 1024 * 1024)
+        self.vector_store = VectorStore(persist_dir=persist_dir, embedding_cache=embedding_cache, **store_options)
         self.catalog = self._load_catalog()
+        self._load_vector_store()
+        self._unsaved = False
+    
+    def __enter__(self) -> "RepoIngester":
+        return self
+    
+    def __exit__(self, *exc_info) -> None:
+        self.flush()
     
     def _load_catalog(self) -> CatalogData:
         """Load existing catalog."""
@@ -43,9 +71,78 @@ class RepoIngester:
                 solution_accelerators=[]
             )
     
+    def _load_vector_store(self):
+        """Reuse the snapshot built from the current catalog, or index it once."""
+        source_hash = content_hash(self.catalog_path) if self.catalog_path.exists() else None
+        if not self.vector_store.load(source_hash=source_hash):
+            self.vector_store.ingest_accelerators(self.catalog.solution_accelerators)
+    
+    def _publish(self, items: List[CatalogItem]):
+        """Upsert the changed items (and their passages); flush() persists them."""
+        if not items:
+            return
+        
+        logger.info(f"📚 Indexing {len(items)} changed accelerators...")
+        self.vector_store.upsert(items)
+        for item in items:
+            # Streamed file by file; memory is bounded by the batch, not the repo
+            count = self.vector_store.upsert_passages(item.id, iter_repo_passages(self.crawler, item.id))
+            logger.info(f"📄 Indexed {count} passages for {item.id}")
+        self._unsaved = True
+        logger.info("✅ Vector store updated")
+    
+    def flush(self) -> bool:
+        """
+        Write catalog.json and snapshot the store, if anything was ingested since the last flush.
+        
+        Returns:
+            True if anything was written
+        """
+        if not self._unsaved:
+            return False
+        self._save_catalog()
+        try:
+            # Keyed by the new catalog hash, so the API loads it without re-indexing
+            self.vector_store.save(source_hash=content_hash(self.catalog_path))
+        except OSError as e:
+            logger.warning(f"Could not save vector store snapshot: {e}")
+        if self.vector_store.embedding_cache is not None and self.vector_store.embedder is not None:
+            stats = self.vector_store.embedding_cache.stats()
+            logger.info(f"🧠 Embedding cache: {stats['hits']} reused, {stats['misses']} embedded")
+        self._unsaved = False
+        return True
+    
+    def ingest_repo(self, repo_id: str) -> bool:
+        """
+        Refresh a single repo; only its own postings are re-indexed.
+        
+        The catalog and snapshot are written by the next flush(), so a run
+        of single-repo refreshes pays for one save rather than one each.
+        
+        Args:
+            repo_id: Repo ID from the registry
+            
+        Returns:
+            True if the repo was ingested
+        """
+        repo_config = next((r for r in self.crawler.list_repos() if r["id"] == repo_id), None)
+        if repo_config is None:
+            logger.error(f"❌ Unknown repo: {repo_id}")
+            return False
+        
+        item = self._ingest_repo(repo_config)
+        if item is None:
+            logger.warning(f"⚠️  Partial ingest for {repo_id}")
+            return False
+        
+        self._publish([item])
+        logger.info(f"✅ Ingested {repo_id}")
+        return True
+    
     def ingest_all_repos(self) -> Dict[str, bool]:
         """Ingest all enabled repos into vector store."""
         results = {}
+        changed = []
         
         repos = self.crawler.list_repos()
         logger.info(f"🔄 Ingesting {len(repos)} repos...")
@@ -54,9 +151,10 @@ class RepoIngester:
             if repo_config.get("enabled", True):
                 repo_id = repo_config["id"]
                 try:
-                    success = self._ingest_repo(repo_config)
-                    results[repo_id] = success
-                    if success:
+                    item = self._ingest_repo(repo_config)
+                    results[repo_id] = item is not None
+                    if item is not None:
+                        changed.append(item)
                         logger.info(f"✅ Ingested {repo_id}")
                     else:
                         logger.warning(f"⚠️  Partial ingest for {repo_id}")
@@ -64,25 +162,21 @@ class RepoIngester:
                     logger.error(f"❌ Failed to ingest {repo_id}: {e}")
                     results[repo_id] = False
         
-        # Save updated catalog
-        self._save_catalog()
-        
-        # Ingest into vector store
-        logger.info("📚 Indexing into vector store...")
-        self.vector_store.ingest_accelerators(self.catalog.solution_accelerators)
-        logger.info("✅ Vector store updated")
+        # Re-index only the repos that changed, then save catalog and snapshot once
+        self._publish(changed)
+        self.flush()
         
         return results
     
-    def _ingest_repo(self, repo_config: Dict) -> bool:
-        """Ingest a single repo."""
+    def _ingest_repo(self, repo_config: Dict) -> Optional[CatalogItem]:
+        """Ingest a single repo; returns its updated catalog item."""
         repo_id = repo_config["id"]
         
         # Extract README
         readme = self.crawler.extract_readme(repo_id)
         if not readme:
             logger.warning(f"No README found for {repo_id}")
-            return False
+            return None
         
         # Get list of files
         files = self.crawler.get_repo_files(repo_id)
@@ -98,6 +192,7 @@ class RepoIngester:
             # Update existing
             existing.description = readme
             logger.info(f"Updated existing catalog item: {repo_id}")
+            return existing
         else:
             # Create new catalog item
             item = CatalogItem(
@@ -117,8 +212,7 @@ class RepoIngester:
             
             self.catalog.solution_accelerators.append(item)
             logger.info(f"Added new catalog item: {repo_id} ({file_count} files)")
-        
-        return True
+            return item
     
     def _extract_products(self, readme: str) -> List[str]:
         """Extract Azure products mentioned in README."""
@@ -0,0 +1,194 @@
+"""
+Streaming passage chunker for cloned repos.
+Splits markdown and source files into overlapping, heading-aware passages
+one line at a time, so memory stays bounded by the passage size.
+"""
+
+import logging
+import re
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+MARKDOWN_EXTENSIONS = {".md", ".markdown", ".rst", ".txt"}
+
+_md_heading = re.compile(r'^(#{1,6})\s+(.+?)\s*#*\s*$')
+_code_boundary = re.compile(
+    r'^(?:async\s+def|def|class|function|export\s+(?:default\s+)?(?:async\s+)?(?:function|class)|'
+    r'(?:const|let|var)\s+\w+\s*=\s*(?:async\s*)?\(|[\w-]+:\s*$)'
+)
+
+
+@dataclass
+class Passage:
+    """A chunk of a repo file, linked back to its parent accelerator."""
+    parent_id: str
+    path: str
+    heading: str
+    text: str
+    start_line: int
+    index: int
+
+    @property
+    def id(self) -> str:
+        """Stable passage id: parent id, file path and position in the file."""
+        return f"{self.parent_id}::{self.path}#{self.index}"
+
+
+def _split_long(line: str, max_chars: int) -> Iterator[str]:
+    """Break a single over-long line into max_chars pieces."""
+    for start in range(0, len(line), max_chars):
+        yield line[start:start + max_chars]
+
+
+def chunk_lines(
+    lines: Iterable[str],
+    markdown: bool = True,
+    max_chars: int = 1200,
+    overlap: int = 200
+) -> Iterator[Tuple[str, str, int]]:
+    """
+    Split a stream of lines into passages.
+
+    A new passage starts at every markdown heading (or top-level code
+    definition) and whenever the current one reaches max_chars. Passages
+    split for size carry up to ``overlap`` characters of trailing lines
+    into the next one and restate their section heading.
+
+    Args:
+        lines: Lines of one file (e.g. an open file object)
+        markdown: Split on markdown headings rather than code definitions
+        max_chars: Target passage size
+        overlap: Characters of context repeated across a size split
+
+    Yields:
+        (heading, text, start_line) tuples; heading is the "A > B" trail
+        for markdown or the definition line for code
+    """
+    headings: List[str] = []  # markdown heading trail, one entry per level
+    heading = ""
+    buffer: List[str] = []
+    size = 0
+    floor = 0  # size of the carried-over context at the start of the buffer
+    start_line = 1
+
+    def flush() -> Optional[Tuple[str, str, int]]:
+        text = "".join(buffer).strip()
+        return (heading, text, start_line) if text else None
+
+    for line_no, raw in enumerate(lines, 1):
+        pieces = _split_long(raw, max_chars) if len(raw) > max_chars else (raw,)
+        for line in pieces:
+            boundary = None
+            if markdown:
+                match = _md_heading.match(line)
+                if match:
+                    level = len(match.group(1))
+                    del headings[level - 1:]
+                    headings.extend([""] * (level - 1 - len(headings)))
+                    headings.append(match.group(2))
+                    boundary = " > ".join(h for h in headings if h)
+            elif _code_boundary.match(line):
+                boundary = line.strip()[:120]
+
+            if boundary is not None:
+                passage = flush()
+                if passage:
+                    yield passage
+                heading, buffer, size, floor, start_line = boundary, [], 0, 0, line_no
+            elif size + len(line) > max_chars and size > floor:
+                passage = flush()
+                if passage:
+                    yield passage
+                # Carry trailing lines (up to overlap chars) into the next passage
+                carried: List[str] = []
+                carried_size = 0
+                for previous in reversed(buffer):
+                    if carried_size + len(previous) > overlap:
+                        break
+                    carried.insert(0, previous)
+                    carried_size += len(previous)
+                prefix = [f"{heading}\n"] if heading and markdown else []
+                buffer = prefix + carried
+                size = floor = sum(len(part) for part in buffer)
+                start_line = line_no - len(carried)
+
+            buffer.append(line)
+            size += len(line)
+
+    passage = flush()
+    if passage:
+        yield passage
+
+
+def chunk_file(
+    path: Path,
+    parent_id: str,
+    relative_path: str,
+    max_chars: int = 1200,
+    overlap: int = 200
+) -> Iterator[Passage]:
+    """
+    Stream passages from one file without reading it whole.
+
+    Args:
+        path: File on disk
+        parent_id: Accelerator id the passages belong to
+        relative_path: Path recorded on each passage (relative to the repo)
+        max_chars: Target passage size
+        overlap: Characters of context repeated across a size split
+
+    Yields:
+        Passage objects in file order
+    """
+    markdown = path.suffix.lower() in MARKDOWN_EXTENSIONS
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        for index, (heading, text, start_line) in enumerate(chunk_lines(f, markdown, max_chars, overlap)):
+            yield Passage(
+                parent_id=parent_id,
+                path=relative_path,
+                heading=heading,
+                text=text,
+                start_line=start_line,
+                index=index
+            )
+
+
+def iter_repo_passages(
+    crawler,
+    repo_id: str,
+    max_chars: int = 1200,
+    overlap: int = 200
+) -> Iterator[Passage]:
+    """
+    Stream passages for every file GitHubRepoCrawler.get_repo_files() lists.
+
+    READMEs come first so they are indexed even if a later file fails.
+    Files above the crawler's max_file_size_mb are skipped.
+
+    Args:
+        crawler: GitHubRepoCrawler with the repo already cloned
+        repo_id: Registry id (also the parent accelerator id)
+        max_chars: Target passage size
+        overlap: Characters of context repeated across a size split
+
+    Yields:
+        Passage objects, file by file
+    """
+    repo_path = crawler.repo_path(repo_id)
+    if repo_path is None:
+        return
+    max_bytes = crawler.crawler_config.get("max_file_size_mb", 50) * 1024 * 1024
+
+    files = crawler.get_repo_files(repo_id)
+    files.sort(key=lambda f: (Path(f["path"]).name.lower() != "readme.md", f["path"]))
+    for file_info in files:
+        if file_info["size_bytes"] > max_bytes:
+            logger.info(f"Skipping large file {file_info['path']} ({file_info['size_bytes']} bytes)")
+            continue
+        try:
+            yield from chunk_file(repo_path / file_info["path"], repo_id, file_info["path"], max_chars, overlap)
+        except OSError as e:
+            logger.warning(f"Could not read {file_info['path']} in {repo_id}: {e}")
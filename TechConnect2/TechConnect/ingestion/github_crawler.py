@@ -3,6 +3,7 @@ GitHub Repo Crawler - Fetch and index repos from registry
 Supports local cloning and remote GitHub API calls
 """
 
+import asyncio
 import json
 import subprocess
 import tempfile
@@ -10,7 +11,7 @@ import shutil
 import os
 import logging
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 from datetime import datetime
 
 logger = logging.getLogger(__name__)
@@ -31,6 +32,8 @@ class GitHubRepoCrawler:
         
         self.registry = self._load_registry()
         self.crawler_config = self.registry.get("crawler_config", {})
+        # One async clone per repo at a time; a second waits instead of racing on the directory
+        self._clone_locks: Dict[str, asyncio.Lock] = {}
     
     def _load_registry(self) -> Dict:
         """Load repos-registry.json."""
@@ -89,21 +92,25 @@ class GitHubRepoCrawler:
         with open(self.registry_path, 'w') as f:
             json.dump(self.registry, f, indent=2)
     
-    def clone_repo(self, repo_id: str, github_token: Optional[str] = None) -> Optional[Path]:
+    def get_repo(self, repo_id: str) -> Optional[Dict]:
+        """Registry entry of a repo, or None if unknown."""
+        return next(
+            (r for r in self.registry["repositories"] if r["id"] == repo_id),
+            None
+        )
+    
+    def enabled_repo_ids(self) -> List[str]:
+        """Ids of every enabled repo in the registry, in registry order."""
+        return [r["id"] for r in self.registry.get("repositories", []) if r.get("enabled", True)]
+    
+    def _clone_command(self, repo_id: str, github_token: Optional[str] = None) -> Optional[Tuple[List[str], Path]]:
         """
-        Clone a repo from registry locally.
+        git clone command line and target directory for a registry repo.
         
-        Args:
-            repo_id: Repository ID from registry
-            github_token: GitHub PAT for authenticated access (avoid rate limits)
-            
         Returns:
-            Path to cloned repo or None if failed
+            (command, local path), or None if the repo is unknown or disabled
         """
-        repo_config = next(
-            (r for r in self.registry["repositories"] if r["id"] == repo_id),
-            None
-        )
+        repo_config = self.get_repo(repo_id)
         
         if not repo_config:
             logger.error(f"Repo {repo_id} not found in registry")
@@ -117,22 +124,41 @@ class GitHubRepoCrawler:
         repo_name = repo_config["name"].lower().replace(" ", "-")
         local_path = self.local_repos_dir / repo_name
         
-        # Remove existing if present
-        if local_path.exists():
-            logger.info(f"Removing existing clone at {local_path}")
-            shutil.rmtree(local_path)
-        
         # Prepare URL with token if provided
         if github_token:
             url_with_auth = github_url.replace("https://", f"https://{github_token}@")
         else:
             url_with_auth = github_url
         
-        try:
-            logger.info(f"📥 Cloning {repo_name} from {github_url}...")
+        logger.info(f"📥 Cloning {repo_name} from {github_url}...")
+        return ["git", "clone", "--depth", "1", url_with_auth, str(local_path)], local_path
+    
+    def clone_repo(self, repo_id: str, github_token: Optional[str] = None) -> Optional[Path]:
+        """
+        Clone a repo from registry locally.
+        
+        Blocks until git finishes; from async code use clone_repo_async().
+        
+        Args:
+            repo_id: Repository ID from registry
+            github_token: GitHub PAT for authenticated access (avoid rate limits)
             
+        Returns:
+            Path to cloned repo or None if failed
+        """
+        clone = self._clone_command(repo_id, github_token)
+        if clone is None:
+            return None
+        command, local_path = clone
+        
+        # Remove existing if present
+        if local_path.exists():
+            logger.info(f"Removing existing clone at {local_path}")
+            shutil.rmtree(local_path)
+        
+        try:
             result = subprocess.run(
-                ["git", "clone", "--depth", "1", url_with_auth, str(local_path)],
+                command,
                 capture_output=True,
                 timeout=self.crawler_config.get("timeout_seconds", 300),
                 text=True
@@ -142,7 +168,7 @@ class GitHubRepoCrawler:
                 logger.error(f"Git clone failed: {result.stderr}")
                 return None
             
-            logger.info(f"✅ Cloned {repo_name} to {local_path}")
+            logger.info(f"✅ Cloned {repo_id} to {local_path}")
             return local_path
         
         except subprocess.TimeoutExpired:
@@ -152,18 +178,88 @@ class GitHubRepoCrawler:
             logger.error(f"Clone failed for {repo_id}: {e}")
             return None
     
+    async def clone_repo_async(self, repo_id: str, github_token: Optional[str] = None) -> Optional[Path]:
+        """
+        Clone a repo from registry locally without blocking the event loop.
+        
+        Same contract as clone_repo(), but git runs as an asyncio subprocess
+        (killed on timeout or cancellation) and the old clone is removed in
+        a worker thread. Concurrent clones of the same repo run one after
+        the other.
+        
+        Args:
+            repo_id: Repository ID from registry
+            github_token: GitHub PAT for authenticated access (avoid rate limits)
+            
+        Returns:
+            Path to cloned repo or None if failed
+        """
+        lock = self._clone_locks.setdefault(repo_id, asyncio.Lock())
+        async with lock:
+            return await self._clone_async(repo_id, github_token)
+    
+    async def _clone_async(self, repo_id: str, github_token: Optional[str]) -> Optional[Path]:
+        """Body of clone_repo_async(), run under the repo's lock."""
+        clone = self._clone_command(repo_id, github_token)
+        if clone is None:
+            return None
+        command, local_path = clone
+        
+        if local_path.exists():
+            logger.info(f"Removing existing clone at {local_path}")
+            await asyncio.to_thread(shutil.rmtree, local_path)
+        
+        try:
+            process = await asyncio.create_subprocess_exec(
+                *command,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE
+            )
+            try:
+                _, stderr = await asyncio.wait_for(
+                    process.communicate(),
+                    timeout=self.crawler_config.get("timeout_seconds", 300)
+                )
+            except (asyncio.TimeoutError, asyncio.CancelledError):
+                process.kill()
+                await process.wait()
+                raise
+            
+            if process.returncode != 0:
+                logger.error(f"Git clone failed: {stderr.decode(errors='replace')}")
+                return None
+            
+            logger.info(f"✅ Cloned {repo_id} to {local_path}")
+            return local_path
+        
+        except asyncio.TimeoutError:
+            logger.error(f"Clone timeout for {repo_id}")
+            return None
+        except Exception as e:
+            logger.error(f"Clone failed for {repo_id}: {e}")
+            return None
+    
     def clone_all_repos(self, github_token: Optional[str] = None) -> Dict[str, bool]:
         """Clone all enabled repos from registry."""
         results = {}
         
-        for repo_config in self.registry.get("repositories", []):
-            if repo_config.get("enabled", True):
-                repo_id = repo_config["id"]
-                path = self.clone_repo(repo_id, github_token)
-                results[repo_id] = path is not None
+        for repo_id in self.enabled_repo_ids():
+            path = self.clone_repo(repo_id, github_token)
+            results[repo_id] = path is not None
         
         return results
     
+    def repo_path(self, repo_id: str) -> Optional[Path]:
+        """Local clone directory of a registry repo, or None if unknown or not cloned."""
+        repo_config = self.get_repo(repo_id)
+        
+        if not repo_config:
+            return None
+        
+        repo_name = repo_config["name"].lower().replace(" ", "-")
+        path = self.local_repos_dir / repo_name
+        return path if path.exists() else None
+    
     def extract_readme(self, repo_id: str) -> Optional[str]:
         """Extract README.md content from cloned repo."""
         repo_config = next(
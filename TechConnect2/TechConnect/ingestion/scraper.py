@@ -25,6 +25,7 @@ class CatalogScraper:
         """
         self.catalog_path = Path(catalog_path)
         self.catalog_data: Optional[CatalogData] = None
+        self._by_id: Dict[str, CatalogItem] = {}
     
     def load_catalog(self) -> CatalogData:
         """
@@ -45,6 +46,7 @@ class CatalogScraper:
         
         # Pydantic validation ensures schema compliance
         self.catalog_data = CatalogData(**raw_data)
+        self._by_id = {acc.id: acc for acc in self.catalog_data.solution_accelerators}
         return self.catalog_data
     
     def get_accelerators(self) -> List[CatalogItem]:
@@ -72,11 +74,7 @@ class CatalogScraper:
         if not self.catalog_data:
             self.load_catalog()
         
-        for accelerator in self.catalog_data.solution_accelerators:
-            if accelerator.id == accelerator_id:
-                return accelerator
-        
-        return None
+        return self._by_id.get(accelerator_id)
     
     def search_by_area(self, solution_area: str) -> List[CatalogItem]:
         """
@@ -57,6 +57,8 @@ class ContextBlock(BaseModel):
     products_xml: str = Field(description="<products>...</products> formatted")
     rai_disclaimer: Optional[str] = Field(default=None, description="RAI safety disclaimer if applicable")
     repository_url: str
+    best_section: Optional[str] = Field(default=None, description="Best-matching README/repo passage for the scenario")
+    best_section_source: Optional[str] = Field(default=None, description="Passage location as path#heading (line N)")
 
 
 class CatalogMetadata(BaseModel):
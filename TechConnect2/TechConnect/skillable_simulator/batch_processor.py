@@ -57,6 +57,10 @@ class BatchProcessor:
             "scenarios": []
         }
         
+        # Resolve every composite scenario's repos in one batched search
+        if self.composite_generator:
+            self.composite_generator.prefetch([s for s in scenarios if s.get('is_composite', False)])
+        
         for idx, scenario in enumerate(scenarios, 1):
             print(f"\n{'='*80}")
             print(f"Processing Scenario {idx}/{len(scenarios)}: {scenario['title']}")
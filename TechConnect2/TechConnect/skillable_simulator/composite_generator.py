@@ -16,7 +16,7 @@ Example:
 
 import json
 import re
-from typing import List, Dict, Optional, Any
+from typing import List, Dict, Optional, Any, Tuple
 from models.schemas import CatalogItem
 from vector_store.store import VectorStore
 
@@ -27,6 +27,42 @@ class CompositeLabGenerator:
     def __init__(self, vector_store: VectorStore):
         """Initialize with vector store for repo retrieval."""
         self.vector_store = vector_store
+        self._prefetched: Dict[Tuple[str, str], Dict] = {}  # (title, area) -> search result
+    
+    def prefetch(self, scenarios: List[Dict[str, Any]]) -> None:
+        """
+        Retrieve every (scenario, solution area) pair in one search_many call.
+        
+        generate_composite_lab() then reuses these results instead of
+        searching once per area.
+        
+        Args:
+            scenarios: Composite scenario dicts with 'title', 'solution_area'
+                and optional 'secondary_areas'
+        """
+        pairs = []
+        for scenario in scenarios:
+            for area in [scenario['solution_area']] + list(scenario.get('secondary_areas') or []):
+                key = (scenario['title'], area)
+                if key not in self._prefetched and key not in pairs:
+                    pairs.append(key)
+        if not pairs:
+            return
+        
+        results = self.vector_store.search_many(
+            [title for title, _ in pairs],
+            filters=[{"solution_area": area} for _, area in pairs],
+            n_results=1
+        )
+        self._prefetched.update(zip(pairs, results))
+    
+    def _retrieve(self, scenario_title: str, areas: List[str]) -> List[Dict]:
+        """Top search hit per solution area for a scenario (prefetched or batched)."""
+        self.prefetch([{"title": scenario_title, "solution_area": areas[0], "secondary_areas": areas[1:]}])
+        results = [self._prefetched[(scenario_title, area)] for area in areas]
+        for area in areas:
+            self._prefetched.pop((scenario_title, area), None)
+        return results
     
     def generate_composite_lab(
         self,
@@ -57,12 +93,9 @@ class CompositeLabGenerator:
             ValueError: If primary solution area returns no results
         """
         
-        # 1. Retrieve context from primary solution area
-        primary_context = self.vector_store.search(
-            query=scenario_title,
-            solution_area=primary_solution_area,
-            n_results=1
-        )
+        # 1. Retrieve context from the primary and secondary areas in one batch
+        areas = [primary_solution_area] + list(secondary_areas or [])
+        primary_context, *secondary_contexts = self._retrieve(scenario_title, areas)
         
         if not primary_context or len(primary_context.get("ids", [])) == 0:
             raise ValueError(
@@ -73,26 +106,19 @@ class CompositeLabGenerator:
         primary_block = self._create_context_from_search(primary_context["ids"][0], primary_context["metadatas"][0])
         contexts = [primary_block]
         
-        # 2. Retrieve contexts from secondary areas (if specified)
-        if secondary_areas:
-            remaining_slots = num_repos - 1
-            for secondary_area in secondary_areas:
-                if remaining_slots <= 0:
-                    break
-                
-                secondary_context = self.vector_store.search(
-                    query=scenario_title,
-                    solution_area=secondary_area,
-                    n_results=1
+        # 2. Keep secondary contexts (if specified) up to the remaining slots
+        remaining_slots = num_repos - 1
+        for secondary_context in secondary_contexts:
+            if remaining_slots <= 0:
+                break
+            
+            if secondary_context and len(secondary_context.get("ids", [])) > 0:
+                ctx = self._create_context_from_search(
+                    secondary_context["ids"][0],
+                    secondary_context["metadatas"][0]
                 )
-                
-                if secondary_context and len(secondary_context.get("ids", [])) > 0:
-                    ctx = self._create_context_from_search(
-                        secondary_context["ids"][0],
-                        secondary_context["metadatas"][0]
-                    )
-                    contexts.append(ctx)
-                    remaining_slots -= 1
+                contexts.append(ctx)
+                remaining_slots -= 1
         
         if len(contexts) < num_repos:
             print(
@@ -14,8 +14,9 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from skillable_simulator.generator import LabInstructionGenerator
 from ingestion.scraper import CatalogScraper
+from vector_store.filters import level_number
 from vector_store.store import SimpleVectorStore
-from models.schemas import ContextBlock
+from models.schemas import ComplexityLevel, ContextBlock
 
 
 class SkillableSimulator:
@@ -50,17 +51,28 @@ class SkillableSimulator:
         Args:
             scenario_title: The scenario/problem to solve
             solution_area: Optional filter (AI, Data, etc.)
-            complexity_level: Optional filter (L200, L300, L400)
+            complexity_level: Optional filter (L200, L300, L400); a level
+                in between (e.g. L250) matches the levels on either side
             
         Returns:
             ContextBlock or None if no match found
         """
+        complexity, complexity_min, complexity_max = complexity_level, None, None
+        levels = sorted(level_number(level) for level in ComplexityLevel)
+        if complexity_level and level_number(complexity_level) not in levels:
+            number = level_number(complexity_level)
+            complexity = None
+            complexity_min = max((level for level in levels if level < number), default=None)
+            complexity_max = min((level for level in levels if level > number), default=None)
+        
         # Search vector store for best match
         search_result = self.vector_store.search(
             query=scenario_title,
             solution_area=solution_area,
-            complexity=complexity_level,
-            n_results=1
+            complexity=complexity,
+            n_results=1,
+            complexity_min=complexity_min,
+            complexity_max=complexity_max
         )
         
         if not search_result or not search_result["ids"]:
@@ -162,6 +162,44 @@ def test_module_d_context_provider():
         return False
 
 
+def test_module_d_materialized_blocks():
+    """Test Module D: Context blocks are precomputed and served pre-serialized"""
+    print("\n" + "="*70)
+    print("TEST MODULE D: Materialized Context Blocks")
+    print("="*70)
+    
+    try:
+        from api.main import MaterializedBlocks, _create_context_block
+        
+        catalog_path = project_root / "catalog.json"
+        catalog = CatalogScraper(catalog_path).load_catalog()
+        materialized = MaterializedBlocks(catalog)
+        acc = catalog.solution_accelerators[0]
+        
+        # Pre-serialized JSON matches a freshly built block
+        served = ContextBlock.model_validate_json(materialized.json[acc.id])
+        assert served == _create_context_block(acc)
+        print(f"✓ Materialized {len(materialized.blocks)} context blocks")
+        
+        # The per-request passage is spliced into the cached fragment
+        section = {
+            "document": 'Store secrets in "Key Vault"',
+            "metadata": {"path": "README.md", "heading": "Security", "start_line": 12}
+        }
+        block = ContextBlock.model_validate_json(materialized.block_json(acc.id, section))
+        assert block.best_section == section["document"]
+        assert block.best_section_source == "README.md#Security (line 12)"
+        assert block.model_copy(update={"best_section": None, "best_section_source": None}) == served
+        assert materialized.block_json("missing-id") is None
+        print("✓ Best section spliced into pre-serialized block")
+        
+        return True
+    
+    except Exception as e:
+        print(f"✗ FAILED: {e}")
+        return False
+
+
 def test_module_e_rai_injection():
     """Test Module E: Governance Guardrails - RAI injection"""
     print("\n" + "="*70)
@@ -207,6 +245,7 @@ def main():
     results['B_Metadata'] = test_module_b_metadata()
     results['C_VectorStore'] = test_module_c_vector_store() is not None
     results['D_ContextProvider'] = test_module_d_context_provider()
+    results['D_MaterializedBlocks'] = test_module_d_materialized_blocks()
     results['E_RAIGuardrails'] = test_module_e_rai_injection()
     
     # Summary
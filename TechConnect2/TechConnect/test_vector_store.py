@@ -0,0 +1,1037 @@
+"""
+Vector Store Test Script for TechConnect Contextual Broker
+Covers Module C (vector_store) indexing, ranking and filtering behaviour.
+"""
+
+from pathlib import Path
+import asyncio
+import json
+import pickle
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+# Add project root to path
+project_root = Path(__file__).parent
+sys.path.insert(0, str(project_root))
+
+from api.jobs import JobQueue
+from ingestion.chunker import Passage, chunk_lines
+from ingestion.github_crawler import GitHubRepoCrawler
+from ingestion.scraper import CatalogScraper
+from models.schemas import CatalogItem
+from vector_store.analyzer import Analyzer
+from vector_store.ann import IVFIndex
+from vector_store.dense import DenseMatrix, HashingEmbedder, QuantizedMatrix, rescored_top_k
+from vector_store.embedding_cache import EmbeddingCache
+from vector_store.filters import Bitmap, Range
+from vector_store.rerank import PriorReranker
+from vector_store.segment import Document
+from vector_store.segmented import SegmentedVectorStore
+from vector_store.sharded import ShardedVectorStore
+from vector_store.store import VectorStore
+
+
+def _item(item_id: str, name: str, description: str, area: str = "AI",
+          complexity: str = "L300", **extra) -> CatalogItem:
+    """Build a minimal CatalogItem for tests."""
+    return CatalogItem(
+        id=item_id,
+        name=name,
+        solution_area=area,
+        technical_complexity=complexity,
+        repository_url=f"https://github.com/example/{item_id}",
+        description=description,
+        **extra
+    )
+
+
+def _catalog_store(**kwargs) -> VectorStore:
+    """Vector store loaded with the real catalog.json."""
+    scraper = CatalogScraper(project_root / "catalog.json")
+    store = VectorStore(persist_dir=None, **kwargs)
+    store.ingest_accelerators(scraper.load_catalog().solution_accelerators)
+    return store
+
+
+def test_inverted_index_only_touches_matching_documents():
+    """Posting lists contain only the documents that hold each term."""
+    store = VectorStore()
+    store.ingest_accelerators([
+        _item("agents", "Agent Orchestrator", "Multi-agent automation engine"),
+        _item("fabric", "Fabric Foundation", "Unified data platform", area="Azure (Data & AI)"),
+        _item("chat", "Chat App", "Retrieval chat with search"),
+    ])
+
+    segment = store._segment
+    scores = store.scorer.score(segment.index, {"automation", "unified"}, segment.facets.live)
+    matched = {segment.index.doc_ids[o] for o in scores}
+    assert matched == {"agents", "fabric"}
+
+
+def test_search_keeps_result_contract():
+    """search() returns ids, documents, metadatas and distances in rank order."""
+    store = _catalog_store()
+    results = store.search("multi agent automation engine", n_results=3)
+
+    assert set(results) == {"ids", "documents", "metadatas", "distances"}
+    assert len(results["ids"]) == 3
+    assert results["ids"][0] == "multi-agent-automation"
+    assert results["distances"] == sorted(results["distances"])
+    assert all(len(results[k]) == 3 for k in results)
+
+
+def test_search_backfills_and_filters():
+    """Filtered searches still return up to n_results documents from the filtered set."""
+    store = _catalog_store()
+    results = store.search("zzzz unmatched words", n_results=2, complexity="L400")
+
+    assert len(results["ids"]) == 2
+    assert all(d == 1.0 for d in results["distances"])
+    assert all(m["technical_complexity"] == "L400" for m in results["metadatas"])
+
+
+def test_reingest_replaces_postings():
+    """Re-ingesting an id drops the old postings for that id."""
+    store = VectorStore()
+    store.ingest_accelerators([_item("doc", "Fabric Lakehouse", "Analytics")])
+    store.ingest_accelerators([_item("doc", "Agent Runtime", "Automation")])
+
+    assert store.search("lakehouse", n_results=1)["distances"] == [1.0]
+    assert store.search("automation", n_results=1)["ids"] == ["doc"]
+    assert len(store.list_all()) == 1
+
+
+def test_bm25_prefers_rare_and_repeated_terms():
+    """BM25 weights rare terms by IDF and rewards term frequency."""
+    store = VectorStore(scorer="bm25")
+    store.ingest_accelerators([
+        _item("a", "Azure Agent", "Azure agent agent orchestration"),
+        _item("b", "Azure Search", "Azure search service"),
+        _item("c", "Azure Fabric", "Azure data platform"),
+    ])
+
+    results = store.search("azure agent", n_results=3)
+    assert results["ids"][0] == "a"
+    assert all(0.0 < d <= 1.0 for d in results["distances"])
+    assert results["distances"] == sorted(results["distances"])
+
+
+def test_bm25_scores_do_not_depend_on_write_history():
+    """Statistics are exact after every write: incremental upserts score like one bulk ingest."""
+    topics = ["vision", "speech", "search", "agents", "fabric"]
+    items = [
+        _item(f"doc{i}", f"Accelerator {i}", " ".join(topics[j % 5] for j in range(i % 7 + 1)) + " shared")
+        for i in range(415)
+    ]
+    incremental = VectorStore(scorer="bm25")
+    incremental.upsert(items[:400])
+    for item in items[400:]:
+        incremental.upsert([item])
+        incremental.search("vision speech", n_results=1)
+    bulk = VectorStore(scorer="bm25")
+    bulk.upsert(items)
+
+    for query in ("vision speech", "agents fabric shared"):
+        assert incremental.search(query, n_results=5) == bulk.search(query, n_results=5)
+    incremental.delete([f"doc{i}" for i in range(0, 415, 3)])
+    incremental.compact()
+    bulk.delete([f"doc{i}" for i in range(0, 415, 3)])
+    assert incremental.search("vision speech", n_results=5) == bulk.search("vision speech", n_results=5)
+
+
+def test_searches_during_upserts_see_whole_documents():
+    """Concurrent searches never score an ordinal that a running upsert has only partly indexed."""
+    def item(i):
+        return _item(f"doc{i}", f"Doc {i}", f"azure openai agent python w{i}")
+
+    store = VectorStore(scorer="bm25", cache_size=0)
+    store.upsert([item(i) for i in range(200)])
+    errors = []
+    done = threading.Event()
+    deadline = time.monotonic() + 2.0
+
+    def write():
+        try:
+            i = 200
+            while time.monotonic() < deadline:
+                store.upsert([item(i), item(i + 1)])
+                i += 2
+        except Exception as e:
+            errors.append(e)
+        finally:
+            done.set()
+
+    def read():
+        while not done.is_set():
+            try:
+                store.search("azure openai agent python", n_results=5)
+                store.search_many(["azure agent", "python openai"], n_results=3)
+            except Exception as e:
+                errors.append(e)
+
+    threads = [threading.Thread(target=write)] + [threading.Thread(target=read) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == [] and len(store) > 200
+
+
+def test_scorer_option_on_catalog():
+    """Both scorers rank the obvious match first on the real catalog."""
+    for scorer in ("jaccard", "bm25"):
+        store = _catalog_store(scorer=scorer)
+        results = store.search("unified data foundation fabric", n_results=3)
+        assert results["ids"][0] in {"unified-data-fabric", "fabric-data-foundation"}
+
+    try:
+        VectorStore(scorer="cosine")
+        assert False, "Expected ValueError for unknown scorer"
+    except ValueError:
+        pass
+
+
+def test_hashing_embedder_is_normalized_and_stable():
+    """Hashing embeddings are unit length and identical across instances."""
+    a = HashingEmbedder(dim=64).embed(["multi agent automation", ""])
+    b = HashingEmbedder(dim=64).embed(["multi agent automation"])
+
+    assert a.shape == (2, 64) and a.dtype.name == "float32"
+    assert abs(float((a[0] ** 2).sum()) - 1.0) < 1e-5
+    assert not a[1].any()
+    assert (a[0] == b[0]).all()
+
+
+def test_dense_matrix_grows_by_doubling():
+    """Appending rows doubles capacity instead of reallocating per row."""
+    matrix = DenseMatrix(dim=4, initial_capacity=2)
+    capacities = set()
+    for i in range(100):
+        matrix.append(HashingEmbedder(dim=4).embed([f"token{i}"]))
+        capacities.add(len(matrix._data))
+
+    assert len(matrix) == 100
+    assert capacities == {2, 4, 8, 16, 32, 64, 128}
+
+
+def test_dense_mode_search():
+    """Dense mode ranks by cosine similarity and honours filters."""
+    store = _catalog_store(mode="dense")
+    results = store.search("multi agent automation engine", n_results=3)
+
+    assert results["ids"][0] == "multi-agent-automation"
+    assert results["distances"] == sorted(results["distances"])
+
+    filtered = store.search("data platform", n_results=2, complexity="L300")
+    assert len(filtered["ids"]) == 2
+    assert all(m["technical_complexity"] == "L300" for m in filtered["metadatas"])
+
+
+def test_snapshot_round_trip_and_invalidation():
+    """Snapshots reload without re-indexing and are keyed by the source hash."""
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode in ("lexical", "dense"):
+            built = _catalog_store(mode=mode, scorer="bm25")
+            built.persist_dir = Path(tmp)
+            built.save(source_hash="catalog-v1")
+
+            loaded = VectorStore(persist_dir=Path(tmp), mode=mode, scorer="bm25")
+            assert loaded.load(source_hash="catalog-v1")
+            assert isinstance(loaded._segment.index.doc_lengths, memoryview)
+
+            query = "content processing document intelligence"
+            assert loaded.search(query, n_results=5) == built.search(query, n_results=5)
+            assert loaded.get_by_id("ai-chat") == built.get_by_id("ai-chat")
+
+            # A changed catalog hash does not match the existing snapshot
+            assert not VectorStore(persist_dir=Path(tmp), mode=mode).load(source_hash="catalog-v2")
+
+
+def test_snapshot_is_writable_after_load():
+    """Ingesting into a loaded store copies mapped buffers on first write."""
+    with tempfile.TemporaryDirectory() as tmp:
+        store = VectorStore(persist_dir=Path(tmp), mode="dense")
+        store.ingest_accelerators([_item("a", "Fabric Lakehouse", "Analytics platform")])
+        store.save(source_hash="h")
+
+        loaded = VectorStore(persist_dir=Path(tmp), mode="dense")
+        assert loaded.load(source_hash="h")
+        loaded.ingest_accelerators([
+            _item("a", "Agent Runtime", "Automation"),
+            _item("b", "Lakehouse Copilot", "Analytics assistant"),
+        ])
+
+        assert loaded.search("lakehouse", n_results=1)["ids"] == ["b"]
+        assert loaded.search("automation", n_results=1)["ids"] == ["a"]
+        assert len(loaded.list_all()) == 2
+
+        # Same source hash, new contents: the snapshot is replaced, not kept
+        loaded.save(source_hash="h")
+        reloaded = VectorStore(persist_dir=Path(tmp), mode="dense")
+        assert reloaded.load(source_hash="h") and len(reloaded.list_all()) == 2
+        assert reloaded.search("automation", n_results=1)["ids"] == ["a"]
+        assert [path.name for path in Path(tmp).iterdir() if path.name.startswith(".")] == []
+
+
+def test_bitmap_set_operations():
+    """Bitmaps support in-place updates and AND/OR/difference."""
+    a, b = Bitmap(), Bitmap()
+    for i in (0, 3, 9, 200):
+        a.add(i)
+    for i in (3, 200, 201):
+        b.add(i)
+    a.discard(0)
+
+    assert list(a & b) == [3, 200]
+    assert list(a | b) == [3, 9, 200, 201]
+    assert list(a - b) == [9]
+    assert len(a) == 3 and 9 in a and 0 not in a and 5000 not in a
+
+
+def test_facet_filters_or_and_negation():
+    """Facet filters support OR within a field, AND across fields and exclusion."""
+    for mode in ("lexical", "dense"):
+        store = _catalog_store(mode=mode)
+        query = "azure solution accelerator"
+
+        either = store.search(query, n_results=10, complexity=["L200", "L300"])
+        assert {m["technical_complexity"] for m in either["metadatas"]} == {"L200", "L300"}
+        assert len(either["ids"]) == 5
+
+        combined = store.search(
+            query, n_results=10,
+            solution_area="AI",
+            filters={"deployment_type": "Git/Source"},
+            exclude={"responsible_ai_tag": True}
+        )
+        assert combined["ids"] == ["prompt-engineering"]
+
+        assert store.search(query, solution_area="Security")["ids"] == []
+
+    try:
+        store.search("data", filters={"colour": "blue"})
+        assert False, "Expected ValueError for unknown filter field"
+    except ValueError:
+        pass
+
+
+def test_facets_track_reingest():
+    """Re-ingesting a document moves it between facet values."""
+    store = VectorStore()
+    store.ingest_accelerators([_item("doc", "Agent", "Automation", complexity="L200")])
+    store.ingest_accelerators([_item("doc", "Agent", "Automation", complexity="L400")])
+
+    assert store.search("agent", complexity="L200")["ids"] == []
+    assert store.search("agent", complexity="L400")["ids"] == ["doc"]
+
+
+def test_delete_tombstones_documents():
+    """delete() hides documents from search, filters and listings at once."""
+    for mode in ("lexical", "dense"):
+        store = VectorStore(mode=mode)
+        store.upsert([
+            _item("agents", "Agent Orchestrator", "Multi-agent automation"),
+            _item("chat", "Chat App", "Retrieval chat"),
+        ])
+
+        assert store.delete(["agents", "missing"]) == 1
+        assert store.get_by_id("agents") is None
+        assert "agents" not in store.search("agent automation", n_results=5)["ids"]
+        assert store.search("chat", solution_area="AI")["ids"] == ["chat"]
+        assert store._segment.tombstones == 1
+
+
+def test_compaction_reclaims_tombstones():
+    """Compaction renumbers live documents without changing results."""
+    for mode in ("lexical", "dense"):
+        store = VectorStore(mode=mode, scorer="bm25")
+        store.upsert([_item(f"doc{i}", f"Accelerator {i}", f"topic{i} shared") for i in range(10)])
+        store.upsert([_item("doc3", "Accelerator 3", "lakehouse shared", complexity="L400")])
+        store.delete([f"doc{i}" for i in range(5, 10)])
+        before = store.search("lakehouse shared", n_results=3)
+
+        store.compact()
+
+        segment = store._segment
+        assert segment.tombstones == 0 and len(segment.index) == 5
+        assert "topic7" not in segment.index.vocab
+        after = store.search("lakehouse shared", n_results=3)
+        assert after["ids"][0] == before["ids"][0] == "doc3"
+        assert after["distances"] == before["distances"]
+        assert store.search("shared", complexity="L400")["ids"] == ["doc3"]
+
+
+def test_background_compaction_after_threshold():
+    """Passing the tombstone threshold compacts on a background thread."""
+    store = VectorStore(compact_threshold=0.5)
+    store.COMPACT_MIN_TOMBSTONES = 2
+    store.upsert([_item(f"doc{i}", f"Accelerator {i}", "shared") for i in range(4)])
+    store.delete(["doc0", "doc1"])
+
+    store._compactor.join(timeout=5)
+    assert store._segment.tombstones == 0
+    assert sorted(store.search("shared", n_results=5)["ids"]) == ["doc2", "doc3"]
+
+
+def test_search_many_matches_individual_searches():
+    """search_many returns the same results as one search() per query."""
+    queries = ["multi agent automation", "data governance", "retrieval chat search", "zzz"]
+    filters = [None, {"solution_area": "AI"}, {"technical_complexity": ["L200", "L300"]}, None]
+    for mode in ("lexical", "dense"):
+        for scorer in ("jaccard", "bm25"):
+            store = _catalog_store(mode=mode, scorer=scorer)
+            batch = store.search_many(queries, filters=filters, n_results=3)
+            single = [store.search(q, n_results=3, filters=f) for q, f in zip(queries, filters)]
+            assert batch == single
+
+    shared = store.search_many(queries[:2], filters={"solution_area": "Security"})
+    assert [r["ids"] for r in shared] == [[], []]
+
+    try:
+        store.search_many(queries, filters=[None])
+        assert False, "Expected ValueError for mismatched filter list"
+    except ValueError:
+        pass
+
+
+def test_top_k_matches_full_ranking():
+    """Bounded top-k selection returns the head of the full ranking, ties in order."""
+    store = _catalog_store(scorer="bm25")
+    full = store.search("azure data ai agent", n_results=len(store.documents))
+    for k in (1, 3, 5):
+        top = store.search("azure data ai agent", n_results=k)
+        assert top["ids"] == full["ids"][:k]
+        assert top["metadatas"][0] == store.documents[top["ids"][0]].metadata
+
+
+def test_query_cache_hits_and_invalidation():
+    """Equivalent queries hit the cache; any write bumps the generation and misses."""
+    store = _catalog_store()
+    first = store.search("Agent automation", n_results=2, solution_area="AI")
+    first["ids"].clear()
+    again = store.search("automation  agent the", n_results=2, solution_area=["AI"])
+
+    stats = store.cache_stats()
+    assert (stats["hits"], stats["misses"]) == (1, 1)
+    assert again["ids"] and again == store.search("agent automation", n_results=2, solution_area="AI")
+
+    store.upsert([_item("new-agent", "Agent Automation Hub", "Agent automation")])
+    assert store.search("agent automation", n_results=2, solution_area="AI")["ids"][0] == "new-agent"
+    assert store.cache_stats()["misses"] == 2
+    assert store.cache_stats()["generation"] > stats["generation"]
+
+
+def test_sharded_store_matches_single_store():
+    """Scatter-gather over shards returns the same hits as one store."""
+    scraper = CatalogScraper(project_root / "catalog.json")
+    items = scraper.load_catalog().solution_accelerators
+    single = _catalog_store()
+    with tempfile.TemporaryDirectory() as tmp, ShardedVectorStore(shards=3, persist_dir=Path(tmp)) as sharded:
+        sharded.ingest_accelerators(items)
+        assert len(sharded) == len(items)
+
+        for query in ("multi agent automation", "data governance"):
+            expected = single.search(query, n_results=4, solution_area="AI")
+            actual = sharded.search(query, n_results=4, solution_area="AI")
+            assert sorted(actual["distances"]) == actual["distances"] == expected["distances"]
+            assert set(actual["ids"]) == set(expected["ids"])
+
+        assert sharded.facet_counts() == single.facet_counts()
+        assert sharded.facet_counts("multi agent", n_results=3) == single.facet_counts("multi agent", n_results=3)
+        assert sharded.get_by_id(items[0].id)["id"] == items[0].id
+        assert sharded.delete([items[0].id, "missing"]) == 1
+        assert items[0].id not in sharded.search(items[0].name, n_results=10)["ids"]
+
+        parent = items[1].id
+        assert sharded.upsert_passages(parent, _passages(parent, README), batch_size=2) == 3
+        assert sharded.best_passages("key vault", [parent])[parent]["metadata"]["heading"] == "Agent Engine > Security"
+
+        sharded.save(source_hash="abc")
+        sharded.clear()
+        assert sharded.load(source_hash="abc") and len(sharded) == len(items) - 1
+        assert sharded.passage_count() == 3
+
+        try:
+            sharded.search("data", filters={"colour": "blue"})
+            assert False, "Expected ValueError for unknown filter field"
+        except ValueError:
+            pass
+
+    # Embedders travel to the workers; one whose tokenizer cannot be pickled is rejected up front
+    with ShardedVectorStore(shards=2, mode="dense", embedder=HashingEmbedder()) as dense:
+        dense.ingest_accelerators(items)
+        assert dense.search("multi agent automation engine", n_results=1)["ids"] == ["multi-agent-automation"]
+
+    # Invalid store options raise before any worker starts
+    for options in (
+        {"quantize": True},
+        {"mode": "dense", "ann": "hnsw"},
+        {"rerank": "unknown"},
+        {"mode": "dense", "embedder": HashingEmbedder(tokenizer=lambda text: text.split())},
+    ):
+        try:
+            ShardedVectorStore(shards=2, **options).close()
+            assert False, f"Expected ValueError for {options}"
+        except ValueError:
+            pass
+
+
+def test_sharded_hybrid_fuses_once_over_all_shards():
+    """Hybrid rankings are merged over the shards before fusion, so results match one store."""
+    scraper = CatalogScraper(project_root / "catalog.json")
+    items = scraper.load_catalog().solution_accelerators
+    single = _catalog_store(mode="hybrid")
+    with ShardedVectorStore(shards=3, mode="hybrid") as sharded:
+        sharded.ingest_accelerators(items)
+        for query in ("chat with your data search", "unified data foundation fabric", "multi agent automation"):
+            expected = single.search(query, n_results=4)
+            actual = sharded.search(query, n_results=4)
+            assert actual["ids"] == expected["ids"]
+            assert actual["distances"] == expected["distances"]
+        assert sharded.search("data", n_results=3, solution_area="AI") == single.search("data", n_results=3, solution_area="AI")
+
+
+def test_sharded_query_cache_answers_repeats_in_the_parent():
+    """Repeated sharded queries are served by the parent's cache without a round trip; writes invalidate it."""
+    scraper = CatalogScraper(project_root / "catalog.json")
+    items = scraper.load_catalog().solution_accelerators
+    with ShardedVectorStore(shards=2) as sharded:
+        sharded.ingest_accelerators(items)
+        first = sharded.search("Agent automation", n_results=2, solution_area="AI")
+        conns, sharded._conns = sharded._conns, []  # any scatter now raises RuntimeError
+        again = sharded.search("automation  agent the", n_results=2, solution_area=["AI"], debug=True)
+        assert again.pop("debug")["cached"] and again == first
+        sharded._conns = conns
+        assert (sharded.cache_stats()["hits"], sharded.cache_stats()["misses"]) == (1, 1)
+
+        sharded.upsert([_item("new-agent", "Agent Automation Hub", "Agent automation")])
+        assert sharded.search("agent automation", n_results=2, solution_area="AI")["ids"][0] == "new-agent"
+        assert sharded.cache_stats()["misses"] == 2
+
+
+README = """# Agent Engine
+Multi-agent automation for business workflows.
+## Deployment
+Run azd up to deploy the Bicep templates.
+## Security
+Agents authenticate with managed identity and read secrets from Key Vault.
+"""
+
+
+def _passages(parent_id: str, text: str, path: str = "README.md", **kwargs):
+    """Passages of an in-memory file, as chunk_file() would yield them."""
+    return (
+        Passage(parent_id, path, heading, body, start_line, index)
+        for index, (heading, body, start_line) in enumerate(chunk_lines(text.splitlines(True), **kwargs))
+    )
+
+
+def test_chunker_splits_on_headings_with_bounded_overlap():
+    """Markdown splits at headings; long sections split by size with carried context."""
+    chunks = list(chunk_lines(README.splitlines(True)))
+    assert [heading for heading, _, _ in chunks] == ["Agent Engine", "Agent Engine > Deployment", "Agent Engine > Security"]
+    assert chunks[2][2] == 5 and "Key Vault" in chunks[2][1]
+
+    lines = [f"line {i} about lakehouse analytics\n" for i in range(200)]
+    long = list(chunk_lines(["# Fabric\n"] + lines, max_chars=300, overlap=80))
+    assert len(long) > 10
+    assert all(len(text) <= 300 + len("Fabric\n") for _, text, _ in long)
+    # Each size split repeats the tail of the previous passage under the same heading
+    assert long[1][1].startswith("Fabric\n") and long[0][1].splitlines()[-1] in long[1][1]
+
+    code = list(chunk_lines(["import os\n", "def a():\n", "    pass\n", "class B:\n", "    x = 1\n"], markdown=False))
+    assert [heading for heading, _, _ in code] == ["", "def a():", "class B:"]
+
+
+def test_passages_rank_sections_of_their_parent():
+    """Passages are child documents: best section per parent, filtered and removed with it."""
+    for mode in ("lexical", "dense"):
+        store = VectorStore(mode=mode, scorer="bm25")
+        store.ingest_accelerators([
+            _item("agents", "Agent Engine", "Multi-agent automation engine"),
+            _item("fabric", "Fabric Lakehouse", "Analytics platform", area="Azure (Data & AI)"),
+        ])
+        assert store.upsert_passages("agents", _passages("agents", README), batch_size=2) == 3
+        assert store.upsert_passages("fabric", _passages("fabric", "# Fabric\nLakehouse with Key Vault secrets.\n")) == 1
+        assert len(store) == 2 and store.passage_count() == 4
+
+        best = store.best_passages("managed identity key vault", ["agents", "missing"])
+        assert list(best) == ["agents"]
+        assert best["agents"]["metadata"]["heading"] == "Agent Engine > Security"
+        assert best["agents"]["metadata"]["parent_id"] == "agents"
+
+        hits = store.search_passages("key vault", n_results=5, filters={"solution_area": "AI"})
+        assert {meta["parent_id"] for meta in hits["metadatas"]} == {"agents"}
+
+        # Re-upserting replaces a parent's passages; deleting the parent drops them
+        assert store.upsert_passages("agents", _passages("agents", "# Only\nOne section.\n")) == 1
+        assert store.passage_count() == 2
+        store.delete(["agents"])
+        assert store.passage_count() == 1 and store.best_passages("key vault", ["agents"]) == {}
+
+    try:
+        store.upsert_passages("missing", [])
+        assert False, "Expected ValueError for unknown parent"
+    except ValueError:
+        pass
+
+
+def test_passage_scores_match_posting_walk():
+    """Scoring a parent's passages from the forward index matches the full search."""
+    for scorer in ("jaccard", "bm25"):
+        store = VectorStore(scorer=scorer)
+        store.ingest_accelerators([_item("agents", "Agent Engine", "Automation")])
+        store.upsert_passages("agents", _passages("agents", README))
+        passages = store._passages.store
+        segment = passages._segment
+        segment.prepare()
+        terms = passages._tokenize("deploy bicep templates with azd")
+        ordinals = range(len(segment.index))
+        assert segment.scorer.score_ordinals(segment.index, terms, ordinals) == \
+            segment.scorer.score(segment.index, set(terms), segment.facets.live)
+
+
+def test_passages_survive_snapshots():
+    """Passages are saved with the snapshot and reloaded with it."""
+    with tempfile.TemporaryDirectory() as tmp:
+        store = VectorStore(persist_dir=Path(tmp))
+        store.ingest_accelerators([_item("agents", "Agent Engine", "Automation")])
+        store.upsert_passages("agents", _passages("agents", README))
+        store.save(source_hash="h")
+
+        loaded = VectorStore(persist_dir=Path(tmp))
+        assert loaded.load(source_hash="h")
+        assert loaded.passage_count() == 3
+        query = "deploy bicep"
+        assert loaded.best_passages(query, ["agents"]) == store.best_passages(query, ["agents"])
+
+
+def _topic_items(n: int):
+    """Dense-mode items drawn from a few topics, so vectors cluster."""
+    topics = ["agent automation workflow planner", "lakehouse analytics spark pipeline",
+              "identity threat defender policy", "speech vision ocr forms"]
+    return [
+        _item(f"doc-{i}", f"Item {i}", f"{topics[i % 4]} {topics[(i * 7) % 4].split()[i % 4]} variant{i % 13}")
+        for i in range(n)
+    ]
+
+
+def test_ivf_search_approximates_exact_dense_search():
+    """IVF probes a subset of partitions; probing all of them is exact."""
+    items = _topic_items(600)
+    exact = VectorStore(mode="dense", cache_size=0)
+    exact.ingest_accelerators(items)
+    ivf = VectorStore(mode="dense", ann=IVFIndex(nlist=16, min_train=256), nprobe=4, cache_size=0)
+    ivf.ingest_accelerators(items)
+    assert ivf._segment.ann.trained and len(ivf._segment.ann.centroids) == 16
+
+    queries = ["automation planner", "spark analytics", "threat policy", "vision forms ocr"]
+    hits = 0
+    for query in queries:
+        threshold = exact.search(query, n_results=10)["distances"][-1]
+        hits += sum(d <= threshold + 1e-6 for d in ivf.search(query, n_results=10)["distances"])
+    assert hits / (10 * len(queries)) >= 0.8
+
+    ivf.nprobe = 16
+    for query in queries:
+        assert ivf.search(query, n_results=10)["distances"] == exact.search(query, n_results=10)["distances"]
+
+    # Selective filters fall back to the exact scan rather than returning too few hits
+    ivf.nprobe = 1
+    assert ivf.search("automation", n_results=3, filters={"solution_area": "AI"})["ids"]
+
+
+def test_ivf_incremental_inserts_and_snapshots():
+    """Rows appended after training are searchable; snapshots keep the partitions."""
+    with tempfile.TemporaryDirectory() as tmp:
+        store = VectorStore(persist_dir=Path(tmp), mode="dense", ann=IVFIndex(nlist=8, min_train=200), nprobe=2)
+        store.ingest_accelerators(_topic_items(300))
+        centroids = store._segment.ann.centroids
+        store.upsert([_item("new", "Quantum Widget", "quantum widget teleporter")])
+        assert store._segment.ann.centroids is centroids  # assigned, not retrained
+        assert store.search("quantum widget teleporter", n_results=1)["ids"] == ["new"]
+
+        store.save(source_hash="h")
+        loaded = VectorStore(persist_dir=Path(tmp), mode="dense", ann="ivf", nprobe=2)
+        assert loaded.load(source_hash="h")
+        assert (loaded._segment.ann.centroids == centroids).all()
+        query = "agent automation workflow"
+        assert loaded.search(query, n_results=5) == store.search(query, n_results=5)
+
+    try:
+        VectorStore(ann="ivf")
+        assert False, "Expected ValueError for ann outside dense mode"
+    except ValueError:
+        pass
+
+
+def test_documents_are_compact():
+    """Documents are slotted, share metadata keys and compress long texts transparently."""
+    long_text = "lakehouse analytics " * 100
+    a = Document("a", long_text, {"solution_area": "AI", "name": "A"})
+    b = Document("b", "short", {"solution_area": "AI", "name": "B"})
+    assert not hasattr(a, "__dict__")
+    assert a.text == long_text and isinstance(a._text, bytes) and len(a._text) < len(long_text)
+    assert a._keys is b._keys and a._values[0] is b._values[0]
+    assert a.metadata == {"solution_area": "AI", "name": "A"}
+
+    store = _catalog_store()
+    report = store.memory_report()
+    assert report["documents"] == len(store)
+    assert report["total_bytes"] == sum(report["components"].values())
+    assert report["bytes_per_document"] > 0
+
+
+def test_analyzer_tokens_and_query_cache():
+    """One analyzer for documents and queries: stop words, length, optional plural stemming."""
+    analyzer = Analyzer()
+    assert analyzer.analyze("The Agents, and an AI-powered Fabric of agents!") == ["agents", "powered", "fabric", "agents"]
+    assert Analyzer(stemming=True).analyze("Agents with policies and boxes") == ["agent", "policy", "box"]
+
+    analyzer.analyze_query("data governance")
+    analyzer.analyze_query("data governance")
+    assert analyzer.analyze_query.cache_info().hits == 1
+    assert pickle.loads(pickle.dumps(analyzer)).version == analyzer.version != Analyzer(stemming=True).version
+
+    # With stemming, singular and plural queries rank the same way
+    store = VectorStore(analyzer=Analyzer(stemming=True))
+    store.ingest_accelerators([_item("agents", "Agent Orchestrator", "Multi-agent workflows")])
+    assert store.search("workflow", n_results=1)["distances"] == store.search("workflows", n_results=1)["distances"]
+
+
+def test_system2_analyzer_copy_is_in_sync():
+    """System2-RAG ships its own copy of the analyzer; it must be byte-identical to this one."""
+    copy_path = project_root.parent.parent / "System2-RAG" / "app" / "analyzer.py"
+    assert copy_path.exists(), f"{copy_path} is missing"
+    assert copy_path.read_bytes() == (project_root / "vector_store" / "analyzer.py").read_bytes(), (
+        "System2-RAG/app/analyzer.py has drifted from vector_store/analyzer.py; copy the latter over it"
+    )
+
+
+def test_hybrid_mode_fuses_lexical_and_dense_rankings():
+    """Hybrid mode returns one RRF-fused ranking, with per-stage timings on request."""
+    store = _catalog_store(mode="hybrid")
+    results = store.search("multi agent automation engine", n_results=3, debug=True)
+
+    assert results["ids"][0] == "multi-agent-automation"
+    assert results["distances"] == sorted(results["distances"])
+    assert 0.0 <= results["distances"][0] < results["distances"][-1] <= 1.0
+
+    debug = results["debug"]
+    assert debug["mode"] == "hybrid" and not debug["cached"]
+    assert {"analyze", "filter", "lexical", "dense", "fuse", "total"} <= set(debug["timings_ms"])
+    assert 0 < debug["candidates"]["lexical"] <= debug["candidates"]["dense"] <= store.hybrid_candidates
+    assert store.search("multi agent automation engine", n_results=3, debug=True)["debug"]["cached"]
+    assert "debug" not in store.search("multi agent automation engine", n_results=3)
+
+    # A document found by both rankings beats one found by a single ranking
+    fused = VectorStore(mode="hybrid")
+    fused.ingest_accelerators([
+        _item("both", "Fabric Lakehouse", "Lakehouse analytics on Fabric"),
+        _item("lexical", "Warehouse", "Analytics warehouse"),
+        _item("other", "Chat App", "Retrieval chat with search"),
+    ])
+    assert fused.search("fabric lakehouse analytics", n_results=3)["ids"][0] == "both"
+
+    filtered = store.search("data platform", n_results=2, complexity="L300")
+    assert all(m["technical_complexity"] == "L300" for m in filtered["metadatas"])
+
+
+def test_quantized_vectors_rescore_shortlist():
+    """int8 rows take a quarter of the memory and re-scored hits match float32 closely."""
+    vectors = HashingEmbedder(dim=64).embed([f"token{i} word{i % 7} shared" for i in range(300)])
+    exact, quantized = DenseMatrix(64), QuantizedMatrix(64)
+    exact.append(vectors)
+    quantized.append(vectors)
+    assert quantized.vectors.dtype.name == "int8"
+    assert abs(quantized.rows([5])[0] - vectors[5]).max() < 0.01
+
+    query = vectors[42]
+    ordinals, similarities = rescored_top_k(quantized, query, quantized.scores(query), 5)
+    assert ordinals[0] == 42 and abs(similarities[0] - 1.0) < 1e-2
+    assert list(similarities) == sorted(similarities, reverse=True)
+
+    store = _catalog_store(mode="dense", quantize=True)
+    reference = _catalog_store(mode="dense")
+    results = store.search("multi agent automation engine", n_results=3)
+    assert results["ids"][0] == reference.search("multi agent automation engine", n_results=3)["ids"][0]
+    assert store.memory_report()["components"]["vectors"] < reference.memory_report()["components"]["vectors"] / 3
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store.persist_dir = Path(tmp)
+        store.save(source_hash="catalog-v1")
+        loaded = VectorStore(persist_dir=tmp, mode="dense", quantize=True)
+        assert loaded.load(source_hash="catalog-v1")
+        assert loaded.search("multi agent automation engine", n_results=3) == results
+        assert not VectorStore(persist_dir=tmp, mode="dense").load(source_hash="catalog-v1")
+
+    try:
+        VectorStore(quantize=True)
+        assert False, "quantize requires a dense mode"
+    except ValueError:
+        pass
+
+
+class _CountingEmbedder(HashingEmbedder):
+    """HashingEmbedder that records how many texts it embedded."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.embedded = 0
+
+    def embed(self, texts):
+        self.embedded += len(texts)
+        return super().embed(texts)
+
+
+def test_embedding_cache_skips_unchanged_text_and_evicts():
+    """Re-ingesting unchanged passages reuses cached vectors; the cache stays under its bound."""
+    with tempfile.TemporaryDirectory() as tmp:
+        embedder = _CountingEmbedder(dim=32)
+        store = VectorStore(mode="dense", embedder=embedder, embedding_cache=EmbeddingCache(Path(tmp) / "cache"))
+        store.ingest_accelerators([_item("agents", "Agent Orchestrator", "Multi-agent automation engine")])
+        store.upsert_passages("agents", _passages("agents", README))
+        first = embedder.embedded
+        vectors = store._passages.store._segment.vectors.vectors.copy()
+
+        # A fresh store (new process) re-ingesting the same content embeds nothing
+        embedder.embedded = 0
+        again = VectorStore(mode="dense", embedder=embedder, embedding_cache=EmbeddingCache(Path(tmp) / "cache"))
+        again.ingest_accelerators([_item("agents", "Agent Orchestrator", "Multi-agent automation engine")])
+        again.upsert_passages("agents", _passages("agents", README))
+        assert embedder.embedded == 0 and again.embedding_cache.stats()["hits"] == first
+        assert (again._passages.store._segment.vectors.vectors == vectors).all()
+
+        # A changed chunk is the only one embedded; another embedder version shares nothing
+        again.upsert_passages("agents", _passages("agents", README.replace("azd up", "azd deploy")))
+        assert embedder.embedded == 1
+        other = EmbeddingCache(Path(tmp) / "cache")
+        other.embed(_CountingEmbedder(dim=64), ["Multi-agent automation engine"])
+        assert other.stats()["misses"] == 1
+
+        bounded = EmbeddingCache(Path(tmp) / "bounded", max_bytes=10 * 4 * 32)
+        bounded.embed(embedder, [f"text {i}" for i in range(40)])
+        assert bounded.stats()["bytes"] <= 10 * 4 * 32 and bounded.evictions > 0
+        assert pickle.loads(pickle.dumps(bounded)).directory == bounded.directory
+
+
+def test_segmented_store_flushes_merges_and_reloads():
+    """Memtable flushes and background merges keep results equal to one store, across a reload."""
+    items = [_item(f"doc{i}", f"Accelerator {i}", f"topic{i % 7} shared words") for i in range(40)]
+    for mode in ("lexical", "hybrid"):
+        single = VectorStore(mode=mode)
+        with tempfile.TemporaryDirectory() as tmp:
+            store = SegmentedVectorStore(persist_dir=Path(tmp), flush_threshold=8, merge_factor=3, mode=mode)
+            for start in range(0, 40, 5):
+                store.upsert(items[start:start + 5])
+                single.upsert(items[start:start + 5])
+            for target in (single, store):
+                target.upsert([_item("doc3", "Accelerator 3", "lakehouse shared", complexity="L400")])
+                target.delete(["doc10", "missing"])
+            store.wait(timeout=5)
+
+            # 40 documents in 8-document flushes: merged into fewer, mapped segments
+            assert 1 < store.segment_count < 5 and len(store) == 39
+            assert store.memory_report()["mapped_bytes"] > 0
+            for query in ("lakehouse shared", "topic3 words"):
+                assert store.search(query, n_results=5) == single.search(query, n_results=5)
+            assert store.search("shared", complexity="L400")["ids"] == ["doc3"]
+            assert store.get_by_id("doc10") is None and len(store.list_all()) == 39
+
+            store.upsert_passages("doc3", _passages("doc3", README))
+            store.save(source_hash="abc")
+            store.close()
+
+            reloaded = SegmentedVectorStore(persist_dir=Path(tmp), flush_threshold=8, merge_factor=3, mode=mode)
+            assert not reloaded.load(source_hash="other")
+            assert reloaded.load(source_hash="abc") and len(reloaded) == 39
+            assert reloaded.get_by_id("doc10") is None and reloaded.passage_count() == 3
+            assert reloaded.search("lakehouse shared", n_results=5) == single.search("lakehouse shared", n_results=5)
+
+            reloaded.compact()
+            assert reloaded.segment_count == 1 and reloaded._segments[0].store._segment.tombstones == 0
+            assert reloaded.search("topic3 words", n_results=5) == single.search("topic3 words", n_results=5)
+
+
+def test_facet_counts_from_filter_bitmaps():
+    """Facet counts match a loop over the catalog, under filters and within a query's matches."""
+    scraper = CatalogScraper(project_root / "catalog.json")
+    items = scraper.load_catalog().solution_accelerators
+    store = _catalog_store()
+
+    counts = store.facet_counts()
+    assert counts["total"] == len(items)
+    by_area = {}
+    for item in items:
+        by_area[item.solution_area.value] = by_area.get(item.solution_area.value, 0) + 1
+    assert counts["facets"]["solution_area"] == by_area
+    python = sum("Python" in item.languages for item in items)
+    assert counts["facets"]["languages"]["Python"] == python
+    assert list(counts["facets"]["languages"].values()) == sorted(counts["facets"]["languages"].values(), reverse=True)
+
+    # List-valued facets filter too (any listed value matches)
+    assert store.facet_counts(filters={"languages": "Python"}, fields=["languages"])["total"] == python
+    assert len(store.search("agent", n_results=20, filters={"languages": ["Python"]})["ids"]) == python
+
+    # With a query, only its matches are counted (no zero-score backfill)
+    matches = store.matching_ids("multi agent automation", n_results=50)["ids"]
+    scoped = store.facet_counts("multi agent automation", n_results=50)
+    assert 0 < scoped["total"] == len(matches) < len(items)
+    assert store.facet_counts(ids=matches) == scoped
+
+    try:
+        store.facet_counts(fields=["colour"])
+        assert False, "Expected ValueError for unknown facet field"
+    except ValueError:
+        pass
+
+
+def test_phrase_and_proximity_operators():
+    """Quoted query parts match only exact phrases (or, with ~N, nearby terms) in every mode."""
+    for mode in ("lexical", "dense", "hybrid"):
+        store = VectorStore(mode=mode)
+        store.upsert([
+            _item("fabric", "Unified Data Foundation", "Build a unified data foundation with Fabric"),
+            _item("hub", "Data Hub", "Unified access to the foundation of your data estate"),
+            _item("agents", "Agent Orchestrator", "Multi-agent automation engine"),
+            _item("flows", "Workflow Automation", "Automation for agent workflows across multi cloud"),
+        ])
+
+        assert store.search("unified data foundation", n_results=4)["ids"][:2] == ["fabric", "hub"]
+        assert store.search('"unified data foundation"', n_results=4)["ids"] == ["fabric"]
+        assert store.search('"multi-agent automation"', n_results=4)["ids"] == ["agents"]
+        # Slop widens the window and ignores order; the cache keeps phrase and bag queries apart
+        assert store.search('"agent multi"', n_results=4)["ids"] == []
+        assert set(store.search('"agent multi"~3', n_results=4)["ids"]) == {"agents", "flows"}
+        assert store.search('"agent multi"~3 "across"', n_results=4)["ids"] == ["flows"]
+        debug = store.search('"data foundation" hub', n_results=4, debug=True)["debug"]
+        assert "phrase" in debug["timings_ms"]
+
+    store = VectorStore()
+    store.ingest_accelerators([_item("agents", "Agent Engine", "Multi-agent automation engine")])
+    store.upsert_passages("agents", _passages("agents", README))
+    assert store.best_passages('"key vault"', ["agents"])["agents"]["metadata"]["heading"] == "Agent Engine > Security"
+    assert store.best_passages('"vault key"', ["agents"]) == {}
+
+
+def test_complexity_range_filters():
+    """complexity_min/max OR the bitmaps of the levels in bounds, in-between levels included."""
+    store = VectorStore()
+    store.upsert([
+        _item("intro", "Agent Basics", "Build agents", complexity="L200"),
+        _item("mid", "Agent Workflows", "Build agent workflows", complexity="L300"),
+        _item("deep", "Agent Internals", "Build agent runtimes", complexity="L400"),
+        _item("deep2", "Agent Scale", "Build agents at scale", complexity="L400"),
+    ])
+
+    def ids(**kw):
+        return set(store.search("agents", n_results=10, **kw)["ids"])
+
+    assert ids(complexity="L250") == set()
+    assert ids(complexity_min="L250") == {"mid", "deep", "deep2"}
+    assert ids(complexity_max="L350") == {"intro", "mid"}
+    assert ids(complexity_min="L250", complexity_max="L350") == {"mid"}
+    assert ids(complexity_min="L300", complexity_max="L300") == {"mid"}
+    # Exact levels outside the range are dropped, so nothing may match
+    assert ids(complexity=["L200", "L400"], complexity_min="L300") == {"deep", "deep2"}
+    assert ids(complexity="L200", complexity_min="L300") == set()
+    assert ids(filters={"technical_complexity": Range(high="L300")}, exclude={"technical_complexity": Range("L250", "L300")}) == {"intro"}
+
+    store.delete(["deep"])
+    store.upsert([_item("mid", "Agent Workflows", "Build agent workflows", complexity="L400")])
+    assert ids(complexity_min="L350") == {"mid", "deep2"}
+    assert store.facet_counts(filters={"technical_complexity": Range("L250")})["total"] == 2
+
+    for bad in ({"complexity_min": "expert"}, {"filters": {"solution_area": Range("L200")}}):
+        try:
+            store.search("agents", **bad)
+            assert False, "expected ValueError"
+        except ValueError:
+            pass
+
+
+def test_rerank_stage_reorders_only_the_shortlist():
+    """Re-rankers re-order the first stage's rerank_depth candidates and report their own timings."""
+    items = [
+        _item("body", "Data Tools", "Lakehouse patterns for fabric with a fabric lakehouse", area="Security"),
+        _item("name", "Fabric Lakehouse", "Patterns for data teams", area="AI"),
+        _item("chat", "Chat App", "Chat over your documents", products_and_services=["Azure OpenAI"]),
+        _item("bot", "Chat Bot", "Chat over your documents", products_and_services=["Azure Bot Service"]),
+    ] + [_item(f"filler-{i}", f"Filler {i}", "Unrelated content") for i in range(20)]
+
+    plain = VectorStore(scorer="bm25")
+    plain.upsert(items)
+    bm25f = VectorStore(scorer="bm25", rerank="bm25f", rerank_depth=4)
+    bm25f.upsert(items)
+    assert plain.search("fabric lakehouse", n_results=2)["ids"] == ["body", "name"]
+    result = bm25f.search("fabric lakehouse", n_results=2, debug=True)
+    assert result["ids"] == ["name", "body"]
+    # Cost is bounded by the depth, not the 24 documents
+    assert result["debug"]["candidates"]["rerank"] == 4
+    assert "rerank_bm25f" in result["debug"]["timings_ms"]
+
+    products = VectorStore(rerank="products")
+    products.upsert(items)
+    assert products.search("chat app with azure openai", n_results=2)["ids"][0] == "chat"
+    assert products.search("chat bot service with azure bot service", n_results=2)["ids"][0] == "bot"
+
+    priors = VectorStore(scorer="bm25", rerank=[PriorReranker(area_priors={"AI": 0.9})], rerank_depth=2)
+    priors.upsert(items)
+    assert priors.search("fabric lakehouse", n_results=2)["ids"] == ["name", "body"]
+    # A shortlist of one leaves nothing to re-order
+    priors.rerank_depth = 1
+    assert priors.search("fabric lakehouse", n_results=1)["ids"] == ["body"]
+
+    with SegmentedVectorStore(flush_threshold=5, scorer="bm25", rerank="bm25f", rerank_depth=4) as segmented:
+        segmented.upsert(items)
+        segmented.wait(10)
+        assert segmented.search("fabric lakehouse", n_results=2)["ids"] == ["name", "body"]
+
+    try:
+        VectorStore(rerank="learned")
+        assert False, "expected ValueError"
+    except ValueError:
+        pass
+
+
+def test_clone_jobs_run_in_background_with_progress():
+    """Clone jobs return at once, run git as asyncio subprocesses and record per-repo results."""
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        source = tmp / "source"
+        source.mkdir()
+        (source / "README.md").write_text("# Demo\n")
+        git = ["git", "-c", "user.name=test", "-c", "user.email=test@example.com"]
+        for args in (["init", "-q"], ["add", "README.md"], ["commit", "-q", "-m", "init"]):
+            subprocess.run(git + args, cwd=source, check=True)
+        registry = {"repositories": [
+            {"id": "demo", "name": "Demo Repo", "github_url": source.as_uri(), "enabled": True},
+            {"id": "missing", "name": "Missing Repo", "github_url": (tmp / "nope").as_uri(), "enabled": True},
+            {"id": "off", "name": "Off Repo", "github_url": source.as_uri(), "enabled": False},
+        ]}
+        (tmp / "registry.json").write_text(json.dumps(registry))
+        crawler = GitHubRepoCrawler(str(tmp / "registry.json"), str(tmp / "repos"))
+        assert crawler.enabled_repo_ids() == ["demo", "missing"]
+
+        async def clone(repo_id):
+            path = await crawler.clone_repo_async(repo_id)
+            if path is None:
+                raise RuntimeError(f"Failed to clone repo {repo_id}")
+            return str(path)
+
+        async def run():
+            queue = JobQueue(concurrency=1)
+            job = queue.submit("clone-all", crawler.enabled_repo_ids(), clone)
+            assert job.to_dict()["status"] == "queued" and job.to_dict()["completed"] == 0
+            await job._task
+            return queue, job
+
+        queue, job = asyncio.run(run())
+        status = job.to_dict()
+        assert status["status"] == "partial"
+        assert status["succeeded"] == ["demo"] and status["failed"] == ["missing"]
+        assert (Path(status["results"]["demo"]["result"]) / "README.md").exists()
+        assert queue.get(job.id) is job and queue.get("unknown") is None
@@ -0,0 +1,193 @@
+"""
+Approximate nearest-neighbour index for the dense vector mode.
+An inverted-file (IVF) index: spherical k-means centroids partition the
+rows, and a query scores only the rows of its nprobe closest partitions.
+"""
+
+import math
+import sys
+from array import array
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+# Rows scored per matrix product while assigning rows to centroids
+_ASSIGN_BLOCK = 8192
+
+
+def kmeans(vectors: np.ndarray, k: int, iterations: int = 10, seed: int = 0) -> np.ndarray:
+    """
+    Spherical k-means (cosine similarity) over unit row vectors.
+
+    Args:
+        vectors: (n, dim) float32 matrix, n >= k
+        k: Number of centroids
+        iterations: Lloyd iterations
+        seed: Seed for the initial centroid sample
+
+    Returns:
+        (k, dim) float32 matrix of unit centroids
+    """
+    rng = np.random.default_rng(seed)
+    centroids = vectors[rng.choice(len(vectors), size=k, replace=False)].copy()
+    for _ in range(iterations):
+        assignment = assign(vectors, centroids)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignment, vectors)
+        counts = np.bincount(assignment, minlength=k)
+        # Empty clusters are re-seeded from random rows
+        empty = counts == 0
+        if empty.any():
+            sums[empty] = vectors[rng.choice(len(vectors), size=int(empty.sum()), replace=False)]
+        norms = np.linalg.norm(sums, axis=1, keepdims=True)
+        np.divide(sums, norms, out=sums, where=norms > 0)
+        centroids = sums
+    return centroids
+
+
+def assign(vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    """Index of the most similar centroid for every row, computed block by block."""
+    result = np.empty(len(vectors), dtype=np.int32)
+    for start in range(0, len(vectors), _ASSIGN_BLOCK):
+        block = vectors[start:start + _ASSIGN_BLOCK]
+        result[start:start + len(block)] = np.argmax(block @ centroids.T, axis=1)
+    return result
+
+
+class IVFIndex:
+    """
+    Inverted-file index over the rows of a DenseMatrix (or QuantizedMatrix).
+
+    Untrained until the matrix reaches ``min_train`` rows (smaller matrices
+    are searched exactly). Rows appended after training go straight to their
+    nearest centroid's list; the centroids are retrained once the matrix has
+    grown ``retrain_factor`` times past the size they were trained on.
+
+    ``nprobe`` trades recall for speed: each query scores about
+    nprobe / nlist of the rows.
+
+    Centroids and lists are published together as one tuple, so a search
+    running during a retrain sees either the old partitioning or the new.
+    """
+
+    def __init__(
+        self,
+        nlist: Optional[int] = None,
+        min_train: int = 1024,
+        retrain_factor: float = 4.0,
+        iterations: int = 10,
+        seed: int = 0
+    ):
+        """
+        Args:
+            nlist: Number of partitions (default: sqrt of the rows at training time)
+            min_train: Rows needed before the index is trained
+            retrain_factor: Growth (vs. the training size) that triggers retraining
+            iterations: k-means iterations
+            seed: k-means seed, so rebuilds are reproducible
+        """
+        self.nlist = nlist
+        self.min_train = min_train
+        self.retrain_factor = retrain_factor
+        self.iterations = iterations
+        self.seed = seed
+        self.trained_rows = 0
+        # (centroids, partition -> row ordinals), or None until trained
+        self._partitions: Optional[Tuple[np.ndarray, List[array]]] = None
+
+    @property
+    def trained(self) -> bool:
+        return self._partitions is not None
+
+    @property
+    def centroids(self) -> Optional[np.ndarray]:
+        return self._partitions[0] if self._partitions else None
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate bytes held by the centroids and partition lists."""
+        if self._partitions is None:
+            return 0
+        centroids, lists = self._partitions
+        return centroids.nbytes + sum(sys.getsizeof(rows) for rows in lists)
+
+    def empty(self) -> "IVFIndex":
+        """An untrained index with the same settings."""
+        return IVFIndex(self.nlist, self.min_train, self.retrain_factor, self.iterations, self.seed)
+
+    def update(self, matrix, start: int) -> None:
+        """
+        Account for rows appended to the matrix from ordinal ``start`` on.
+
+        Trains (or retrains) on every live row when the size thresholds are
+        crossed; otherwise assigns only the new rows.
+        """
+        size = len(matrix)
+        if size >= max(self.min_train, self.retrain_factor * self.trained_rows):
+            self.train(matrix)
+        elif self.trained and size > start:
+            centroids, lists = self._partitions
+            for ordinal, partition in enumerate(assign(matrix.rows(slice(start, size)), centroids).tolist(), start):
+                lists[partition].append(ordinal)
+
+    def train(self, matrix) -> None:
+        """Cluster the live rows and rebuild every partition list."""
+        rows = np.flatnonzero(matrix.alive)
+        if len(rows) == 0:
+            return
+        nlist = min(self.nlist or max(1, int(math.sqrt(len(rows)))), len(rows))
+        # Train on a bounded sample, then assign every row
+        sample = rows
+        if len(rows) > 256 * nlist:
+            sample = np.random.default_rng(self.seed).choice(rows, size=256 * nlist, replace=False)
+        centroids = kmeans(matrix.rows(sample), nlist, self.iterations, self.seed)
+        # Rows are fetched block by block, so quantized matrices are never fully dequantized
+        partitions = np.concatenate([
+            assign(matrix.rows(rows[start:start + _ASSIGN_BLOCK]), centroids)
+            for start in range(0, len(rows), _ASSIGN_BLOCK)
+        ])
+        self._publish(centroids, rows, partitions)
+        self.trained_rows = len(matrix)
+
+    def _publish(self, centroids: np.ndarray, rows: np.ndarray, partitions: np.ndarray) -> None:
+        """Group row ordinals by partition (in ordinal order) and swap in the new partitioning."""
+        order = np.argsort(partitions, kind='stable')
+        counts = np.bincount(partitions, minlength=len(centroids))
+        chunks = np.split(rows[order].astype(np.int32), np.cumsum(counts)[:-1])
+        self._partitions = (centroids, [array('i', chunk.tobytes()) for chunk in chunks])
+
+    def probe(self, query: np.ndarray, nprobe: int) -> np.ndarray:
+        """
+        Candidate row ordinals for a unit query vector.
+
+        Returns:
+            Ordinals from the nprobe partitions whose centroids are most similar
+        """
+        centroids, lists = self._partitions
+        nprobe = min(nprobe, len(lists))
+        nearest = np.argpartition(centroids @ query, -nprobe)[-nprobe:]
+        # tobytes() snapshots each list, so concurrent appends never see an exported buffer
+        return np.frombuffer(b"".join(lists[p].tobytes() for p in nearest.tolist()), dtype=np.int32)
+
+    def save(self, directory: Path, n_rows: int) -> None:
+        """Write centroids and the partition of each of the n_rows rows (skipped while untrained)."""
+        if not self.trained:
+            return
+        centroids, lists = self._partitions
+        assignment = np.full(n_rows, -1, dtype=np.int32)
+        for partition, rows in enumerate(lists):
+            assignment[np.frombuffer(rows.tobytes(), dtype=np.int32)] = partition
+        np.save(Path(directory) / "ivf_centroids.npy", centroids)
+        np.save(Path(directory) / "ivf_assignment.npy", assignment)
+
+    def load(self, directory: Path, matrix) -> None:
+        """Restore a saved index for the given matrix, or train one if none was saved."""
+        directory = Path(directory)
+        if not (directory / "ivf_centroids.npy").exists():
+            self.update(matrix, 0)
+            return
+        assignment = np.load(directory / "ivf_assignment.npy")[:len(matrix)]
+        rows = np.flatnonzero(assignment >= 0)
+        self._publish(np.load(directory / "ivf_centroids.npy"), rows, assignment[rows])
+        self.trained_rows = len(matrix)
@@ -0,0 +1,82 @@
+"""
+Query result cache for the TechConnect vector store.
+An LRU map with a per-entry TTL; every entry records the index generation
+it was computed at, so any write to the store invalidates it.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+
+class QueryCache:
+    """
+    Bounded LRU + TTL cache of search results.
+
+    Entries are tagged with the store's index generation; a lookup at a newer
+    generation is a miss and drops the entry, so writes never need to walk
+    the cache.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 300.0):
+        """
+        Args:
+            maxsize: Maximum number of cached results (0 disables caching)
+            ttl: Seconds an entry stays valid
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()  # key -> (generation, expires, value)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable, generation: int) -> Optional[Any]:
+        """
+        Cached value for key, or None if missing, expired or from an older generation.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry_generation, expires, value = entry
+                if entry_generation == generation and expires > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key: Hashable, generation: int, value: Any) -> None:
+        """Store a value computed at the given generation, evicting the least recently used."""
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (generation, time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        """Drop all entries (counters are kept)."""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and occupancy."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "ttl_seconds": self.ttl,
+        }
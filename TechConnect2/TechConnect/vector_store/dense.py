@@ -0,0 +1,474 @@
+"""
+Dense vector support for the TechConnect vector store.
+Provides a local hashing-trick embedder (works offline, no model download)
+and contiguous float32 or int8-quantized matrices with amortized growth
+and top-k search.
+"""
+
+import re
+import zlib
+from pathlib import Path
+from typing import Callable, List, Optional, Protocol, Tuple, Union
+
+import numpy as np
+
+# Rows converted to float32 per matrix product when scanning int8 codes;
+# small enough for the converted block to stay in L2 cache
+_SCAN_BLOCK = 512
+
+RowIndex = Union[slice, np.ndarray, List[int]]
+
+
+class Embedder(Protocol):
+    """Interface for pluggable local embedders."""
+
+    dim: int
+    version: str
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        """Return an (len(texts), dim) float32 matrix of L2-normalized vectors."""
+        ...
+
+
+_TOKEN_RE = re.compile(r'\w+')
+
+
+def word_tokens(text: str) -> List[str]:
+    """Default HashingEmbedder tokenizer: lowercase word split (module-level, so embedders pickle)."""
+    return _TOKEN_RE.findall(text.lower())
+
+
+class HashingEmbedder:
+    """
+    Feature-hashing embedder: each token is hashed into one of ``dim``
+    signed buckets and the resulting vector is L2-normalized.
+
+    Uses CRC32 rather than Python's salted ``hash()`` so vectors are stable
+    across processes and restarts.
+    """
+
+    def __init__(
+        self,
+        dim: int = 256,
+        tokenizer: Optional[Callable[[str], List[str]]] = None,
+        tokenizer_version: str = ""
+    ):
+        """
+        Args:
+            dim: Vector width
+            tokenizer: Text -> tokens function (defaults to lowercase word split)
+            tokenizer_version: Identifies the tokenizer in ``version``, so
+                vectors cached under another tokenizer are not reused
+        """
+        self.dim = dim
+        self.version = f"hashing-crc32-v1-{dim}" + (f"-{tokenizer_version}" if tokenizer_version else "")
+        self._tokenizer = tokenizer or word_tokens
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        """Embed a batch of texts into an (n, dim) float32 matrix."""
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for token in self._tokenizer(text):
+                h = zlib.crc32(token.encode('utf-8'))
+                vectors[row, h % self.dim] += 1.0 if (h >> 31) & 1 else -1.0
+
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        np.divide(vectors, norms, out=vectors, where=norms > 0)
+        return vectors
+
+
+class DenseMatrix:
+    """
+    Row-per-document float32 matrix stored in one contiguous buffer.
+
+    Rows are addressed by the same ordinals as the inverted index. Capacity
+    doubles when full, so appending n rows costs amortized O(n) copies.
+    """
+
+    # Whether scores() only approximates the similarities rescore() returns
+    approximate = False
+    FILE = "vectors.npy"
+
+    def __init__(self, dim: int, initial_capacity: int = 64):
+        self.dim = dim
+        self._data = np.zeros((initial_capacity, dim), dtype=np.float32)
+        self._alive = np.zeros(initial_capacity, dtype=bool)
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def vectors(self) -> np.ndarray:
+        """View of the populated rows (no copy)."""
+        return self._data[:self._size]
+
+    @property
+    def mapped(self) -> bool:
+        """Whether the rows are still a read-only view of a snapshot."""
+        return isinstance(self._data, np.memmap)
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes of the row buffer (including spare capacity) and row mask."""
+        return self._data.nbytes + self._alive.nbytes
+
+    @property
+    def alive(self) -> np.ndarray:
+        """Boolean mask of the populated rows that were not removed."""
+        return self._alive[:self._size]
+
+    def rows(self, index: RowIndex) -> np.ndarray:
+        """float32 copy of the selected rows (a slice or ordinals)."""
+        return np.array(self.vectors[index], dtype=np.float32)
+
+    def take(self, rows: RowIndex) -> "DenseMatrix":
+        """New matrix holding only the selected rows, renumbered in order (for compaction)."""
+        matrix = type(self)(self.dim, initial_capacity=1)
+        matrix.extend(self, rows)
+        return matrix
+
+    def extend(self, other: "DenseMatrix", rows: RowIndex) -> int:
+        """Append selected rows of another matrix of the same type (for merging segments)."""
+        return self.append(other.vectors[rows])
+
+    def _reserve(self, capacity: int) -> None:
+        """Grow the buffer to at least ``capacity`` rows by doubling."""
+        if capacity <= len(self._data):
+            return
+        new_capacity = max(capacity, 2 * len(self._data), 1)
+        data = np.zeros((new_capacity, self.dim), dtype=np.float32)
+        data[:self._size] = self._data[:self._size]
+        alive = np.zeros(new_capacity, dtype=bool)
+        alive[:self._size] = self._alive[:self._size]
+        self._data, self._alive = data, alive
+
+    def append(self, vectors: np.ndarray) -> int:
+        """
+        Append a block of row vectors.
+
+        Args:
+            vectors: (n, dim) float32 matrix
+
+        Returns:
+            Ordinal of the first appended row
+        """
+        start = self._size
+        end = start + len(vectors)
+        self._reserve(end)
+        self._data[start:end] = vectors
+        self._alive[start:end] = True
+        self._size = end
+        return start
+
+    def remove(self, ordinal: int) -> None:
+        """Exclude a row from future searches."""
+        self._alive[ordinal] = False
+
+    def scores(self, query: np.ndarray, allowed: Optional[bytes] = None) -> np.ndarray:
+        """
+        Cosine similarity of every row to the query.
+
+        Args:
+            query: Unit query vector
+            allowed: Optional packed little-endian bitmap of rows to keep
+
+        Returns:
+            Scores per row; removed and disallowed rows score -inf
+        """
+        scores = self.vectors @ query
+        keep = self._alive[:self._size]
+        if allowed is not None:
+            bits = np.unpackbits(np.frombuffer(allowed, dtype=np.uint8), bitorder='little')
+            keep = keep & bits[:self._size].astype(bool)
+        scores[~keep] = -np.inf
+        return scores
+
+    def scores_rows(self, query: np.ndarray, rows: np.ndarray, allowed: Optional[bytes] = None) -> np.ndarray:
+        """
+        Cosine similarity of selected rows to the query (e.g. ANN candidates).
+
+        Args:
+            query: Unit query vector
+            rows: Row ordinals to score
+            allowed: Optional packed little-endian bitmap of rows to keep
+
+        Returns:
+            Scores aligned with rows; removed and disallowed rows score -inf
+        """
+        scores = self._data[rows] @ query
+        keep = self._alive[rows]
+        if allowed is not None:
+            bits = np.unpackbits(np.frombuffer(allowed, dtype=np.uint8), bitorder='little')
+            keep = keep & bits[rows].astype(bool)
+        scores[~keep] = -np.inf
+        return scores
+
+    def rescore(self, query: np.ndarray, rows: np.ndarray) -> np.ndarray:
+        """Exact cosine similarity of selected rows to the query."""
+        return self._data[rows] @ query
+
+    def scores_many(self, queries: np.ndarray, allowed: List[Optional[bytes]]) -> np.ndarray:
+        """
+        Cosine similarity of every row to a batch of queries in one matrix product.
+
+        Args:
+            queries: (q, dim) matrix of unit query vectors
+            allowed: Per-query packed little-endian bitmaps (None keeps all rows)
+
+        Returns:
+            (q, rows) scores; removed and disallowed rows score -inf
+        """
+        scores = queries @ self.vectors.T
+        keep = np.broadcast_to(self._alive[:self._size], scores.shape).copy()
+        for q, bitmap in enumerate(allowed):
+            if bitmap is not None:
+                bits = np.unpackbits(np.frombuffer(bitmap, dtype=np.uint8), bitorder='little')
+                keep[q] &= bits[:self._size].astype(bool)
+        scores[~keep] = -np.inf
+        return scores
+
+    def clear(self) -> None:
+        """Drop all rows."""
+        self.__init__(self.dim)
+
+    def save(self, directory: Path) -> None:
+        """Write the populated rows into a snapshot directory as vectors.npy."""
+        np.save(Path(directory) / self.FILE, self.vectors)
+
+    @classmethod
+    def load(cls, directory: Path, alive: np.ndarray) -> "DenseMatrix":
+        """
+        Open saved rows memory-mapped read-only; the first append copies
+        them into a private, growable buffer.
+
+        Args:
+            directory: Snapshot directory written by save()
+            alive: Boolean row mask (False for removed documents)
+        """
+        vectors = np.load(Path(directory) / cls.FILE, mmap_mode='r')
+        matrix = cls(vectors.shape[1], initial_capacity=0)
+        matrix._data = vectors
+        matrix._alive = np.array(alive, dtype=bool)
+        matrix._size = len(vectors)
+        return matrix
+
+
+def quantize(vectors: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Symmetric per-row int8 quantization.
+
+    Returns:
+        (codes, scales): int8 codes in [-127, 127] and one float32 scale
+        per row, with row ~= codes * scale
+    """
+    vectors = np.asarray(vectors, dtype=np.float32).reshape(-1, vectors.shape[-1])
+    scales = np.abs(vectors).max(axis=1) / 127.0
+    scales[scales == 0] = 1.0
+    codes = np.rint(vectors / scales[:, None]).astype(np.int8)
+    return codes, scales.astype(np.float32)
+
+
+class QuantizedMatrix(DenseMatrix):
+    """
+    DenseMatrix storing each row as int8 codes plus a float32 scale: about
+    a quarter of the memory (dim + 4 bytes per row instead of 4 * dim).
+
+    scores() is a first pass: the query is quantized too, and the integer
+    dot products are computed exactly through float32 BLAS, a cache-sized
+    block of codes at a time. rescore() then scores a shortlist with the
+    float32 query against the dequantized rows (see rescored_top_k()).
+    """
+
+    approximate = True
+    FILE = "vector_codes.npy"
+    SCALES_FILE = "vector_scales.npy"
+
+    def __init__(self, dim: int, initial_capacity: int = 64):
+        self.dim = dim
+        self._data = np.zeros((initial_capacity, dim), dtype=np.int8)
+        self._scales = np.zeros(initial_capacity, dtype=np.float32)
+        self._alive = np.zeros(initial_capacity, dtype=bool)
+        self._size = 0
+
+    @property
+    def vectors(self) -> np.ndarray:
+        """View of the populated rows' int8 codes (no copy)."""
+        return self._data[:self._size]
+
+    @property
+    def scales(self) -> np.ndarray:
+        """Per-row scale factors of the populated rows."""
+        return self._scales[:self._size]
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes of the code and scale buffers (including spare capacity) and row mask."""
+        return self._data.nbytes + self._scales.nbytes + self._alive.nbytes
+
+    def rows(self, index: RowIndex) -> np.ndarray:
+        """Dequantized float32 copy of the selected rows."""
+        return self._data[:self._size][index].astype(np.float32) * self._scales[:self._size][index][:, None]
+
+    def extend(self, other: "QuantizedMatrix", rows: RowIndex) -> int:
+        """Append selected rows of another quantized matrix; codes are copied, not re-quantized."""
+        return self._append_codes(other.vectors[rows], other.scales[rows])
+
+    def _reserve(self, capacity: int) -> None:
+        """Grow the buffers to at least ``capacity`` rows by doubling."""
+        if capacity <= len(self._data):
+            return
+        new_capacity = max(capacity, 2 * len(self._data), 1)
+        data = np.zeros((new_capacity, self.dim), dtype=np.int8)
+        data[:self._size] = self._data[:self._size]
+        scales = np.zeros(new_capacity, dtype=np.float32)
+        scales[:self._size] = self._scales[:self._size]
+        alive = np.zeros(new_capacity, dtype=bool)
+        alive[:self._size] = self._alive[:self._size]
+        self._data, self._scales, self._alive = data, scales, alive
+
+    def append(self, vectors: np.ndarray) -> int:
+        """
+        Quantize and append a block of float32 row vectors.
+
+        Returns:
+            Ordinal of the first appended row
+        """
+        return self._append_codes(*quantize(vectors))
+
+    def _append_codes(self, codes: np.ndarray, scales: np.ndarray) -> int:
+        start = self._size
+        end = start + len(codes)
+        self._reserve(end)
+        self._data[start:end] = codes
+        self._scales[start:end] = scales
+        self._alive[start:end] = True
+        self._size = end
+        return start
+
+    def _dot(self, codes: np.ndarray, queries: np.ndarray) -> np.ndarray:
+        """Integer dot products of int8 codes with quantized (dim, q) queries (float32, exact), block by block."""
+        queries = np.ascontiguousarray(queries, dtype=np.float32)
+        out = np.empty((len(codes), queries.shape[1]), dtype=np.float32)
+        buffer = np.empty((min(_SCAN_BLOCK, len(codes)), self.dim), dtype=np.float32)
+        for start in range(0, len(codes), _SCAN_BLOCK):
+            block = codes[start:start + _SCAN_BLOCK]
+            converted = buffer[:len(block)]
+            np.copyto(converted, block, casting='unsafe')
+            np.dot(converted, queries, out=out[start:start + len(block)])
+        return out
+
+    def _first_pass(self, codes: np.ndarray, scales: np.ndarray, queries: np.ndarray) -> np.ndarray:
+        """Approximate similarities of rows to (q, dim) queries, as a (rows, q) matrix."""
+        query_codes, query_scales = quantize(queries)
+        scores = self._dot(codes, query_codes.T)
+        scores *= scales[:, None]
+        scores *= query_scales[None, :]
+        return scores
+
+    def scores(self, query: np.ndarray, allowed: Optional[bytes] = None) -> np.ndarray:
+        """
+        Approximate cosine similarity of every row to the query (int8 x int8).
+
+        Returns:
+            Scores per row; removed and disallowed rows score -inf
+        """
+        scores = self._first_pass(self.vectors, self.scales, query[None, :])[:, 0]
+        keep = self._alive[:self._size]
+        if allowed is not None:
+            bits = np.unpackbits(np.frombuffer(allowed, dtype=np.uint8), bitorder='little')
+            keep = keep & bits[:self._size].astype(bool)
+        scores[~keep] = -np.inf
+        return scores
+
+    def scores_rows(self, query: np.ndarray, rows: np.ndarray, allowed: Optional[bytes] = None) -> np.ndarray:
+        """Approximate cosine similarity of selected rows to the query; aligned with rows."""
+        scores = self._first_pass(self._data[rows], self._scales[rows], query[None, :])[:, 0]
+        keep = self._alive[rows]
+        if allowed is not None:
+            bits = np.unpackbits(np.frombuffer(allowed, dtype=np.uint8), bitorder='little')
+            keep = keep & bits[rows].astype(bool)
+        scores[~keep] = -np.inf
+        return scores
+
+    def scores_many(self, queries: np.ndarray, allowed: List[Optional[bytes]]) -> np.ndarray:
+        """Approximate cosine similarity of every row to a batch of queries, as (q, rows)."""
+        scores = self._first_pass(self.vectors, self.scales, queries).T.copy()
+        keep = np.broadcast_to(self._alive[:self._size], scores.shape).copy()
+        for q, bitmap in enumerate(allowed):
+            if bitmap is not None:
+                bits = np.unpackbits(np.frombuffer(bitmap, dtype=np.uint8), bitorder='little')
+                keep[q] &= bits[:self._size].astype(bool)
+        scores[~keep] = -np.inf
+        return scores
+
+    def rescore(self, query: np.ndarray, rows: np.ndarray) -> np.ndarray:
+        """float32 similarity of the float query to the dequantized selected rows."""
+        return (self._data[rows].astype(np.float32) @ query) * self._scales[rows]
+
+    def save(self, directory: Path) -> None:
+        """Write the codes and scales into a snapshot directory."""
+        np.save(Path(directory) / self.FILE, self.vectors)
+        np.save(Path(directory) / self.SCALES_FILE, self.scales)
+
+    @classmethod
+    def load(cls, directory: Path, alive: np.ndarray) -> "QuantizedMatrix":
+        """Open saved codes and scales memory-mapped read-only (see DenseMatrix.load())."""
+        codes = np.load(Path(directory) / cls.FILE, mmap_mode='r')
+        matrix = cls(codes.shape[1], initial_capacity=0)
+        matrix._data = codes
+        matrix._scales = np.load(Path(directory) / cls.SCALES_FILE, mmap_mode='r')
+        matrix._alive = np.array(alive, dtype=bool)
+        matrix._size = len(codes)
+        return matrix
+
+
+def rescored_top_k(
+    matrix: DenseMatrix,
+    query: np.ndarray,
+    scores: np.ndarray,
+    k: int,
+    rescore_factor: int = 4,
+    rows: Optional[np.ndarray] = None
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    The k best rows for a query from first-pass scores.
+
+    Exact matrices just take the top k. Quantized matrices take a shortlist
+    of k * rescore_factor, re-score it in float32 and keep the best k.
+
+    Args:
+        matrix: Matrix the scores came from
+        query: Unit query vector
+        scores: First-pass scores (e.g. from matrix.scores())
+        k: Number of rows to return
+        rescore_factor: Shortlist size as a multiple of k
+        rows: Ordinal of each entry of scores (default: entry i is row i)
+
+    Returns:
+        (ordinals, similarities), best first
+    """
+    best = top_k(scores, k * rescore_factor if matrix.approximate else k)
+    ordinals = best if rows is None else rows[best]
+    if not matrix.approximate:
+        return ordinals, scores[best]
+    similarities = matrix.rescore(query, ordinals)
+    order = np.argsort(-similarities, kind='stable')[:k]
+    return ordinals[order], similarities[order]
+
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """
+    Indices of the k highest finite scores, best first.
+
+    Uses ``argpartition`` so only the selected k entries are sorted.
+    """
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.empty(0, dtype=np.intp)
+    if k < len(scores):
+        idx = np.argpartition(scores, -k)[-k:]
+    else:
+        idx = np.arange(len(scores))
+    idx = idx[np.argsort(-scores[idx], kind='stable')]
+    return idx[np.isfinite(scores[idx])]
@@ -0,0 +1,194 @@
+"""
+On-disk embedding cache for the TechConnect vector store.
+Vectors are keyed by the SHA-256 of the embedder version and the text, so
+re-ingesting unchanged passages costs a file read instead of a model call.
+"""
+
+import hashlib
+import logging
+import os
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Pruning deletes least recently used entries down to this fraction of max_bytes
+_PRUNE_TO = 0.9
+
+# Temporary files older than this (seconds) are left over from a crashed writer
+_STALE_TMP = 3600
+
+
+def cache_key(version: str, text: str) -> str:
+    """Cache key of a text under an embedder version."""
+    digest = hashlib.sha256(version.encode('utf-8'))
+    digest.update(b"\0")
+    digest.update(text.encode('utf-8'))
+    return digest.hexdigest()
+
+
+class EmbeddingCache:
+    """
+    Size-bounded, content-addressed store of embedding vectors.
+
+    Each vector is one file of raw float32 bytes under a two-character
+    fan-out directory. Entries are written to a temporary file and renamed
+    into place with os.replace, so concurrent ingestion processes can share
+    a directory: readers see a whole vector or none, and two writers of the
+    same key write the same bytes. Hits refresh the file's mtime; once the
+    directory passes max_bytes the least recently used files are deleted.
+    """
+
+    def __init__(self, directory: Path, max_bytes: int = 512 * 1024 * 1024):
+        """
+        Args:
+            directory: Cache directory (created on first write)
+            max_bytes: Size bound; pruning brings the cache back under 90% of it
+        """
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._bytes: Optional[int] = None  # estimate, refreshed by every prune
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.f32"
+
+    def get(self, key: str, dim: int) -> Optional[np.ndarray]:
+        """Cached vector for a key, or None (missing, evicted meanwhile, or of another width)."""
+        path = self._path(key)
+        try:
+            data = path.read_bytes()
+            os.utime(path)
+        except OSError:
+            return None
+        if len(data) != 4 * dim:
+            return None
+        return np.frombuffer(data, dtype=np.float32)
+
+    def put(self, key: str, vector: np.ndarray) -> None:
+        """Write a vector atomically; I/O errors are logged and otherwise ignored."""
+        data = np.ascontiguousarray(vector, dtype=np.float32).tobytes()
+        path = self._path(key)
+        tmp = path.parent / f".tmp-{uuid.uuid4().hex}"
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp.write_bytes(data)
+            os.replace(tmp, path)
+        except OSError as e:
+            logger.warning(f"Could not write embedding cache entry: {e}")
+            tmp.unlink(missing_ok=True)
+            return
+        with self._lock:
+            if self._bytes is None:
+                self._bytes = self._scan()[1]
+            else:
+                self._bytes += len(data)
+            over = self._bytes > self.max_bytes
+        if over:
+            self.prune()
+
+    def embed(self, embedder: Any, texts: List[str]) -> np.ndarray:
+        """
+        Embed a batch, calling the embedder only for texts not in the cache.
+
+        Args:
+            embedder: Embedder whose ``version`` and ``dim`` key the cache
+            texts: Texts to embed
+
+        Returns:
+            (len(texts), dim) float32 matrix, as embedder.embed(texts) would
+        """
+        vectors = np.empty((len(texts), embedder.dim), dtype=np.float32)
+        keys = [cache_key(embedder.version, text) for text in texts]
+        missing: List[int] = []
+        for row, key in enumerate(keys):
+            cached = self.get(key, embedder.dim)
+            if cached is None:
+                missing.append(row)
+            else:
+                vectors[row] = cached
+        self.hits += len(texts) - len(missing)
+        self.misses += len(missing)
+
+        if missing:
+            computed = embedder.embed([texts[row] for row in missing])
+            for row, vector in zip(missing, computed):
+                vectors[row] = vector
+                self.put(keys[row], vector)
+        return vectors
+
+    def _scan(self) -> Tuple[List[Tuple[float, int, Path]], int]:
+        """(mtime, size, path) of every entry, and their total size; drops stale temporary files."""
+        entries = []
+        total = 0
+        now = time.time()
+        if not self.directory.exists():
+            return entries, total
+        for subdir in os.scandir(self.directory):
+            if not subdir.is_dir():
+                continue
+            for entry in os.scandir(subdir.path):
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue  # removed by another process
+                if entry.name.startswith(".tmp-"):
+                    if now - stat.st_mtime > _STALE_TMP:
+                        Path(entry.path).unlink(missing_ok=True)
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, Path(entry.path)))
+                total += stat.st_size
+        return entries, total
+
+    def prune(self) -> int:
+        """
+        Delete least recently used entries until the cache is under 90% of max_bytes.
+
+        Rescans the directory, so entries written by other processes count.
+
+        Returns:
+            Number of entries deleted
+        """
+        with self._lock:
+            entries, total = self._scan()
+            target = self.max_bytes * _PRUNE_TO
+            removed = 0
+            if total > target:
+                entries.sort(key=lambda entry: entry[0])
+                for _, size, path in entries:
+                    if total <= target:
+                        break
+                    path.unlink(missing_ok=True)
+                    total -= size
+                    removed += 1
+            self._bytes = total
+            self.evictions += removed
+        if removed:
+            logger.info(f"Pruned {removed} embedding cache entries")
+        return removed
+
+    def __reduce__(self):
+        # Locks are not picklable; each process (e.g. a shard) keeps its own counters
+        return EmbeddingCache, (self.directory, self.max_bytes)
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit, miss and eviction counters, and the estimated size in bytes."""
+        with self._lock:
+            if self._bytes is None:
+                self._bytes = self._scan()[1]
+            size = self._bytes
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "bytes": size,
+            "max_bytes": self.max_bytes,
+        }
@@ -0,0 +1,390 @@
+"""
+Facet filter index for the TechConnect vector store.
+Keeps one bitset per (field, value) over document ordinals, and one per
+level of each ordinal field, so metadata filters and ranges resolve to a
+bitmap AND before any scoring happens.
+"""
+
+import re
+import sys
+from enum import Enum
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple, Union
+
+FACET_FIELDS = (
+    "solution_area",
+    "technical_complexity",
+    "responsible_ai_tag",
+    "deployment_type",
+    "products",
+    "languages",
+)
+
+# Ordinal fields: range filters resolve through one bitmap per level number
+RANGE_FIELDS = ("technical_complexity",)
+
+_LEVEL_PATTERN = re.compile(r"L?(\d+(?:\.\d+)?)", re.IGNORECASE)
+
+
+def level_number(value: Any) -> float:
+    """
+    Numeric level of an ordinal value: "L300" (or ComplexityLevel.L300) -> 300.
+
+    Levels between the catalog's (e.g. "L250") are valid range bounds.
+
+    Raises:
+        ValueError: If the value is not a level
+    """
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    match = _LEVEL_PATTERN.fullmatch(facet_value(value).strip())
+    if match is None:
+        raise ValueError(f"Invalid level '{facet_value(value)}'. Expected e.g. L200 or L250")
+    return float(match.group(1))
+
+
+class Range(NamedTuple):
+    """
+    Inclusive range filter on an ordinal field, e.g. Range("L250", "L400").
+
+    Either bound may be None (unbounded). Used as the value of a field in a
+    filter dict, it matches documents whose level falls within the bounds.
+    """
+    low: Optional[Union[str, float, Enum]] = None
+    high: Optional[Union[str, float, Enum]] = None
+
+    def bounds(self) -> Tuple[float, float]:
+        """Numeric (low, high), with infinities for missing bounds."""
+        low = -float("inf") if self.low is None else level_number(self.low)
+        high = float("inf") if self.high is None else level_number(self.high)
+        return low, high
+
+
+FilterValue = Union[str, bool, Enum, Range, List[Union[str, bool, Enum]]]
+
+
+def facet_value(value: Any) -> str:
+    """Normalize a metadata or filter value to its facet key."""
+    return str(value.value if isinstance(value, Enum) else value)
+
+
+def facet_values(value: Any) -> List[str]:
+    """Facet keys of a metadata value; list-valued fields (products, languages) have one per item."""
+    if isinstance(value, (list, tuple)):
+        return [facet_value(item) for item in value]
+    return [facet_value(value)]
+
+
+def _unset(values: Optional[FilterValue]) -> bool:
+    """None, "" and [] leave a field unfiltered."""
+    if isinstance(values, Range):
+        return values.low is None and values.high is None
+    return values is None or (not isinstance(values, bool) and not values)
+
+
+def with_range(
+    values: Optional[FilterValue],
+    low: Optional[Union[str, float, Enum]] = None,
+    high: Optional[Union[str, float, Enum]] = None
+) -> Optional[FilterValue]:
+    """
+    Combine an exact filter on an ordinal field with range bounds.
+
+    Without bounds the exact values are returned unchanged; without exact
+    values the bounds become a Range. With both, only the exact values
+    inside the range are kept (a range no level satisfies if none are).
+
+    Raises:
+        ValueError: If a bound or exact value is not a level
+    """
+    if low is None and high is None:
+        return values
+    bounds = Range(low, high)
+    if _unset(values):
+        return bounds
+    lowest, highest = bounds.bounds()
+    if not isinstance(values, (list, tuple, set)):
+        values = [values]
+    kept = [value for value in values if lowest <= level_number(value) <= highest]
+    return kept or Range(float("inf"), -float("inf"))
+
+
+def filter_key(filters: Optional[Dict[str, FilterValue]]) -> Tuple:
+    """Hashable, order-insensitive form of a filter dict (e.g. for cache keys)."""
+    key = []
+    for field, values in (filters or {}).items():
+        if _unset(values):
+            continue
+        if isinstance(values, Range):
+            key.append((field, ("range",) + values.bounds()))
+            continue
+        if not isinstance(values, (list, tuple, set)):
+            values = [values]
+        key.append((field, tuple(sorted({facet_value(v) for v in values}))))
+    return tuple(sorted(key))
+
+
+def sum_facet_counts(parts: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Add up facet_counts() results of disjoint partitions (shards, segments)."""
+    facets: Dict[str, Dict[str, int]] = {}
+    for part in parts:
+        for field, values in part["facets"].items():
+            counts = facets.setdefault(field, {})
+            for value, count in values.items():
+                counts[value] = counts.get(value, 0) + count
+    return {
+        "total": sum(part["total"] for part in parts),
+        "facets": {
+            field: dict(sorted(values.items(), key=lambda item: (-item[1], item[0])))
+            for field, values in facets.items()
+        },
+    }
+
+
+class Bitmap:
+    """
+    Bitset over document ordinals backed by a bytearray.
+
+    Single-bit updates are in place; AND/OR/NOT go through Python's
+    arbitrary-precision integers, which run at C speed over the packed bytes.
+    """
+
+    __slots__ = ("_bits",)
+
+    def __init__(self, bits: Optional[bytearray] = None):
+        self._bits = bits if bits is not None else bytearray()
+
+    @classmethod
+    def of(cls, ordinals: Iterable[int]) -> "Bitmap":
+        """Bitmap with the given ordinals set."""
+        bitmap = cls()
+        for ordinal in ordinals:
+            bitmap.add(ordinal)
+        return bitmap
+
+    @classmethod
+    def _from_int(cls, value: int, size: int) -> "Bitmap":
+        return cls(bytearray(value.to_bytes(size, 'little')))
+
+    def _as_int(self) -> int:
+        return int.from_bytes(self._bits, 'little')
+
+    def add(self, ordinal: int) -> None:
+        byte = ordinal >> 3
+        if byte >= len(self._bits):
+            self._bits.extend(bytes(max(byte + 1 - len(self._bits), len(self._bits))))
+        self._bits[byte] |= 1 << (ordinal & 7)
+
+    def discard(self, ordinal: int) -> None:
+        byte = ordinal >> 3
+        if byte < len(self._bits):
+            self._bits[byte] &= ~(1 << (ordinal & 7)) & 0xFF
+
+    def __contains__(self, ordinal: int) -> bool:
+        byte = ordinal >> 3
+        return byte < len(self._bits) and bool(self._bits[byte] >> (ordinal & 7) & 1)
+
+    def __and__(self, other: "Bitmap") -> "Bitmap":
+        size = min(len(self._bits), len(other._bits))
+        return Bitmap._from_int(self._as_int() & other._as_int(), size)
+
+    def __or__(self, other: "Bitmap") -> "Bitmap":
+        size = max(len(self._bits), len(other._bits))
+        return Bitmap._from_int(self._as_int() | other._as_int(), size)
+
+    def __sub__(self, other: "Bitmap") -> "Bitmap":
+        return Bitmap._from_int(self._as_int() & ~other._as_int(), len(self._bits))
+
+    def __len__(self) -> int:
+        return self._as_int().bit_count()
+
+    def __bool__(self) -> bool:
+        return any(self._bits)
+
+    def __iter__(self) -> Iterator[int]:
+        """Set ordinals in ascending order."""
+        for byte_index, byte in enumerate(self._bits):
+            while byte:
+                low = byte & -byte
+                yield (byte_index << 3) + low.bit_length() - 1
+                byte ^= low
+
+    def to_bytes(self, n_bits: int) -> bytes:
+        """Packed little-endian bits, padded or truncated to cover n_bits."""
+        n_bytes = (n_bits + 7) >> 3
+        return bytes(self._bits[:n_bytes]).ljust(n_bytes, b'\0')
+
+
+class FacetIndex:
+    """
+    (field, value) -> Bitmap index for metadata filtering and facet counts.
+
+    A ``live`` bitmap tracks which ordinals hold current documents, so a
+    resolved filter also excludes removed documents. A list-valued field
+    sets the document's bit under each of its values.
+
+    Ordinal fields (RANGE_FIELDS) also keep one bitmap per level number;
+    a field has only a handful of levels, so a Range is the OR of the
+    bitmaps of the levels within its bounds, and adding or removing a
+    document sets or clears one bit.
+    """
+
+    def __init__(self, fields: Iterable[str] = FACET_FIELDS, range_fields: Iterable[str] = RANGE_FIELDS):
+        self.fields = tuple(fields)
+        self.range_fields = tuple(range_fields)
+        self.live = Bitmap()
+        self._bitmaps: Dict[str, Dict[str, Bitmap]] = {f: {} for f in self.fields}
+        self._levels: Dict[str, Dict[float, Bitmap]] = {f: {} for f in self.range_fields}
+
+    def nbytes(self) -> int:
+        """Approximate bytes held by the bitmaps."""
+        bitmaps = [self.live] + [
+            bitmap
+            for index in (self._bitmaps, self._levels)
+            for values in index.values()
+            for bitmap in values.values()
+        ]
+        return sum(sys.getsizeof(bitmap._bits) for bitmap in bitmaps)
+
+    def _level_bitmap(self, field: str, value: Any, create: bool = False) -> Optional[Bitmap]:
+        """Bitmap of a value's level, or None if the value is not a level (exact filters only)."""
+        try:
+            number = level_number(value)
+        except ValueError:
+            return None
+        levels = self._levels[field]
+        bitmap = levels.get(number)
+        if bitmap is None and create:
+            bitmap = levels[number] = Bitmap()
+        return bitmap
+
+    def add(self, ordinal: int, metadata: Dict[str, Any]) -> None:
+        """Index a document's facet values under its ordinal."""
+        self.live.add(ordinal)
+        for field in self.fields:
+            if field in metadata:
+                values = self._bitmaps[field]
+                for key in facet_values(metadata[field]):
+                    bitmap = values.get(key)
+                    if bitmap is None:
+                        bitmap = values[key] = Bitmap()
+                    bitmap.add(ordinal)
+        for field in self.range_fields:
+            if field in metadata:
+                bitmap = self._level_bitmap(field, metadata[field], create=True)
+                if bitmap is not None:
+                    bitmap.add(ordinal)
+
+    def remove(self, ordinal: int, metadata: Dict[str, Any]) -> None:
+        """Drop a document's ordinal from the live set and its facet bitmaps."""
+        self.live.discard(ordinal)
+        for field in self.fields:
+            if field in metadata:
+                for key in facet_values(metadata[field]):
+                    bitmap = self._bitmaps[field].get(key)
+                    if bitmap is not None:
+                        bitmap.discard(ordinal)
+        for field in self.range_fields:
+            if field in metadata:
+                bitmap = self._level_bitmap(field, metadata[field])
+                if bitmap is not None:
+                    bitmap.discard(ordinal)
+
+    def _range(self, field: str, bounds: Range) -> Bitmap:
+        """Ordinals whose level lies within the bounds: the OR of those levels' bitmaps."""
+        if field not in self._levels:
+            raise ValueError(
+                f"Field '{field}' does not support range filters. Choose from: {', '.join(self.range_fields)}"
+            )
+        low, high = bounds.bounds()
+        result = Bitmap()
+        for number, bitmap in self._levels[field].items():
+            if low <= number <= high:
+                result = result | bitmap
+        return result
+
+    def _union(self, field: str, values: FilterValue) -> Bitmap:
+        """OR of the bitmaps for the given values of one field."""
+        if isinstance(values, Range):
+            return self._range(field, values)
+        if field not in self._bitmaps:
+            raise ValueError(f"Unknown filter field '{field}'. Choose from: {', '.join(self.fields)}")
+        if not isinstance(values, (list, tuple, set)):
+            values = [values]
+        result = Bitmap()
+        for value in values:
+            bitmap = self._bitmaps[field].get(facet_value(value))
+            if bitmap is not None:
+                result = result | bitmap
+        return result
+
+    def resolve(
+        self,
+        include: Optional[Dict[str, FilterValue]] = None,
+        exclude: Optional[Dict[str, FilterValue]] = None
+    ) -> Bitmap:
+        """
+        Resolve filters to the bitmap of matching live ordinals.
+
+        Values within a field are OR-ed, fields are AND-ed, and every
+        excluded value is removed. A Range value on an ordinal field
+        selects the documents whose level lies within it.
+
+        Args:
+            include: field -> value, list of values or Range that must match
+            exclude: field -> value, list of values or Range that must not match
+
+        Returns:
+            Bitmap of allowed ordinals
+
+        Raises:
+            ValueError: If a filter names an unknown field, puts a Range
+                on a field that is not ordinal, or has a bound that is not
+                a level
+        """
+        result = self.live
+        for field, values in (include or {}).items():
+            if _unset(values):
+                continue
+            result = result & self._union(field, values)
+            if not result:
+                return result
+        for field, values in (exclude or {}).items():
+            if _unset(values):
+                continue
+            result = result - self._union(field, values)
+        return result
+
+    def counts(self, allowed: Bitmap, fields: Optional[Iterable[str]] = None) -> Dict[str, Dict[str, int]]:
+        """
+        Number of allowed ordinals under each value of each field.
+
+        Every count is one bitmap AND and popcount; no document is read.
+
+        Args:
+            allowed: Ordinals to count (e.g. from resolve())
+            fields: Fields to count (default: all)
+
+        Returns:
+            field -> value -> count, most frequent value first (values
+            with no allowed ordinal are left out)
+
+        Raises:
+            ValueError: If a field is unknown
+        """
+        counts: Dict[str, Dict[str, int]] = {}
+        for field in fields or self.fields:
+            if field not in self._bitmaps:
+                raise ValueError(f"Unknown facet field '{field}'. Choose from: {', '.join(self.fields)}")
+            values = []
+            if allowed:
+                for value, bitmap in self._bitmaps[field].items():
+                    count = len(bitmap & allowed)
+                    if count:
+                        values.append((value, count))
+            values.sort(key=lambda item: (-item[1], item[0]))
+            counts[field] = dict(values)
+        return counts
+
+    def clear(self) -> None:
+        """Drop all bitmaps."""
+        self.__init__(self.fields, self.range_fields)
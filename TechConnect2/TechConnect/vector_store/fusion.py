@@ -0,0 +1,48 @@
+"""
+Rank fusion and stage timing for the TechConnect vector store.
+Reciprocal rank fusion merges rankings whose scores are not comparable
+(e.g. BM25 and cosine similarity) using only each item's rank.
+"""
+
+import time
+from contextlib import contextmanager
+from typing import Dict, Hashable, Iterable, Iterator, Optional, Sequence
+
+# Rank offset from the original RRF paper; damps the weight of the very top ranks
+RRF_K = 60
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Iterable[Hashable]], k: int = RRF_K) -> Dict[Hashable, float]:
+    """
+    Fuse rankings by summing 1 / (k + rank) for every ranking an item appears in.
+
+    Args:
+        rankings: Item keys per ranking, best first
+        k: Rank offset
+
+    Returns:
+        item -> fused score, in first-seen order (so ties favour earlier rankings)
+    """
+    fused: Dict[Hashable, float] = {}
+    for ranking in rankings:
+        for rank, item in enumerate(ranking, 1):
+            fused[item] = fused.get(item, 0.0) + 1.0 / (k + rank)
+    return fused
+
+
+def fused_distance(score: float, n_rankings: int, k: int = RRF_K) -> float:
+    """Map a fused score to [0, 1], where 0 means ranked first everywhere."""
+    return 1.0 - score * (k + 1) / n_rankings
+
+
+@contextmanager
+def timed(timings: Optional[Dict[str, float]], stage: str) -> Iterator[None]:
+    """Add the wall time of the block (ms) to timings[stage]; a no-op when timings is None."""
+    if timings is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[stage] = timings.get(stage, 0.0) + (time.perf_counter() - start) * 1000
@@ -0,0 +1,370 @@
+"""
+Inverted index for the TechConnect vector store.
+Maps each token to a posting list of integer document ordinals so a query
+only touches documents that share at least one term with it.
+"""
+
+import json
+import mmap
+import sys
+from array import array
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+# Buffers are either growable arrays or read-only views over a mapped snapshot
+Buffer = Union[array, memoryview]
+
+# Term frequencies are stored as uint16; BM25 saturates long before this
+TF_MAX = 0xFFFF
+
+
+def _thaw(buffer: Buffer, typecode: str) -> array:
+    """Return a writable array copy of a snapshot view (arrays pass through)."""
+    if isinstance(buffer, array):
+        return buffer
+    thawed = array(typecode)
+    thawed.frombytes(buffer.tobytes())
+    return thawed
+
+
+def _write_buffer(path: Path, buffer: Buffer) -> None:
+    """Write a buffer's raw bytes to disk."""
+    with open(path, 'wb') as f:
+        f.write(memoryview(buffer).cast('B'))
+
+
+def buffer_bytes(buffer: Buffer) -> int:
+    """Bytes a buffer occupies: allocation for arrays, mapped length for snapshot views."""
+    return buffer.nbytes if isinstance(buffer, memoryview) else sys.getsizeof(buffer)
+
+
+def _map_buffer(path: Path, typecode: str) -> Buffer:
+    """Memory-map a raw buffer file read-only as a typed view."""
+    with open(path, 'rb') as f:
+        if f.seek(0, 2) == 0:
+            return array(typecode)
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    return memoryview(mapped).cast(typecode)
+
+
+class PostingLists:
+    """
+    List-like mapping of term id -> posting buffer.
+
+    Loaded snapshots keep every posting list as a slice of one mapped CSR
+    buffer; a list is copied into a growable array only the first time it
+    is appended to. Lists for new terms hold a bare int while they have a
+    single entry (most terms in a real vocabulary occur once) and become
+    arrays on the second append.
+    """
+
+    def __init__(self, typecode: str, values: Optional[Buffer] = None, offsets: Optional[Buffer] = None):
+        self.typecode = typecode
+        self._values = values
+        self._offsets = offsets
+        self._base = len(offsets) - 1 if offsets is not None else 0
+        self._thawed: Dict[int, array] = {}
+        self._tail: List[Union[None, int, array]] = []  # new terms: None, one entry, or an array
+
+    def __len__(self) -> int:
+        return self._base + len(self._tail)
+
+    def __getitem__(self, term_id: int) -> Buffer:
+        if term_id >= self._base:
+            entry = self._tail[term_id - self._base]
+            if isinstance(entry, array):
+                return entry
+            return array(self.typecode, () if entry is None else (entry,))
+        thawed = self._thawed.get(term_id)
+        if thawed is not None:
+            return thawed
+        return self._values[self._offsets[term_id]:self._offsets[term_id + 1]]
+
+    def add_term(self) -> None:
+        """Start an empty posting list for a new term."""
+        self._tail.append(None)
+
+    def append(self, term_id: int, value: int) -> None:
+        """Append one entry to a term's list, copying it out of the snapshot if needed."""
+        if term_id >= self._base:
+            i = term_id - self._base
+            entry = self._tail[i]
+            if entry is None:
+                self._tail[i] = value
+            elif isinstance(entry, array):
+                entry.append(value)
+            else:
+                self._tail[i] = array(self.typecode, (entry, value))
+            return
+        thawed = self._thawed.get(term_id)
+        if thawed is None:
+            thawed = self._thawed[term_id] = _thaw(self[term_id], self.typecode)
+        thawed.append(value)
+
+    def nbytes(self) -> Tuple[int, int]:
+        """(private, mapped) bytes held by the lists."""
+        private = sys.getsizeof(self._tail) + sum(sys.getsizeof(b) for b in self._thawed.values())
+        private += sum(sys.getsizeof(entry) for entry in self._tail if entry is not None)
+        mapped = 0
+        for buffer in (self._values, self._offsets):
+            if buffer is not None:
+                if isinstance(buffer, memoryview):
+                    mapped += buffer.nbytes
+                else:
+                    private += sys.getsizeof(buffer)
+        return private, mapped
+
+    def to_csr(self) -> tuple:
+        """Flatten into (offsets, values) arrays for a snapshot."""
+        offsets = array('Q', [0])
+        values = array(self.typecode)
+        for term_id in range(len(self)):
+            values.extend(self[term_id])
+            offsets.append(len(values))
+        return offsets, values
+
+
+class InvertedIndex:
+    """
+    Token -> posting list index over integer document ordinals.
+
+    Documents are assigned ordinals in insertion order. Posting lists are
+    compact ``array('i')`` buffers (with parallel uint16 term-frequency buffers)
+    that grow by appending, so building the index at ingest time is linear
+    in the number of tokens. A forward index keeps each document's term id
+    sequence in one shared buffer. Corpus statistics used by the scorers
+    (document frequency, document length, live count) are kept up to date
+    as documents are added and removed.
+    """
+
+    # Snapshot file name -> (attribute, typecode) for flat per-term/per-doc buffers
+    _BUFFERS = {
+        "doc_freq.bin": ("doc_freq", 'I'),
+        "doc_lengths.bin": ("doc_lengths", 'I'),
+        "doc_unique_terms.bin": ("doc_unique_terms", 'I'),
+        "doc_term_offsets.bin": ("doc_term_offsets", 'Q'),
+        "doc_terms.bin": ("doc_terms", 'I'),
+    }
+
+    def __init__(self):
+        self.vocab: Dict[str, int] = {}                  # token -> term id
+        self.postings = PostingLists('i')                # term id -> doc ordinals
+        self.term_freqs = PostingLists('H')              # term id -> tf per posting (saturates at TF_MAX)
+        self.doc_freq: Buffer = array('I')               # term id -> live document frequency
+        self.doc_ids: List[Optional[str]] = []           # ordinal -> doc id (None if removed)
+        self.doc_lengths: Buffer = array('I')            # ordinal -> token count
+        self.doc_unique_terms: Buffer = array('I')       # ordinal -> distinct term count
+        self.doc_term_offsets: Buffer = array('Q', [0])  # ordinal -> start in doc_terms
+        self.doc_terms: Buffer = array('I')              # term ids of every document, in order
+        self.live_count = 0
+        self.total_length = 0
+
+    def __len__(self) -> int:
+        return len(self.doc_ids)
+
+    @property
+    def avg_doc_length(self) -> float:
+        """Average token count over live documents."""
+        return self.total_length / self.live_count if self.live_count else 0.0
+
+    def _ensure_writable(self) -> None:
+        """Copy any snapshot-mapped flat buffers into growable arrays."""
+        for attr, typecode in self._BUFFERS.values():
+            setattr(self, attr, _thaw(getattr(self, attr), typecode))
+
+    def document_terms(self, ordinal: int) -> Buffer:
+        """Term id sequence of a document (view into the shared buffer)."""
+        return self.doc_terms[self.doc_term_offsets[ordinal]:self.doc_term_offsets[ordinal + 1]]
+
+    def add_document(self, doc_id: str, tokens: Iterable[str]) -> int:
+        """
+        Append a document to the index.
+
+        Args:
+            doc_id: External document ID
+            tokens: Analyzed tokens of the document
+
+        Returns:
+            The ordinal assigned to the document
+        """
+        self._ensure_writable()
+        term_ids = array('I')
+        for term in tokens:
+            term_id = self.vocab.get(term)
+            if term_id is None:
+                term_id = self._add_term(term)
+            term_ids.append(term_id)
+        return self._append(doc_id, term_ids)
+
+    def _add_term(self, term: str) -> int:
+        """Register a new term with empty postings; returns its term id."""
+        term_id = len(self.postings)
+        self.vocab[term] = term_id
+        self.postings.add_term()
+        self.term_freqs.add_term()
+        self.doc_freq.append(0)
+        return term_id
+
+    def _append(self, doc_id: str, term_ids: array) -> int:
+        """Append a document given its term id sequence; returns its ordinal."""
+        ordinal = len(self.doc_ids)
+        tf = Counter(term_ids)
+        for term_id, freq in tf.items():
+            self.postings.append(term_id, ordinal)
+            self.term_freqs.append(term_id, min(freq, TF_MAX))
+            self.doc_freq[term_id] += 1
+
+        self.doc_ids.append(doc_id)
+        self.doc_lengths.append(len(term_ids))
+        self.doc_unique_terms.append(len(tf))
+        self.doc_terms.extend(term_ids)
+        self.doc_term_offsets.append(len(self.doc_terms))
+        self.live_count += 1
+        self.total_length += len(term_ids)
+        return ordinal
+
+    def remove_document(self, ordinal: int) -> None:
+        """
+        Mark a document ordinal as removed; its postings are skipped on lookup.
+
+        Args:
+            ordinal: Ordinal returned by add_document
+        """
+        if self.doc_ids[ordinal] is None:
+            return
+        # Only the document frequencies change, so the forward index stays mapped
+        self.doc_freq = _thaw(self.doc_freq, 'I')
+        for term_id in set(self.document_terms(ordinal)):
+            self.doc_freq[term_id] -= 1
+        self.doc_ids[ordinal] = None
+        self.live_count -= 1
+        self.total_length -= self.doc_lengths[ordinal]
+
+    def memory_usage(self) -> Dict[str, int]:
+        """
+        Approximate bytes held by the index.
+
+        Returns:
+            Dict with 'postings' and 'forward' (private buffers), 'vocabulary'
+            (term dict and strings) and 'mapped' (snapshot-backed views,
+            shared through the page cache)
+        """
+        usage = {"postings": 0, "forward": sys.getsizeof(self.doc_ids), "vocabulary": 0, "mapped": 0}
+        for lists in (self.postings, self.term_freqs):
+            private, mapped = lists.nbytes()
+            usage["postings"] += private
+            usage["mapped"] += mapped
+        for attr, _ in self._BUFFERS.values():
+            buffer = getattr(self, attr)
+            name = "postings" if attr == "doc_freq" else "forward"
+            usage["mapped" if isinstance(buffer, memoryview) else name] += buffer_bytes(buffer)
+        usage["vocabulary"] = sys.getsizeof(self.vocab) + sum(sys.getsizeof(term) for term in self.vocab)
+        return usage
+
+    def compacted(self) -> "InvertedIndex":
+        """
+        Rebuild the index without removed documents.
+
+        Live documents are renumbered in their current order and terms no
+        live document uses are dropped. Documents are re-added from the
+        forward index, so nothing is re-tokenized.
+
+        Returns:
+            A new, fully writable index
+        """
+        live = [(ordinal, doc_id) for ordinal, doc_id in enumerate(self.doc_ids) if doc_id is not None]
+        return InvertedIndex.merged([(self, live)])
+
+    @classmethod
+    def merged(cls, parts: Sequence[Tuple["InvertedIndex", Sequence[Tuple[int, str]]]]) -> "InvertedIndex":
+        """
+        Build one index from selected documents of several indexes.
+
+        Documents are appended in the order given, re-added from each
+        source's forward index, and only terms they use are kept.
+
+        Args:
+            parts: (source index, [(ordinal, doc id), ...]) pairs
+
+        Returns:
+            A new, fully writable index
+        """
+        index = cls()
+        for source, documents in parts:
+            terms: List[Optional[str]] = [None] * len(source.vocab)  # source term id -> term
+            for term, term_id in source.vocab.items():
+                terms[term_id] = term
+            remap: Dict[int, int] = {}  # source term id -> new term id
+            for ordinal, doc_id in documents:
+                term_ids = array('I')
+                for term_id in source.document_terms(ordinal):
+                    new_id = remap.get(term_id)
+                    if new_id is None:
+                        term = terms[term_id]
+                        new_id = index.vocab.get(term)
+                        if new_id is None:
+                            new_id = index._add_term(term)
+                        remap[term_id] = new_id
+                    term_ids.append(new_id)
+                index._append(doc_id, term_ids)
+        return index
+
+    def clear(self) -> None:
+        """Drop all terms and documents."""
+        self.__init__()
+
+    def save(self, directory: Path) -> None:
+        """
+        Write the index as flat binary buffers plus a JSON term/doc table.
+
+        Args:
+            directory: Existing directory to write into
+        """
+        directory = Path(directory)
+        for name, lists in (("postings", self.postings), ("term_freqs", self.term_freqs)):
+            offsets, values = lists.to_csr()
+            _write_buffer(directory / f"{name}.offsets.bin", offsets)
+            _write_buffer(directory / f"{name}.values.bin", values)
+        for filename, (attr, _) in self._BUFFERS.items():
+            _write_buffer(directory / filename, getattr(self, attr))
+
+        terms: Sequence[str] = sorted(self.vocab, key=self.vocab.get)
+        with open(directory / "index.json", 'w', encoding='utf-8') as f:
+            json.dump({
+                "terms": terms,
+                "doc_ids": self.doc_ids,
+                "live_count": self.live_count,
+                "total_length": self.total_length,
+            }, f)
+
+    @classmethod
+    def load(cls, directory: Path) -> "InvertedIndex":
+        """
+        Open a saved index with its buffers memory-mapped read-only.
+
+        Pages are shared through the OS page cache, so every process that
+        loads the same snapshot reuses one copy. Buffers are copied into
+        private arrays only when the index is modified.
+
+        Args:
+            directory: Directory written by save()
+        """
+        directory = Path(directory)
+        index = cls()
+        with open(directory / "index.json", 'r', encoding='utf-8') as f:
+            table = json.load(f)
+
+        index.vocab = {term: term_id for term_id, term in enumerate(table["terms"])}
+        index.doc_ids = table["doc_ids"]
+        index.live_count = table["live_count"]
+        index.total_length = table["total_length"]
+        for name, typecode in (("postings", 'i'), ("term_freqs", 'H')):
+            setattr(index, name, PostingLists(
+                typecode,
+                values=_map_buffer(directory / f"{name}.values.bin", typecode),
+                offsets=_map_buffer(directory / f"{name}.offsets.bin", 'Q'),
+            ))
+        for filename, (attr, typecode) in cls._BUFFERS.items():
+            setattr(index, attr, _map_buffer(directory / filename, typecode))
+        return index
@@ -0,0 +1,230 @@
+"""
+Passage index for the TechConnect vector store.
+Holds README and repo-file passages as child documents of the catalog
+accelerators, in a sub-store with the parent store's mode and scorer.
+"""
+
+import json
+import threading
+from itertools import islice
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List
+
+import numpy as np
+
+from ingestion.chunker import Passage
+from vector_store.filters import Bitmap
+from vector_store.fusion import fused_distance, reciprocal_rank_fusion
+from vector_store.phrases import parse_query, phrase_filter
+from vector_store.segment import Document
+
+# Parent metadata fields every passage inherits, so facet filters apply to passages too
+INHERITED_FIELDS = ("name", "solution_area", "technical_complexity", "responsible_ai_tag", "deployment_type", "repository_url")
+
+
+def passage_document(parent: Document, passage: Passage) -> Document:
+    """Child document for one passage, carrying the parent's facet metadata."""
+    metadata = {field: parent.metadata.get(field) for field in INHERITED_FIELDS}
+    metadata.update(
+        parent_id=parent.id,
+        path=passage.path,
+        heading=passage.heading,
+        start_line=passage.start_line
+    )
+    return Document(id=passage.id, text=passage.text, metadata=metadata)
+
+
+class PassageIndex:
+    """
+    Child passages of a store's documents.
+
+    Passages live in their own store (created on first use), so ranking
+    accelerators never scans them. ``children`` keeps each parent's passage
+    ids in insertion order, so a parent's passages can be scored without
+    touching anyone else's.
+    """
+
+    def __init__(self, factory: Callable[[], Any]):
+        """
+        Args:
+            factory: Builds the empty sub-store (a SimpleVectorStore)
+        """
+        self._factory = factory
+        self.store = None
+        self.children: Dict[str, List[str]] = {}  # parent id -> passage ids
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self.store) if self.store is not None else 0
+
+    def _ensure_store(self):
+        if self.store is None:
+            self.store = self._factory()
+        return self.store
+
+    def upsert(
+        self,
+        parent: Document,
+        passages: Iterable[Passage],
+        batch_size: int = 256,
+        replace: bool = True
+    ) -> int:
+        """
+        Index a stream of passages under a parent document.
+
+        Passages are consumed batch_size at a time, so memory is bounded by
+        the batch rather than by the repo.
+
+        Args:
+            parent: The parent document
+            passages: Passages to index (any iterable, e.g. a generator)
+            batch_size: Passages embedded and indexed per write
+            replace: Drop the parent's existing passages first
+
+        Returns:
+            Number of passages indexed
+        """
+        with self._lock:
+            store = self._ensure_store()
+            if replace:
+                self.remove([parent.id])
+            children = self.children.setdefault(parent.id, [])
+            count = 0
+            passages = iter(passages)
+            while True:
+                batch = [passage_document(parent, passage) for passage in islice(passages, batch_size)]
+                if not batch:
+                    break
+                store._upsert_documents(batch)
+                children.extend(doc.id for doc in batch)
+                count += len(batch)
+            if not children:
+                del self.children[parent.id]
+            return count
+
+    def refresh(self, parent: Document) -> None:
+        """Re-index a parent's passages if the metadata they inherit has changed."""
+        with self._lock:
+            ids = self.children.get(parent.id)
+            if not ids:
+                return
+            inherited = {field: parent.metadata.get(field) for field in INHERITED_FIELDS}
+            docs = [self.store.documents[doc_id] for doc_id in ids]
+            if all(docs[0].metadata.get(field) == value for field, value in inherited.items()):
+                return
+            self.store._upsert_documents([
+                Document(id=doc.id, text=doc.text, metadata={**doc.metadata, **inherited})
+                for doc in docs
+            ])
+
+    def remove(self, parent_ids: Iterable[str]) -> int:
+        """Drop every passage of the given parents; returns the number removed."""
+        with self._lock:
+            ids = [doc_id for parent_id in parent_ids for doc_id in self.children.pop(parent_id, ())]
+            return self.store.delete(ids) if ids else 0
+
+    def clear(self) -> None:
+        """Drop all passages."""
+        with self._lock:
+            if self.store is not None:
+                self.store.clear()
+            self.children.clear()
+
+    def search(self, query: str, n_results: int = 5, **kwargs) -> Dict[str, List]:
+        """Rank all passages (see SimpleVectorStore.search); metadata carries parent_id."""
+        if self.store is None:
+            return {"ids": [], "documents": [], "metadatas": [], "distances": []}
+        return self.store.search(query, n_results=n_results, **kwargs)
+
+    def best(self, query: str, parent_ids: Iterable[str]) -> Dict[str, Dict]:
+        """
+        Best-matching passage of each given parent.
+
+        Only those parents' passages are scored: from the forward index in
+        lexical mode, from their rows of the matrix in dense mode, and by
+        fusing both rankings in hybrid mode. Passages that miss a phrase
+        operator of the query are skipped.
+
+        Args:
+            query: Natural language query
+            parent_ids: Parents to find a section for
+
+        Returns:
+            parent id -> dict with 'id', 'document', 'metadata', 'distance';
+            parents with no passages (or, in lexical mode, no passage sharing
+            a query term) are left out
+        """
+        store = self.store
+        if store is None:
+            return {}
+        segment = store._segment
+        segment.prepare()
+        candidates = [
+            (parent_id, segment.ordinals[doc_id])
+            for parent_id in dict.fromkeys(parent_ids)
+            for doc_id in self.children.get(parent_id, ())
+            if doc_id in segment.ordinals
+        ]
+        query, phrases = parse_query(query, store.analyzer)
+        if phrases:
+            ordinals = phrase_filter(segment.index, phrases, Bitmap.of(ordinal for _, ordinal in candidates))
+            candidates = [(parent_id, ordinal) for parent_id, ordinal in candidates if ordinal in ordinals]
+        if not candidates:
+            return {}
+
+        ordinals = [ordinal for _, ordinal in candidates]
+        if store.mode != "lexical":
+            query_vector = store.embedder.embed([query])[0]
+            similarities = segment.vectors.rescore(query_vector, np.array(ordinals))
+            scores = dict(zip(ordinals, similarities.tolist()))
+            to_distance: Callable[[float], float] = lambda score: 1.0 - score
+        if store.mode != "dense":
+            lexical = segment.scorer.score_ordinals(segment.index, store.analyzer.analyze_query(query), ordinals)
+            if store.mode == "lexical":
+                scores, to_distance = lexical, segment.scorer.to_distance
+            else:
+                # Hybrid: fuse the two rankings of the candidate passages
+                scores = reciprocal_rank_fusion(
+                    [sorted(lexical, key=lexical.get, reverse=True), sorted(scores, key=scores.get, reverse=True)],
+                    store.rrf_k
+                )
+                to_distance = lambda score: fused_distance(score, 2, store.rrf_k)
+
+        best: Dict[str, Dict] = {}
+        top: Dict[str, float] = {}
+        for parent_id, ordinal in candidates:
+            score = scores.get(ordinal)
+            # First passage wins ties, so README sections beat later files
+            if score is None or score <= top.get(parent_id, float("-inf")):
+                continue
+            top[parent_id] = score
+            doc = segment.docs[ordinal]
+            best[parent_id] = {
+                "id": doc.id,
+                "document": doc.text,
+                "metadata": doc.metadata,
+                "distance": to_distance(score)
+            }
+        return best
+
+    def save(self, directory: Path) -> None:
+        """Write the passages (if any) into a subdirectory of a snapshot."""
+        with self._lock:
+            if not len(self):
+                return
+            directory = Path(directory)
+            directory.mkdir(parents=True, exist_ok=True)
+            self.store._write(directory)
+            with open(directory / "children.json", 'w', encoding='utf-8') as f:
+                json.dump(self.children, f)
+
+    def load(self, directory: Path) -> None:
+        """Replace the passages with those saved in a snapshot (clears them if none were)."""
+        with self._lock:
+            directory = Path(directory)
+            if not (directory / "children.json").exists():
+                self.clear()
+                return
+            self._ensure_store()._read(directory)
+            with open(directory / "children.json", 'r', encoding='utf-8') as f:
+                self.children = json.load(f)
@@ -0,0 +1,119 @@
+"""
+Phrase and proximity operators for the TechConnect vector store.
+A quoted part of a query ("unified data foundation") must occur as an exact
+phrase; with a slop suffix ("multi agent"~3) its terms must occur close together.
+"""
+
+import re
+from collections import Counter
+from typing import List, NamedTuple, Sequence, Tuple
+
+from vector_store.analyzer import Analyzer
+from vector_store.filters import Bitmap
+from vector_store.index import InvertedIndex
+
+# "words" or "words"~N
+PHRASE_PATTERN = re.compile(r'"([^"]*)"(?:~(\d+))?')
+
+
+class Phrase(NamedTuple):
+    """Analyzed terms of a quoted query part, and the extra positions they may spread over."""
+    terms: Tuple[str, ...]
+    slop: int = 0
+
+
+def parse_query(query: str, analyzer: Analyzer) -> Tuple[str, Tuple[Phrase, ...]]:
+    """
+    Split a query into its plain text and its phrase operators.
+
+    The plain text keeps the quoted words (they still rank documents) but
+    drops the quotes and slop suffixes. Phrases are analyzed like any
+    query, so stop words and short tokens are skipped positions, not gaps.
+
+    Returns:
+        (text without operators, phrases in query order)
+    """
+    if '"' not in query:
+        return query, ()
+    phrases: List[Phrase] = []
+
+    def strip(match: "re.Match[str]") -> str:
+        terms = analyzer.analyze_query(match.group(1))
+        if terms:
+            phrases.append(Phrase(terms, int(match.group(2) or 0)))
+        return f" {match.group(1)} "
+
+    return PHRASE_PATTERN.sub(strip, query), tuple(phrases)
+
+
+def phrase_matches(doc_terms: Sequence[int], term_ids: Sequence[int], slop: int = 0) -> bool:
+    """
+    Whether a document's term id sequence contains a phrase.
+
+    With slop 0 the terms must be consecutive and in order; with slop N
+    they must all fall within a window of len(term_ids) + N positions,
+    in any order.
+    """
+    terms = list(doc_terms)
+    n = len(term_ids)
+    if slop == 0:
+        first = term_ids[0]
+        start = 0
+        while True:
+            try:
+                i = terms.index(first, start)
+            except ValueError:
+                return False
+            if terms[i:i + n] == list(term_ids):
+                return True
+            start = i + 1
+
+    # Shortest window holding every term (with repeats) over the positions of phrase terms
+    needed = Counter(term_ids)
+    events = [(position, term) for position, term in enumerate(terms) if term in needed]
+    have: Counter = Counter()
+    satisfied = 0
+    left = 0
+    for position, term in events:
+        have[term] += 1
+        if have[term] == needed[term]:
+            satisfied += 1
+        while satisfied == len(needed):
+            first_position, first_term = events[left]
+            if position - first_position < n + slop:
+                return True
+            have[first_term] -= 1
+            if have[first_term] < needed[first_term]:
+                satisfied -= 1
+            left += 1
+    return False
+
+
+def phrase_filter(index: InvertedIndex, phrases: Sequence[Phrase], allowed: Bitmap) -> Bitmap:
+    """
+    Narrow a bitmap of allowed ordinals to documents containing every phrase.
+
+    A cheap first pass intersects the phrase terms' posting lists (rarest
+    first); only documents holding all the terms, and allowed by the
+    filters, have their positions checked against the forward index.
+    """
+    for phrase in phrases:
+        term_ids = [index.vocab.get(term) for term in phrase.terms]
+        if None in term_ids:
+            return Bitmap()
+        rarest_first = sorted(set(term_ids), key=lambda term_id: index.doc_freq[term_id])
+        candidates = set(index.postings[rarest_first[0]])
+        for term_id in rarest_first[1:]:
+            if not candidates:
+                break
+            candidates.intersection_update(index.postings[term_id])
+
+        allowed = Bitmap.of(
+            ordinal for ordinal in sorted(candidates)
+            if ordinal in allowed and (
+                len(term_ids) == 1 or phrase_matches(index.document_terms(ordinal), term_ids, phrase.slop)
+            )
+        )
+        if not allowed:
+            break
+    return allowed
@@ -0,0 +1,238 @@
+"""
+Second-stage re-rankers for the TechConnect vector store.
+A cheap first stage (lexical or ANN) returns a shortlist of rerank_depth
+candidates; re-rankers re-order only that shortlist, so their cost grows
+with the shortlist, never with the corpus.
+"""
+
+import math
+from collections import Counter
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+from vector_store.analyzer import Analyzer
+from vector_store.fusion import timed
+
+
+class BM25FReranker:
+    """
+    Field-weighted BM25 over the shortlist.
+
+    Term frequencies are length-normalized per field, weighted and summed
+    before saturation, so a match in the name counts more than one in the
+    body. IDF and average field lengths come from the shortlist itself;
+    the candidates' text is analyzed, never the corpus. The first-stage
+    distance is replaced by 1 / (1 + score).
+    """
+
+    name = "bm25f"
+
+    # Document fields and their weights; "text" is the indexed body (name, description, products)
+    FIELD_WEIGHTS = {"name": 3.0, "products": 2.0, "text": 1.0}
+
+    def __init__(self, weights: Optional[Dict[str, float]] = None, k1: float = 1.2, b: float = 0.75):
+        """
+        Args:
+            weights: Field -> weight (defaults to FIELD_WEIGHTS)
+            k1: Term frequency saturation
+            b: Length normalization strength
+        """
+        self.weights = dict(weights or self.FIELD_WEIGHTS)
+        self.k1 = k1
+        self.b = b
+
+    def _fields(self, text: str, metadata: Dict[str, Any], analyzer: Analyzer) -> Dict[str, List[str]]:
+        fields = {}
+        for field in self.weights:
+            value = text if field == "text" else metadata.get(field, "")
+            if isinstance(value, (list, tuple)):
+                value = " ".join(value)
+            fields[field] = analyzer.analyze(str(value))
+        return fields
+
+    def rerank(
+        self,
+        tokens: Sequence[str],
+        texts: Sequence[str],
+        metadatas: Sequence[Dict[str, Any]],
+        distances: Sequence[float],
+        analyzer: Analyzer
+    ) -> List[float]:
+        """New distances for the shortlist (see the class docstring)."""
+        terms = set(tokens)
+        if not terms or not texts:
+            return list(distances)
+        docs = [self._fields(text, metadata, analyzer) for text, metadata in zip(texts, metadatas)]
+        n = len(docs)
+        avg_length = {
+            field: max(sum(len(doc[field]) for doc in docs) / n, 1.0)
+            for field in self.weights
+        }
+        counts = [{field: Counter(doc[field]) for field in self.weights} for doc in docs]
+        doc_freq = {term: sum(1 for doc in counts if any(term in c for c in doc.values())) for term in terms}
+        idf = {term: math.log(1.0 + (n - df + 0.5) / (df + 0.5)) for term, df in doc_freq.items()}
+
+        new_distances = []
+        for doc, doc_counts in zip(docs, counts):
+            score = 0.0
+            for term in terms:
+                tf = sum(
+                    weight * doc_counts[field][term] / (1.0 - self.b + self.b * len(doc[field]) / avg_length[field])
+                    for field, weight in self.weights.items()
+                    if doc_counts[field][term]
+                )
+                if tf:
+                    score += idf[term] * tf / (self.k1 + tf)
+            new_distances.append(1.0 / (1.0 + score))
+        return new_distances
+
+
+class ProductOverlapReranker:
+    """
+    Boost candidates whose products the query names.
+
+    A product matches when every term of its name is in the query (e.g.
+    "Azure OpenAI" for "chat app with azure openai"). Distances shrink by
+    weight * m / (1 + m) for m matching products, so the first match
+    counts most.
+    """
+
+    name = "products"
+
+    def __init__(self, weight: float = 0.5):
+        """
+        Args:
+            weight: Largest fraction of the distance a boost removes, in [0, 1)
+        """
+        self.weight = weight
+
+    def rerank(
+        self,
+        tokens: Sequence[str],
+        texts: Sequence[str],
+        metadatas: Sequence[Dict[str, Any]],
+        distances: Sequence[float],
+        analyzer: Analyzer
+    ) -> List[float]:
+        """New distances for the shortlist (see the class docstring)."""
+        terms = set(tokens)
+        new_distances = []
+        for metadata, distance in zip(metadatas, distances):
+            matched = 0
+            for product in metadata.get("products", ()):
+                product_terms = analyzer.analyze(product)
+                if product_terms and terms.issuperset(product_terms):
+                    matched += 1
+            new_distances.append(distance * (1.0 - self.weight * matched / (1.0 + matched)))
+        return new_distances
+
+
+class PriorReranker:
+    """
+    Static priors by solution area and responsible-AI tag.
+
+    A candidate's distance is scaled by 1 - prior, where prior is the sum
+    of its area's prior and, for RAI-tagged accelerators, rai_prior.
+    Positive priors promote, negative ones demote. With no priors
+    configured the ranking is unchanged.
+    """
+
+    name = "priors"
+
+    def __init__(self, area_priors: Optional[Dict[str, float]] = None, rai_prior: float = 0.0):
+        """
+        Args:
+            area_priors: Solution area -> prior, e.g. {"AI": 0.1}
+            rai_prior: Prior added for accelerators with responsible_ai_tag
+        """
+        self.area_priors = dict(area_priors or {})
+        self.rai_prior = rai_prior
+
+    def rerank(
+        self,
+        tokens: Sequence[str],
+        texts: Sequence[str],
+        metadatas: Sequence[Dict[str, Any]],
+        distances: Sequence[float],
+        analyzer: Analyzer
+    ) -> List[float]:
+        """New distances for the shortlist (see the class docstring)."""
+        new_distances = []
+        for metadata, distance in zip(metadatas, distances):
+            prior = self.area_priors.get(metadata.get("solution_area"), 0.0)
+            if str(metadata.get("responsible_ai_tag")) == "True":
+                prior += self.rai_prior
+            # Keep distances positive however large the configured prior
+            new_distances.append(distance * max(1.0 - prior, 1e-6))
+        return new_distances
+
+
+Reranker = Union[BM25FReranker, ProductOverlapReranker, PriorReranker]
+
+RERANKERS = {
+    BM25FReranker.name: BM25FReranker,
+    ProductOverlapReranker.name: ProductOverlapReranker,
+    PriorReranker.name: PriorReranker,
+}
+
+
+def get_rerankers(rerank: Optional[Union[str, Reranker, Sequence[Union[str, Reranker]]]]) -> Tuple[Reranker, ...]:
+    """
+    Resolve re-rankers: None, a name, an instance, a comma-separated list
+    of names ("bm25f,products") or a sequence of names and instances.
+
+    Raises:
+        ValueError: If a re-ranker name is unknown
+    """
+    if not rerank:
+        return ()
+    if isinstance(rerank, str):
+        rerank = [name.strip() for name in rerank.split(",") if name.strip()]
+    elif not isinstance(rerank, (list, tuple)):
+        rerank = [rerank]
+    rerankers = []
+    for reranker in rerank:
+        if isinstance(reranker, str):
+            if reranker.lower() not in RERANKERS:
+                raise ValueError(f"Unknown reranker '{reranker}'. Choose from: {', '.join(RERANKERS)}")
+            reranker = RERANKERS[reranker.lower()]()
+        rerankers.append(reranker)
+    return tuple(rerankers)
+
+
+def rerank_results(
+    rerankers: Sequence[Reranker],
+    tokens: Sequence[str],
+    result: Dict[str, List],
+    n_results: int,
+    analyzer: Analyzer,
+    timings: Optional[Dict[str, float]] = None
+) -> Dict[str, List]:
+    """
+    Re-order a shortlist result dict and cut it to n_results.
+
+    Re-rankers run in order, each mapping the current distances to new
+    ones; ties keep the first-stage order. Each one's time is added to
+    timings as 'rerank_<name>'.
+
+    Args:
+        rerankers: Re-rankers to apply
+        tokens: Analyzed query terms
+        result: Dict with 'ids', 'documents', 'metadatas', 'distances'
+        n_results: Number of results to keep
+        analyzer: Analyzer for the candidates' fields
+        timings: Stage timings (ms) to add to, or None
+
+    Returns:
+        Dict with 'ids', 'documents', 'metadatas', 'distances'
+    """
+    distances = list(result["distances"])
+    for reranker in rerankers:
+        with timed(timings, f"rerank_{reranker.name}"):
+            distances = reranker.rerank(tokens, result["documents"], result["metadatas"], distances, analyzer)
+    order = sorted(range(len(distances)), key=distances.__getitem__)[:n_results]
+    return {
+        "ids": [result["ids"][i] for i in order],
+        "documents": [result["documents"][i] for i in order],
+        "metadatas": [result["metadatas"][i] for i in order],
+        "distances": [distances[i] for i in order],
+    }
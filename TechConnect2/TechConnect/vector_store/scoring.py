@@ -0,0 +1,269 @@
+"""
+Ranking functions for the TechConnect vector store.
+Each scorer walks only the posting lists of the query terms and
+accumulates scores sparsely per matching document ordinal. Batches of
+queries walk each shared posting list once, and a small set of known
+documents can be scored directly from the forward index.
+"""
+
+from array import array
+from collections import Counter
+from typing import Dict, Iterable, List, Sequence, Union
+
+import numpy as np
+
+from vector_store.filters import Bitmap
+from vector_store.index import InvertedIndex
+
+
+class JaccardScorer:
+    """Token-set overlap: |query ∩ doc| / |query ∪ doc|."""
+
+    name = "jaccard"
+
+    def prepare(self, index: InvertedIndex) -> None:
+        """Jaccard needs no corpus statistics beyond the index itself."""
+
+    def score(self, index: InvertedIndex, terms: Iterable[str], allowed: Bitmap) -> Dict[int, float]:
+        """
+        Score every allowed document that shares at least one query term.
+
+        Args:
+            index: Inverted index to search
+            terms: Distinct query terms
+            allowed: Ordinals that passed the filters (live documents only)
+
+        Returns:
+            Dict of document ordinal -> similarity in [0, 1]
+        """
+        terms = set(terms)
+        overlap: Dict[int, int] = {}
+        for term in terms:
+            term_id = index.vocab.get(term)
+            if term_id is None:
+                continue
+            for ordinal in index.postings[term_id]:
+                if ordinal in allowed:
+                    overlap[ordinal] = overlap.get(ordinal, 0) + 1
+
+        unique = index.doc_unique_terms
+        n_terms = len(terms)
+        return {o: c / (n_terms + unique[o] - c) for o, c in overlap.items()}
+
+    def score_many(
+        self,
+        index: InvertedIndex,
+        term_sets: Sequence[Iterable[str]],
+        allowed: Sequence[Bitmap]
+    ) -> List[Dict[int, float]]:
+        """
+        Score a batch of queries, walking each distinct term's postings once.
+
+        Args:
+            index: Inverted index to search
+            term_sets: Query terms per query
+            allowed: Allowed ordinals per query
+
+        Returns:
+            One dict of document ordinal -> similarity per query
+        """
+        term_sets = [set(terms) for terms in term_sets]
+        overlaps: List[Dict[int, int]] = [{} for _ in term_sets]
+        for term, queries in _group_by_term(term_sets).items():
+            term_id = index.vocab.get(term)
+            if term_id is None:
+                continue
+            for ordinal in index.postings[term_id]:
+                for q in queries:
+                    if ordinal in allowed[q]:
+                        overlap = overlaps[q]
+                        overlap[ordinal] = overlap.get(ordinal, 0) + 1
+
+        unique = index.doc_unique_terms
+        return [
+            {o: c / (len(terms) + unique[o] - c) for o, c in overlap.items()}
+            for terms, overlap in zip(term_sets, overlaps)
+        ]
+
+    def score_ordinals(self, index: InvertedIndex, terms: Iterable[str], ordinals: Iterable[int]) -> Dict[int, float]:
+        """
+        Score the given documents from the forward index (no posting walks).
+
+        Cost is proportional to the length of those documents, so it suits
+        small candidate sets such as one accelerator's passages.
+
+        Returns:
+            Dict of ordinal -> similarity for documents sharing a query term
+        """
+        terms = set(terms)
+        term_ids = {index.vocab[t] for t in terms if t in index.vocab}
+        unique = index.doc_unique_terms
+        scores: Dict[int, float] = {}
+        for ordinal in ordinals:
+            c = len(term_ids.intersection(index.document_terms(ordinal)))
+            if c:
+                scores[ordinal] = c / (len(terms) + unique[ordinal] - c)
+        return scores
+
+    @staticmethod
+    def to_distance(score: float) -> float:
+        """Convert similarity to distance."""
+        return 1.0 - score
+
+
+class BM25Scorer:
+    """
+    Okapi BM25 with an IDF table and per-document length norms.
+
+    ``prepare()`` rebuilds the IDF table in a compact ``array('f')`` buffer
+    from the live document count after every write, one vectorized pass
+    over the vocabulary.
+    A document's length norm, k1 * (1 - b + b * dl / avgdl), is one
+    multiply-add on its stored length, so it is computed as postings are
+    walked and no per-document table needs rebuilding when avgdl moves.
+    Scores therefore never depend on the write history.
+    """
+
+    name = "bm25"
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.idf = array('f')  # term id -> inverse document frequency
+        # Length norm of a document: norm_base + norm_slope * its token count
+        self.norm_base = k1
+        self.norm_slope = 0.0
+
+    def prepare(self, index: InvertedIndex) -> None:
+        """Recompute the IDF table and the length norm coefficients from index statistics."""
+        # Vectorized: the table is rebuilt after every write, over the whole vocabulary
+        doc_freq = np.array(index.doc_freq, dtype=np.float64)
+        idf = np.log1p((index.live_count - doc_freq + 0.5) / (doc_freq + 0.5)).astype(np.float32)
+        self.idf = array('f')
+        self.idf.frombytes(idf.tobytes())
+        avgdl = index.avg_doc_length or 1.0
+        self.norm_base = self.k1 * (1.0 - self.b)
+        self.norm_slope = self.k1 * self.b / avgdl
+
+    def score(self, index: InvertedIndex, terms: Iterable[str], allowed: Bitmap) -> Dict[int, float]:
+        """
+        Score every allowed document that shares at least one query term.
+
+        Args:
+            index: Inverted index to search
+            terms: Distinct query terms
+            allowed: Ordinals that passed the filters (live documents only)
+
+        Returns:
+            Dict of document ordinal -> BM25 score
+        """
+        scores: Dict[int, float] = {}
+        lengths, base, slope = index.doc_lengths, self.norm_base, self.norm_slope
+        k1_plus_1 = self.k1 + 1.0
+        for term in set(terms):
+            term_id = index.vocab.get(term)
+            if term_id is None or term_id >= len(self.idf):
+                continue
+            idf = self.idf[term_id]
+            for ordinal, tf in zip(index.postings[term_id], index.term_freqs[term_id]):
+                if ordinal in allowed:
+                    norm = base + slope * lengths[ordinal]
+                    scores[ordinal] = scores.get(ordinal, 0.0) + idf * tf * k1_plus_1 / (tf + norm)
+        return scores
+
+    def score_many(
+        self,
+        index: InvertedIndex,
+        term_sets: Sequence[Iterable[str]],
+        allowed: Sequence[Bitmap]
+    ) -> List[Dict[int, float]]:
+        """
+        Score a batch of queries, walking each distinct term's postings once.
+
+        Each posting's BM25 contribution is computed once and added to every
+        query that contains the term and allows the document.
+
+        Args:
+            index: Inverted index to search
+            term_sets: Query terms per query
+            allowed: Allowed ordinals per query
+
+        Returns:
+            One dict of document ordinal -> BM25 score per query
+        """
+        results: List[Dict[int, float]] = [{} for _ in term_sets]
+        lengths, base, slope = index.doc_lengths, self.norm_base, self.norm_slope
+        k1_plus_1 = self.k1 + 1.0
+        for term, queries in _group_by_term(term_sets).items():
+            term_id = index.vocab.get(term)
+            if term_id is None or term_id >= len(self.idf):
+                continue
+            idf = self.idf[term_id]
+            for ordinal, tf in zip(index.postings[term_id], index.term_freqs[term_id]):
+                # Only allowed ordinals are scored: postings appended after the filters were resolved are skipped
+                contribution = None
+                for q in queries:
+                    if ordinal in allowed[q]:
+                        if contribution is None:
+                            contribution = idf * tf * k1_plus_1 / (tf + base + slope * lengths[ordinal])
+                        scores = results[q]
+                        scores[ordinal] = scores.get(ordinal, 0.0) + contribution
+        return results
+
+    def score_ordinals(self, index: InvertedIndex, terms: Iterable[str], ordinals: Iterable[int]) -> Dict[int, float]:
+        """
+        Score the given documents from the forward index (no posting walks).
+
+        Cost is proportional to the length of those documents, so it suits
+        small candidate sets such as one accelerator's passages.
+
+        Returns:
+            Dict of ordinal -> BM25 score for documents sharing a query term
+        """
+        term_ids = {index.vocab[t] for t in set(terms) if t in index.vocab and index.vocab[t] < len(self.idf)}
+        lengths, base, slope = index.doc_lengths, self.norm_base, self.norm_slope
+        k1_plus_1 = self.k1 + 1.0
+        scores: Dict[int, float] = {}
+        for ordinal in ordinals:
+            tf = Counter(t for t in index.document_terms(ordinal) if t in term_ids)
+            if tf:
+                norm = base + slope * lengths[ordinal]
+                scores[ordinal] = sum(self.idf[t] * f * k1_plus_1 / (f + norm) for t, f in tf.items())
+        return scores
+
+    @staticmethod
+    def to_distance(score: float) -> float:
+        """Map an unbounded BM25 score onto a (0, 1] distance."""
+        return 1.0 / (1.0 + score)
+
+
+def _group_by_term(term_sets: Sequence[Iterable[str]]) -> Dict[str, List[int]]:
+    """Distinct term -> indexes of the queries that contain it."""
+    groups: Dict[str, List[int]] = {}
+    for q, terms in enumerate(term_sets):
+        for term in set(terms):
+            groups.setdefault(term, []).append(q)
+    return groups
+
+
+Scorer = Union[JaccardScorer, BM25Scorer]
+
+SCORERS = {
+    JaccardScorer.name: JaccardScorer,
+    BM25Scorer.name: BM25Scorer,
+}
+
+
+def get_scorer(scorer: Union[str, Scorer]) -> Scorer:
+    """
+    Resolve a scorer name (or pass through a scorer instance).
+
+    Raises:
+        ValueError: If the scorer name is unknown
+    """
+    if not isinstance(scorer, str):
+        return scorer
+    try:
+        return SCORERS[scorer.lower()]()
+    except KeyError:
+        raise ValueError(f"Unknown scorer '{scorer}'. Choose from: {', '.join(SCORERS)}")
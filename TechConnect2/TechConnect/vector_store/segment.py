@@ -0,0 +1,304 @@
+"""
+Index segment for the TechConnect vector store.
+Bundles every ordinal-addressed structure (documents, inverted index, facet
+bitmaps, dense vectors and their ANN index, scorer tables) so the set can be
+rebuilt and swapped as one.
+"""
+
+import copy
+import sys
+import threading
+import zlib
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from vector_store.ann import IVFIndex
+from vector_store.dense import DenseMatrix, QuantizedMatrix
+from vector_store.filters import FacetIndex
+from vector_store.index import InvertedIndex
+from vector_store.scoring import Scorer
+
+
+# Metadata key tuples shared by every document with the same fields
+_KEY_TUPLES: Dict[Tuple[str, ...], Tuple[str, ...]] = {}
+
+# Metadata strings up to this length (facet values, flags) are interned
+_INTERN_MAX = 64
+
+# Texts at least this long are kept zlib-compressed (passages, long READMEs)
+_COMPRESS_MIN = 512
+
+
+def _compact(value: Any) -> Any:
+    if isinstance(value, list):
+        # List values (products, languages) become tuples of interned strings
+        return tuple(_compact(item) for item in value)
+    return sys.intern(value) if isinstance(value, str) and len(value) <= _INTERN_MAX else value
+
+
+class Document:
+    """
+    Internal document representation for vector search.
+
+    Slotted, and metadata is kept as a value tuple against a key tuple
+    shared by all documents with the same fields, with short strings
+    interned: a document costs three small objects instead of an instance
+    dict, a metadata dict and a copy of every repeated facet value.
+    ``metadata`` builds a fresh dict on access. Long texts are stored
+    zlib-compressed and decompressed on access, which only happens for
+    returned hits.
+    """
+
+    __slots__ = ("id", "_text", "_keys", "_values")
+
+    def __init__(self, id: str, text: str, metadata: Optional[Dict] = None):
+        metadata = metadata or {}
+        keys = tuple(metadata)
+        self.id = id
+        self._text = zlib.compress(text.encode('utf-8'), 1) if len(text) >= _COMPRESS_MIN else text
+        self._keys = _KEY_TUPLES.setdefault(keys, keys)
+        self._values = tuple(_compact(value) for value in metadata.values())
+
+    @property
+    def text(self) -> str:
+        text = self._text
+        return text if isinstance(text, str) else zlib.decompress(text).decode('utf-8')
+
+    @property
+    def metadata(self) -> Dict:
+        """Metadata as a new dict (mutating it does not change the document)."""
+        return dict(zip(self._keys, self._values))
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Document):
+            return NotImplemented
+        return (self.id, self.text, self.metadata) == (other.id, other.text, other.metadata)
+
+    def __repr__(self) -> str:
+        return f"Document(id={self.id!r}, text={self.text!r}, metadata={self.metadata!r})"
+
+
+class Segment:
+    """
+    Inverted index, facet index and optional vector matrix over one shared
+    ordinal space, plus the scorer prepared against that index.
+
+    ``docs`` maps each ordinal straight to its Document, so ranked ordinals
+    turn into results without any id lookups.
+
+    Removing a document only tombstones its ordinal; ``compacted()`` builds
+    a fresh segment holding the live documents alone.
+
+    Writers hold ``lock`` for a whole batch, and searches hold it while
+    they prepare the scorer and resolve filters, so a resolved bitmap never
+    names an ordinal that is only partly indexed.
+    """
+
+    def __init__(
+        self,
+        scorer: Scorer,
+        dim: Optional[int] = None,
+        ann: Optional[IVFIndex] = None,
+        quantized: bool = False
+    ):
+        """
+        Args:
+            scorer: Scorer owned by this segment (its tables describe this index)
+            dim: Vector width, or None for a lexical-only segment
+            ann: Untrained ANN index to maintain over the vectors (dense only)
+            quantized: Store vectors as int8 codes (QuantizedMatrix)
+        """
+        self.scorer = scorer
+        self.index = InvertedIndex()
+        self.facets = FacetIndex()
+        matrix_type = QuantizedMatrix if quantized else DenseMatrix
+        self.vectors: Optional[DenseMatrix] = matrix_type(dim) if dim else None
+        self.ann: Optional[IVFIndex] = ann if dim else None
+        self.docs: List[Optional[Document]] = []  # ordinal -> document (None if removed)
+        self.ordinals: Dict[str, int] = {}        # doc id -> ordinal
+        self.lock = threading.RLock()
+        self._stale = True
+
+    @property
+    def tombstones(self) -> int:
+        """Number of removed ordinals still occupying the index."""
+        return len(self.index) - self.index.live_count
+
+    def add(self, doc: Document, tokens: Iterable[str]) -> int:
+        """
+        Index a document under a new ordinal.
+
+        In dense mode the caller appends the matching vector rows with
+        append_vectors() once the batch is indexed.
+
+        Returns:
+            The ordinal assigned to the document
+        """
+        ordinal = self.index.add_document(doc.id, tokens)
+        self.docs.append(doc)
+        self.ordinals[doc.id] = ordinal
+        self.facets.add(ordinal, doc.metadata)
+        self._stale = True
+        return ordinal
+
+    def append_vectors(self, vectors: np.ndarray) -> None:
+        """Append vector rows for the most recently added documents."""
+        start = self.vectors.append(vectors)
+        if self.ann is not None:
+            self.ann.update(self.vectors, start)
+
+    def remove(self, doc_id: str) -> bool:
+        """
+        Tombstone a document's ordinal.
+
+        Returns:
+            True if the document was present
+        """
+        ordinal = self.ordinals.pop(doc_id, None)
+        if ordinal is None:
+            return False
+        self.index.remove_document(ordinal)
+        self.facets.remove(ordinal, self.docs[ordinal].metadata)
+        self.docs[ordinal] = None
+        if self.vectors is not None:
+            self.vectors.remove(ordinal)
+        self._stale = True
+        return True
+
+    def prepare(self) -> None:
+        """Refresh scorer statistics if documents changed since the last call."""
+        with self.lock:
+            if self._stale:
+                self.scorer.prepare(self.index)
+                self._stale = False
+
+    def compacted(self) -> "Segment":
+        """
+        Build a new segment with only the live documents, renumbered in order.
+
+        Returns:
+            A prepared segment with no tombstones
+        """
+        return Segment.merged([self])
+
+    @staticmethod
+    def merged(segments: List["Segment"]) -> "Segment":
+        """
+        Build one segment from the live documents of several, in order.
+
+        Terms, documents and vector rows are copied from each source's
+        forward index and matrix, so nothing is re-tokenized or re-embedded.
+        Sources must share a mode, scorer and vector type; the scorer and
+        ANN configuration of the first one are reused.
+
+        Returns:
+            A prepared segment with no tombstones
+        """
+        first = segments[0]
+        segment = Segment(copy.copy(first.scorer))
+        # Snapshot the live ordinals once, so a concurrent remove() cannot split docs from index
+        live = [[(o, doc) for o, doc in enumerate(source.docs) if doc is not None] for source in segments]
+        segment.index = InvertedIndex.merged([
+            (source.index, [(o, doc.id) for o, doc in documents])
+            for source, documents in zip(segments, live)
+        ])
+        for new_ordinal, (_, doc) in enumerate(doc for documents in live for doc in documents):
+            segment._register(new_ordinal, doc)
+        if first.vectors is not None:
+            segment.vectors = first.vectors.take([o for o, _ in live[0]])
+            for source, documents in zip(segments[1:], live[1:]):
+                segment.vectors.extend(source.vectors, [o for o, _ in documents])
+            if first.ann is not None:
+                # Ordinals changed, so the partitions are rebuilt
+                segment.ann = first.ann.empty()
+                segment.ann.update(segment.vectors, 0)
+        segment.prepare()
+        return segment
+
+    def _register(self, ordinal: int, doc: Document) -> None:
+        """Attach a document to an ordinal that is already in the index."""
+        self.docs.append(doc)
+        self.ordinals[doc.id] = ordinal
+        self.facets.add(ordinal, doc.metadata)
+
+    def live_documents(self) -> List[Document]:
+        """Live documents in ordinal order."""
+        return [doc for doc in self.docs if doc is not None]
+
+    def memory_usage(self) -> Dict[str, int]:
+        """
+        Approximate bytes held by the segment, by component.
+
+        Shared objects (interned metadata values, key tuples) are counted
+        once. 'mapped' covers snapshot-backed buffers, which live in the
+        OS page cache rather than the process heap.
+        """
+        usage = self.index.memory_usage()
+        seen = set()
+        documents = sys.getsizeof(self.docs) + sys.getsizeof(self.ordinals)
+        for doc in self.docs:
+            if doc is None:
+                continue
+            for obj in (doc, doc.id, doc._text, doc._keys, doc._values, *doc._values):
+                if id(obj) not in seen:
+                    seen.add(id(obj))
+                    documents += sys.getsizeof(obj)
+        usage["documents"] = documents
+        usage["facets"] = self.facets.nbytes()
+        if self.vectors is not None:
+            key = "mapped" if self.vectors.mapped else "vectors"
+            usage[key] = usage.get(key, 0) + self.vectors.nbytes
+        if self.ann is not None:
+            usage["ann"] = self.ann.nbytes
+        return usage
+
+    def save(self, directory: Path) -> None:
+        """Write the index buffers (and the vectors plus any ANN index in dense mode) into a snapshot directory."""
+        self.index.save(directory)
+        if self.vectors is not None:
+            self.vectors.save(directory)
+        if self.ann is not None:
+            self.ann.save(directory, len(self.vectors))
+
+    @classmethod
+    def load(
+        cls,
+        directory: Path,
+        scorer: Scorer,
+        documents: Dict[str, Document],
+        dense: bool = False,
+        ann: Optional[IVFIndex] = None,
+        quantized: bool = False
+    ) -> "Segment":
+        """
+        Open a segment from a snapshot directory with its buffers memory-mapped.
+
+        The documents are attached to their ordinals and the facet index is
+        rebuilt from their metadata, which is linear in the document count.
+
+        Args:
+            directory: Directory written by save()
+            scorer: Scorer to prepare against the loaded index
+            documents: doc id -> Document for every live document
+            dense: Whether to map the vectors as well
+            ann: Untrained ANN index to restore from the snapshot (or train)
+            quantized: Whether the vectors were saved as int8 codes
+        """
+        segment = cls(scorer)
+        segment.index = InvertedIndex.load(directory)
+        for ordinal, doc_id in enumerate(segment.index.doc_ids):
+            if doc_id is None:
+                segment.docs.append(None)
+            else:
+                segment._register(ordinal, documents[doc_id])
+        if dense:
+            alive = [doc_id is not None for doc_id in segment.index.doc_ids]
+            matrix_type = QuantizedMatrix if quantized else DenseMatrix
+            segment.vectors = matrix_type.load(directory, alive)
+            if ann is not None:
+                ann.load(directory, segment.vectors)
+                segment.ann = ann
+        segment.prepare()
+        return segment
@@ -0,0 +1,809 @@
+"""
+Segmented vector store for the TechConnect Contextual Broker.
+Upserts go to a small in-memory segment that is flushed to immutable,
+memory-mapped on-disk segments; a background merger combines small
+segments and drops deleted documents, and queries merge every segment.
+"""
+
+import copy
+import heapq
+import json
+import logging
+import math
+import os
+import shutil
+import tempfile
+import threading
+import time
+import weakref
+from operator import itemgetter
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+from ingestion.chunker import Passage
+from models.schemas import CatalogItem
+from vector_store.filters import FilterValue, sum_facet_counts, with_range
+from vector_store.fusion import timed
+from vector_store.passages import PassageIndex
+from vector_store.phrases import parse_query
+from vector_store.rerank import get_rerankers, rerank_results
+from vector_store.scoring import Scorer, get_scorer
+from vector_store.segment import Document, Segment
+from vector_store.snapshot import SNAPSHOT_VERSION
+from vector_store.store import SimpleVectorStore
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILE = "segments.json"
+
+
+def _merge(results: List[Dict[str, List]], n_results: int) -> Dict[str, List]:
+    """
+    Merge per-segment result dicts (each sorted by distance) into the top n_results.
+
+    An id can briefly be live in two segments while an upsert moves it to
+    the memtable; only its best hit is kept.
+    """
+    hits = heapq.merge(
+        *(zip(r["distances"], r["ids"], r["documents"], r["metadatas"]) for r in results),
+        key=lambda hit: hit[0]
+    )
+    merged = {"ids": [], "documents": [], "metadatas": [], "distances": []}
+    seen = set()
+    for distance, doc_id, document, metadata in hits:
+        if len(merged["ids"]) == n_results:
+            break
+        if doc_id in seen:
+            continue
+        seen.add(doc_id)
+        merged["ids"].append(doc_id)
+        merged["documents"].append(document)
+        merged["metadatas"].append(metadata)
+        merged["distances"].append(distance)
+    return merged
+
+
+def _merge_hits(rankings: List[List[Tuple[Document, float]]], depth: int) -> List[Tuple[Document, float]]:
+    """Merge per-segment (document, distance) rankings into the best depth, one hit per id."""
+    merged = []
+    seen = set()
+    for doc, distance in heapq.merge(*rankings, key=itemgetter(1)):
+        if len(merged) == depth:
+            break
+        if doc.id not in seen:
+            seen.add(doc.id)
+            merged.append((doc, distance))
+    return merged
+
+
+class _SegmentRef:
+    """An immutable segment: its store, its directory once written to disk, and the ids written there."""
+
+    __slots__ = ("store", "directory", "written")
+
+    def __init__(self, store: SimpleVectorStore, directory: Optional[Path] = None):
+        self.store = store
+        self.directory = directory
+        self.written: List[str] = list(store.documents) if directory is not None else []
+
+    def deleted(self) -> List[str]:
+        """Ids written to the segment's directory that have been deleted since."""
+        return [doc_id for doc_id in self.written if doc_id not in self.store.documents]
+
+
+class SegmentedVectorStore:
+    """
+    Drop-in replacement for SimpleVectorStore built from immutable segments.
+
+    Upserts go to the memtable, a small in-memory SimpleVectorStore. Once
+    it holds ``flush_threshold`` documents it is frozen and a background
+    merger writes it to an on-disk segment, opened again with its buffers
+    memory-mapped. The merger also combines ``merge_factor`` segments of
+    the same size tier into one, and rewrites a segment whose deletions
+    pass ``compact_threshold``; merged segments keep only live documents.
+
+    Segments are never modified in place except to mark a document
+    deleted (the live bitmaps, not the mapped buffers). ``_owner`` maps
+    every live id to the one segment holding its current version; an
+    upsert soft-deletes the older copy.
+
+    Searches take no lock: they read the tuple of segments once and merge
+    the per-segment top-k lists by distance. Like ShardedVectorStore, BM25
+    statistics are segment-local; merging keeps the segment count (and the
+    drift) small. Jaccard and dense distances do not depend on the segment.
+
+    The memtable lives only in memory: save() flushes it and records the
+    segment list with each segment's deleted ids, and load() maps the
+    saved segments back and re-applies the deletions.
+    """
+
+    # A segment is rewritten once deletions reach this count and compact_threshold
+    COMPACT_MIN_TOMBSTONES = 64
+
+    def __init__(
+        self,
+        persist_dir: Optional[Path] = None,
+        flush_threshold: int = 1024,
+        merge_factor: int = 4,
+        scorer: Union[str, Scorer] = "jaccard",
+        mode: str = "lexical",
+        compact_threshold: float = 0.25,
+        **store_kwargs
+    ):
+        """
+        Args:
+            persist_dir: Directory for on-disk segments (under segmented/);
+                without one, segments go to a temporary directory removed
+                with the store
+            flush_threshold: Memtable size (documents) that triggers a flush
+            merge_factor: Segments of one size tier merged together
+            scorer: Ranking function name (each segment scores with its own copy)
+            mode: "lexical", "dense" or "hybrid"
+            compact_threshold: Fraction of deleted documents that gets a
+                segment rewritten
+            **store_kwargs: Further SimpleVectorStore options (embedder,
+                cache_size, ann, quantize, analyzer, rerank, ...); re-rankers
+                run once over the shortlist merged from all segments
+
+        Raises:
+            ValueError: If flush_threshold < 1, merge_factor < 2, or the
+                mode or store options are invalid
+        """
+        if flush_threshold < 1:
+            raise ValueError("flush_threshold must be at least 1")
+        if merge_factor < 2:
+            raise ValueError("merge_factor must be at least 2")
+
+        self.persist_dir = Path(persist_dir) if persist_dir else None
+        self.flush_threshold = flush_threshold
+        self.merge_factor = merge_factor
+        self.compact_threshold = compact_threshold
+        self.mode = mode
+        self._scorer = get_scorer(scorer)
+        self.rerankers = get_rerankers(store_kwargs.pop("rerank", None))
+        self.rerank_depth = store_kwargs.pop("rerank_depth", 50)
+        self._store_kwargs = dict(store_kwargs, mode=mode, compact_threshold=compact_threshold)
+
+        if self.persist_dir is not None:
+            self._root = self.persist_dir / "segmented"
+        else:
+            self._root = Path(tempfile.mkdtemp(prefix="vector-store-segments-"))
+            self._cleanup = weakref.finalize(self, shutil.rmtree, self._root, True)
+
+        self._memtable = self._new_store()  # validates the configuration
+        self._segments: List[_SegmentRef] = []          # oldest first
+        self._owner: Dict[str, SimpleVectorStore] = {}  # live doc id -> store holding it
+        self._next_segment = 1
+        self._source_hash: Optional[str] = None
+        # Oldest segment first, memtable last (so ties rank in insertion order); replaced, never mutated
+        self._view: Tuple[SimpleVectorStore, ...] = (self._memtable,)
+
+        self._lock = threading.RLock()          # writes and segment list swaps
+        self._maintenance = threading.Lock()    # one flush or merge at a time
+        self._merger: Optional[threading.Thread] = None
+        self.generation = 0
+
+        self._passages = PassageIndex(self._new_store)
+
+    def _new_store(self, **overrides) -> SimpleVectorStore:
+        return SimpleVectorStore(**dict(self._store_kwargs, scorer=copy.copy(self._scorer), **overrides))
+
+    def __len__(self) -> int:
+        return len(self._owner)
+
+    @property
+    def scorer(self) -> Scorer:
+        """Scorer configuration (every segment prepares its own copy)."""
+        return self._scorer
+
+    @property
+    def segment_count(self) -> int:
+        """Number of immutable segments (not counting the memtable)."""
+        return len(self._segments)
+
+    def _publish(self) -> None:
+        """Swap in a new reader view; callers hold the write lock."""
+        self._view = tuple(ref.store for ref in self._segments) + (self._memtable,)
+
+    def ingest_accelerators(self, accelerators: List[CatalogItem]) -> None:
+        """Index CatalogItems, replacing existing ids (see upsert())."""
+        self.upsert(accelerators)
+
+    def upsert(self, items: List[CatalogItem]) -> None:
+        """
+        Insert or replace accelerators in the memtable.
+
+        A replaced document's copy in an older segment is marked deleted
+        there; the memtable is frozen and flushed in the background once
+        it reaches flush_threshold.
+        """
+        if not items:
+            return
+        docs = [SimpleVectorStore._document(acc) for acc in items]
+        with self._lock:
+            memtable = self._memtable
+            memtable._upsert_documents(docs)
+            shadowed: Dict[int, Tuple[SimpleVectorStore, List[str]]] = {}
+            for doc in docs:
+                previous = self._owner.get(doc.id)
+                if previous is not None and previous is not memtable:
+                    shadowed.setdefault(id(previous), (previous, []))[1].append(doc.id)
+                self._owner[doc.id] = memtable
+                self._passages.refresh(doc)
+            for store, ids in shadowed.values():
+                store.delete(ids)
+            self.generation += 1
+            if len(memtable) >= self.flush_threshold:
+                self._freeze()
+            self._schedule()
+
+    def delete(self, ids: List[str]) -> int:
+        """Remove accelerators (and their passages) by ID; returns the number removed."""
+        removed = 0
+        with self._lock:
+            owned: Dict[int, Tuple[SimpleVectorStore, List[str]]] = {}
+            for doc_id in ids:
+                store = self._owner.pop(doc_id, None)
+                if store is not None:
+                    owned.setdefault(id(store), (store, []))[1].append(doc_id)
+            for store, owned_ids in owned.values():
+                removed += store.delete(owned_ids)
+            self._passages.remove(ids)
+            if removed:
+                self.generation += 1
+                self._schedule()
+        return removed
+
+    def _freeze(self) -> None:
+        """Turn the memtable into an immutable in-memory segment and start a new one."""
+        if not len(self._memtable):
+            return
+        self._segments.append(_SegmentRef(self._memtable))
+        self._memtable = self._new_store()
+        self._publish()
+
+    def _tier(self, size: int) -> int:
+        """Size tier of a segment: 0 up to flush_threshold, then one per merge_factor multiple."""
+        tier, bound = 0, self.flush_threshold
+        while size > bound:
+            tier += 1
+            bound *= self.merge_factor
+        return tier
+
+    def _next_job(self) -> Optional[List[_SegmentRef]]:
+        """Segments to rewrite into one on-disk segment next, or None; callers hold the write lock."""
+        for ref in self._segments:
+            if ref.directory is None:
+                return [ref]
+        # Only adjacent segments are merged, so documents keep their insertion order
+        factor = self.merge_factor
+        windows = [self._segments[i:i + factor] for i in range(len(self._segments) - factor + 1)]
+        tiers = [{self._tier(len(ref.store)) for ref in window} for window in windows]
+        uniform = [(min(tier), i) for i, tier in enumerate(tiers) if len(tier) == 1]
+        if uniform:
+            return windows[min(uniform)[1]]
+        if len(self._segments) >= 2 * factor:
+            # Shrunken segments can break up the tiers; bound the count anyway
+            return min(windows, key=lambda window: sum(len(ref.store) for ref in window))
+        for ref in self._segments:
+            segment = ref.store._segment
+            tombstones = segment.tombstones
+            if tombstones >= self.COMPACT_MIN_TOMBSTONES and tombstones >= self.compact_threshold * len(segment.index):
+                return [ref]
+        return None
+
+    def _schedule(self) -> None:
+        """Start the background merger if there is work and it is not running; callers hold the write lock."""
+        if self._merger is not None or self._next_job() is None:
+            return
+        self._merger = threading.Thread(target=self._merge_loop, name="vector-store-merger", daemon=True)
+        self._merger.start()
+
+    def _merge_loop(self) -> None:
+        while True:
+            with self._maintenance:
+                with self._lock:
+                    job = self._next_job()
+                    if job is None:
+                        # Cleared under the lock, so a later _schedule() starts a new thread
+                        self._merger = None
+                        return
+                try:
+                    self._rewrite(job)
+                except Exception:
+                    logger.exception("Vector store segment merge failed")
+                    with self._lock:
+                        self._merger = None
+                    return
+
+    def wait(self, timeout: Optional[float] = None) -> None:
+        """Block until the background merger has no work left (or timeout seconds pass)."""
+        merger = self._merger
+        if merger is not None:
+            merger.join(timeout)
+
+    def _rewrite(self, sources: List[_SegmentRef]) -> None:
+        """
+        Write the live documents of some segments into one new on-disk segment and swap it in.
+
+        The new segment is built from the sources' forward indexes and
+        vector rows and written without holding the write lock; upserts
+        and deletes that hit the sources meanwhile are replayed onto it
+        when it is swapped in.
+        """
+        merged = Segment.merged([ref.store._segment for ref in sources])
+        new_ref = None
+        if merged.index.live_count:
+            builder = self._new_store()
+            builder._segment = merged
+            builder.documents = {doc.id: doc for doc in merged.live_documents()}
+            with self._lock:
+                name = f"seg-{self._next_segment:06d}"
+                self._next_segment += 1
+            directory = self._root / name
+            tmp = self._root / f".tmp-{name}"
+            tmp.mkdir(parents=True)
+            try:
+                builder._write(tmp)
+                os.replace(tmp, directory)
+            finally:
+                shutil.rmtree(tmp, ignore_errors=True)
+            # Segment stores never compact themselves; the merger rewrites them instead
+            store = self._new_store(compact_threshold=math.inf)
+            store._read(directory)
+            new_ref = _SegmentRef(store, directory)
+
+        with self._lock:
+            if any(ref not in self._segments for ref in sources):
+                # Cleared while we worked; drop the result
+                if new_ref is not None:
+                    shutil.rmtree(new_ref.directory, ignore_errors=True)
+                return
+            source_ids = {id(ref.store) for ref in sources}
+            if new_ref is not None:
+                stale = []
+                for doc_id in new_ref.store.documents:
+                    if id(self._owner.get(doc_id)) in source_ids:
+                        self._owner[doc_id] = new_ref.store
+                    else:
+                        stale.append(doc_id)  # deleted or replaced since the merge began
+                new_ref.store.delete(stale)
+            segments = []
+            for ref in self._segments:
+                if ref is sources[0]:
+                    if new_ref is not None:
+                        segments.append(new_ref)
+                elif ref not in sources:
+                    segments.append(ref)
+            self._segments = segments
+            self._publish()
+            self.generation += 1
+            if self.persist_dir is not None:
+                self._write_manifest()
+
+        # Readers of the previous view keep their mapped pages after the unlink
+        for ref in sources:
+            if ref.directory is not None:
+                shutil.rmtree(ref.directory, ignore_errors=True)
+        logger.info(
+            f"Rewrote {len(sources)} vector store segment(s) into "
+            f"{new_ref.directory.name if new_ref else 'nothing'} ({len(merged.docs)} documents)"
+        )
+
+    def flush(self) -> None:
+        """Write the memtable (and any frozen segments) to disk now."""
+        with self._maintenance:
+            with self._lock:
+                self._freeze()
+                pending = [ref for ref in self._segments if ref.directory is None]
+            for ref in pending:
+                self._rewrite([ref])
+
+    def compact(self) -> None:
+        """Flush the memtable and merge every segment into one without deleted documents."""
+        with self._maintenance:
+            with self._lock:
+                self._freeze()
+                sources = list(self._segments)
+            if len(sources) > 1 or any(ref.directory is None or ref.store._segment.tombstones for ref in sources):
+                self._rewrite(sources)
+
+    def search(
+        self,
+        query: str,
+        n_results: int = 5,
+        solution_area: Optional[FilterValue] = None,
+        complexity: Optional[FilterValue] = None,
+        filters: Optional[Dict[str, FilterValue]] = None,
+        exclude: Optional[Dict[str, FilterValue]] = None,
+        debug: bool = False,
+        complexity_min: Optional[FilterValue] = None,
+        complexity_max: Optional[FilterValue] = None
+    ) -> Dict[str, List]:
+        """Search every segment and merge their top n_results (see SimpleVectorStore.search)."""
+        include = dict(filters or {})
+        if solution_area:
+            include["solution_area"] = solution_area
+        complexity = with_range(complexity, complexity_min, complexity_max)
+        if complexity:
+            include["technical_complexity"] = complexity
+        return self.search_many([query], include, n_results, exclude, debug)[0]
+
+    def search_many(
+        self,
+        queries: List[str],
+        filters: Optional[Union[Dict[str, FilterValue], List[Optional[Dict[str, FilterValue]]]]] = None,
+        n_results: int = 5,
+        exclude: Optional[Union[Dict[str, FilterValue], List[Optional[Dict[str, FilterValue]]]]] = None,
+        debug: bool = False
+    ) -> List[Dict[str, List]]:
+        """
+        Run a batch of searches on every segment and merge per query (see SimpleVectorStore.search_many).
+
+        Each segment answers from its own query cache; segments that only
+        a merge or a delete can change keep their cached results across
+        memtable writes. With debug, each result's 'debug' entry holds the
+        segment and merge times plus every segment's own debug entry
+        under 'segments' (oldest first, memtable last).
+
+        Hybrid mode merges each ranking across segments before fusing, so
+        fused distances are comparable; it bypasses the segment caches and
+        its debug entry has the summed per-stage timings instead.
+        
+        Re-rankers run once, over the rerank_depth shortlist merged from
+        all segments.
+        """
+        start = time.perf_counter()
+        view = self._view
+        depth = max(n_results, self.rerank_depth) if self.rerankers else n_results
+        if self.mode == "hybrid":
+            merged = self._hybrid_many(view, queries, filters, depth, exclude, debug)
+            return self._rerank(queries, merged, n_results, debug)
+        per_segment = [store.search_many(queries, filters, depth, exclude, debug) for store in view]
+        searched = time.perf_counter()
+        merged = [
+            _merge([results[q] for results in per_segment], depth)
+            for q in range(len(queries))
+        ]
+        if debug:
+            timings = {
+                "segments": round((searched - start) * 1000, 3),
+                "merge": round((time.perf_counter() - searched) * 1000, 3),
+            }
+            for q, result in enumerate(merged):
+                result["debug"] = {
+                    "mode": self.mode,
+                    "timings_ms": timings,
+                    "segments": [results[q]["debug"] for results in per_segment]
+                }
+        return self._rerank(queries, merged, n_results, debug)
+
+    def _rerank(
+        self,
+        queries: List[str],
+        results: List[Dict[str, List]],
+        n_results: int,
+        debug: bool
+    ) -> List[Dict[str, List]]:
+        """Re-rank merged shortlists down to n_results; re-rank times join each debug entry."""
+        if not self.rerankers:
+            return results
+        analyzer = self._memtable.analyzer
+        timings: Dict[str, float] = {}
+        reranked = [
+            rerank_results(
+                self.rerankers,
+                analyzer.analyze_query(parse_query(query, analyzer)[0]),
+                result,
+                n_results,
+                analyzer,
+                timings
+            )
+            for query, result in zip(queries, results)
+        ]
+        if debug:
+            for result, shortlist in zip(reranked, results):
+                result["debug"] = shortlist["debug"]
+                result["debug"]["timings_ms"].update({stage: round(ms, 3) for stage, ms in timings.items()})
+        return reranked
+
+    def _hybrid_many(
+        self,
+        view: Tuple[SimpleVectorStore, ...],
+        queries: List[str],
+        filters: Any,
+        n_results: int,
+        exclude: Any,
+        debug: bool
+    ) -> List[Dict[str, List]]:
+        """Hybrid search_many(): merge every segment's lexical and dense rankings, then fuse once."""
+        start = time.perf_counter()
+        timings: Optional[Dict[str, float]] = {} if debug else None
+        candidates: Dict[str, int] = {}
+        include_list = SimpleVectorStore._per_query(filters, len(queries), "filters")
+        exclude_list = SimpleVectorStore._per_query(exclude, len(queries), "exclude")
+        memtable = view[-1]
+        with timed(timings, "analyze"):
+            parsed = [parse_query(query, memtable.analyzer) for query in queries]
+            queries = [text for text, _ in parsed]
+            phrase_lists = [phrases for _, phrases in parsed]
+            token_lists = [memtable.analyzer.analyze_query(query) for query in queries]
+        depth = max(n_results, memtable.hybrid_candidates)
+        per_segment = [
+            store._search_segment(
+                store._segment, queries, token_lists, include_list, exclude_list, depth,
+                timings, candidates, fuse=False, phrase_lists=phrase_lists
+            )
+            for store in view
+        ]
+        results = []
+        with timed(timings, "fuse"):
+            for q in range(len(queries)):
+                lexical = _merge_hits([rankings[q][0] for rankings in per_segment], depth)
+                dense = _merge_hits([rankings[q][1] for rankings in per_segment], depth)
+                results.append(SimpleVectorStore._results(memtable._fuse(lexical, dense, n_results)))
+        if debug:
+            timings["total"] = (time.perf_counter() - start) * 1000
+            for result in results:
+                result["debug"] = {
+                    "mode": self.mode,
+                    "cached": False,
+                    "candidates": dict(candidates),
+                    "timings_ms": {stage: round(ms, 3) for stage, ms in timings.items()},
+                    "segments": len(view) - 1
+                }
+        return results
+
+    def matching_ids(
+        self,
+        query: str,
+        n_results: int = 100,
+        filters: Optional[Dict[str, FilterValue]] = None,
+        exclude: Optional[Dict[str, FilterValue]] = None
+    ) -> Dict[str, List]:
+        """Top n_results matches over all segments (see SimpleVectorStore.matching_ids)."""
+        if self.mode == "hybrid":
+            result = self.search(query, n_results, filters=filters, exclude=exclude)
+            return {"ids": result["ids"], "distances": result["distances"]}
+        per_segment = [store.matching_ids(query, n_results, filters, exclude) for store in self._view]
+        hits = heapq.merge(*(zip(r["distances"], r["ids"]) for r in per_segment), key=lambda hit: hit[0])
+        merged: Dict[str, List] = {"ids": [], "distances": []}
+        for distance, doc_id in hits:
+            if len(merged["ids"]) == n_results:
+                break
+            if doc_id not in merged["ids"]:
+                merged["ids"].append(doc_id)
+                merged["distances"].append(distance)
+        return merged
+
+    def facet_counts(
+        self,
+        query: Optional[str] = None,
+        n_results: int = 100,
+        filters: Optional[Dict[str, FilterValue]] = None,
+        exclude: Optional[Dict[str, FilterValue]] = None,
+        ids: Optional[List[str]] = None,
+        fields: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        """Facet counts summed over the segments (see SimpleVectorStore.facet_counts)."""
+        if query is not None:
+            ids = self.matching_ids(query, n_results, filters, exclude)["ids"]
+        return sum_facet_counts([
+            store.facet_counts(None, n_results, filters, exclude, ids, fields)
+            for store in self._view
+        ])
+
+    def upsert_passages(
+        self,
+        parent_id: str,
+        passages: Iterable[Passage],
+        batch_size: int = 256,
+        replace: bool = True
+    ) -> int:
+        """
+        Index passages as children of an accelerator (see SimpleVectorStore.upsert_passages).
+
+        Passages live in one sub-store of their own, outside the segments.
+
+        Raises:
+            ValueError: If parent_id is not indexed
+        """
+        parent = self._document(parent_id)
+        if parent is None:
+            raise ValueError(f"Unknown parent accelerator '{parent_id}'")
+        return self._passages.upsert(parent, passages, batch_size, replace)
+
+    def passage_count(self) -> int:
+        """Number of indexed passages."""
+        return len(self._passages)
+
+    def search_passages(
+        self,
+        query: str,
+        n_results: int = 5,
+        filters: Optional[Dict[str, FilterValue]] = None,
+        exclude: Optional[Dict[str, FilterValue]] = None
+    ) -> Dict[str, List]:
+        """Rank passages across all accelerators (see SimpleVectorStore.search_passages)."""
+        return self._passages.search(query, n_results=n_results, filters=filters, exclude=exclude)
+
+    def best_passages(self, query: str, parent_ids: List[str]) -> Dict[str, Dict]:
+        """Best-matching passage for each of the given accelerators (see SimpleVectorStore.best_passages)."""
+        return self._passages.best(query, parent_ids)
+
+    def _document(self, doc_id: str) -> Optional[Document]:
+        store = self._owner.get(doc_id)
+        return store.documents.get(doc_id) if store is not None else None
+
+    def get_by_id(self, accelerator_id: str) -> Optional[Dict]:
+        """Retrieve an accelerator from the segment holding its current version."""
+        doc = self._document(accelerator_id)
+        if doc is None:
+            return None
+        return {"id": doc.id, "document": doc.text, "metadata": doc.metadata}
+
+    def list_all(self) -> List[Dict]:
+        """All indexed accelerators, oldest segment first."""
+        items = []
+        for store in self._view:
+            for doc in list(store.documents.values()):
+                if self._owner.get(doc.id) is store:
+                    items.append({"id": doc.id, "document": doc.text, "metadata": doc.metadata})
+        return items
+
+    def clear(self) -> None:
+        """Delete all items and every segment."""
+        with self._lock:
+            stale = [ref.directory for ref in self._segments if ref.directory is not None]
+            self._segments = []
+            self._memtable = self._new_store()
+            self._owner = {}
+            self._passages.clear()
+            self._publish()
+            self.generation += 1
+            if self.persist_dir is not None:
+                self._write_manifest()
+        for directory in stale:
+            shutil.rmtree(directory, ignore_errors=True)
+
+    def _signature(self, source_hash: Optional[str]) -> Dict:
+        """Everything that must match for saved segments to be reused."""
+        signature = self._memtable._snapshot_signature(source_hash)
+        signature["format"] = f"segmented-v{SNAPSHOT_VERSION}"
+        return signature
+
+    def _write_manifest(self) -> None:
+        """Atomically record the current segment list; callers hold the write lock."""
+        self._root.mkdir(parents=True, exist_ok=True)
+        manifest = {
+            "signature": self._signature(self._source_hash),
+            "segments": [
+                {"name": ref.directory.name, "deleted": ref.deleted()}
+                for ref in self._segments if ref.directory is not None
+            ],
+            "next_segment": self._next_segment,
+        }
+        tmp = self._root / f".tmp-{MANIFEST_FILE}"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f)
+        os.replace(tmp, self._root / MANIFEST_FILE)
+
+    def save(self, source_hash: Optional[str] = None) -> Path:
+        """
+        Flush the memtable and record the segments (and passages) under persist_dir/segmented.
+
+        Returns:
+            The segment directory
+
+        Raises:
+            ValueError: If the store has no persist_dir
+        """
+        if self.persist_dir is None:
+            raise ValueError("save() requires a persist_dir")
+        self.flush()
+        with self._lock:
+            self._source_hash = source_hash
+            passages = self._root / "passages"
+            shutil.rmtree(passages, ignore_errors=True)
+            self._passages.save(passages)
+            self._write_manifest()
+        return self._root
+
+    def load(self, source_hash: Optional[str] = None) -> bool:
+        """
+        Replace the store contents with the saved segments, memory-mapped
+        (documents and facets are still rebuilt; see SimpleVectorStore.load()).
+
+        Args:
+            source_hash: Expected content hash; segments saved from other
+                data (or with another configuration) are ignored
+
+        Returns:
+            True if segments were loaded, False if none matched
+        """
+        if self.persist_dir is None:
+            return False
+        try:
+            with open(self._root / MANIFEST_FILE, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if manifest.get("signature") != self._signature(source_hash):
+            return False
+        entries = manifest["segments"]
+        directories = [self._root / entry["name"] for entry in entries]
+        if not all(directory.is_dir() for directory in directories):
+            return False
+
+        segments = []
+        for directory, entry in zip(directories, entries):
+            store = self._new_store(compact_threshold=math.inf)
+            store._read(directory)
+            ref = _SegmentRef(store, directory)
+            store.delete(entry["deleted"])
+            segments.append(ref)
+        with self._maintenance, self._lock:
+            self._segments = segments
+            self._memtable = self._new_store()
+            self._owner = {doc_id: ref.store for ref in segments for doc_id in ref.store.documents}
+            self._next_segment = manifest["next_segment"]
+            self._source_hash = source_hash
+            self._passages.load(self._root / "passages")
+            self._publish()
+            self.generation += 1
+        # Directories no manifest refers to were left by an interrupted merge
+        keep = {directory.name for directory in directories} | {"passages", MANIFEST_FILE}
+        for path in self._root.iterdir():
+            if path.name not in keep:
+                shutil.rmtree(path, ignore_errors=True)
+        logger.info(f"Loaded {len(segments)} vector store segments ({len(self)} documents)")
+        return True
+
+    def cache_stats(self) -> Dict[str, Any]:
+        """Query cache counters summed over the segments."""
+        per_segment = [store.cache_stats() for store in self._view]
+        stats = {
+            name: sum(s[name] for s in per_segment)
+            for name in ("hits", "misses", "evictions", "size", "maxsize")
+        }
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        stats["ttl_seconds"] = per_segment[-1]["ttl_seconds"]
+        stats["generation"] = self.generation
+        stats["segments"] = len(per_segment) - 1
+        return stats
+
+    def memory_report(self) -> Dict[str, Any]:
+        """Memory reports of the segments and passages, summed (see SimpleVectorStore.memory_report)."""
+        per_segment = [store.memory_report() for store in self._view]
+        components: Dict[str, int] = {}
+        for report in per_segment:
+            for name, size in report["components"].items():
+                components[name] = components.get(name, 0) + size
+        mapped = sum(r["mapped_bytes"] for r in per_segment)
+        if len(self._passages):
+            passages = self._passages.store.memory_report()
+            components["passages"] = components.get("passages", 0) + passages["total_bytes"]
+            mapped += passages["mapped_bytes"]
+        documents = len(self)
+        total = sum(components.values())
+        return {
+            "documents": documents,
+            "components": components,
+            "total_bytes": total,
+            "mapped_bytes": mapped,
+            "bytes_per_document": total / documents if documents else 0.0,
+            "segments": len(per_segment) - 1,
+        }
+
+    def close(self) -> None:
+        """Wait for the merger; a store without persist_dir also removes its segments."""
+        self.wait()
+        if self.persist_dir is None:
+            self._cleanup()
+
+    def __enter__(self) -> "SegmentedVectorStore":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
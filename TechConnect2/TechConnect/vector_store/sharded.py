@@ -0,0 +1,556 @@
+"""
+Sharded vector store for the TechConnect Contextual Broker.
+Partitions documents by a stable hash of their id across worker processes,
+each running its own SimpleVectorStore; queries are scattered to every
+shard and the per-shard top-k lists are merged.
+"""
+
+import heapq
+import logging
+import multiprocessing
+import pickle
+import threading
+import time
+import zlib
+from itertools import islice
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+from ingestion.chunker import Passage
+from models.schemas import CatalogItem
+from vector_store.analyzer import Analyzer
+from vector_store.cache import QueryCache
+from vector_store.filters import FilterValue, filter_key, sum_facet_counts, with_range
+from vector_store.fusion import RRF_K, fused_distance, reciprocal_rank_fusion
+from vector_store.phrases import parse_query
+from vector_store.rerank import get_rerankers, rerank_results
+from vector_store.scoring import Scorer, get_scorer
+from vector_store.store import SimpleVectorStore
+
+logger = logging.getLogger(__name__)
+
+# Store methods a shard process will run on request
+_SHARD_METHODS = frozenset({
+    "upsert", "delete", "compact", "search_many", "get_by_id", "list_all",
+    "clear", "save", "load", "__len__",
+    "upsert_passages", "passage_count", "search_passages", "best_passages",
+    "memory_report", "matching_ids", "facet_counts", "hybrid_rankings",
+})
+
+
+def shard_for(doc_id: str, n_shards: int) -> int:
+    """Shard index of a document id (CRC32, stable across processes and restarts)."""
+    return zlib.crc32(doc_id.encode('utf-8')) % n_shards
+
+
+def _serve_shard(conn, store_kwargs: Dict[str, Any]) -> None:
+    """Shard process main loop: run store calls received over the pipe until closed."""
+    store = SimpleVectorStore(**store_kwargs)
+    while True:
+        try:
+            method, args, kwargs = conn.recv()
+        except (EOFError, KeyboardInterrupt):
+            break
+        if method == "close":
+            conn.send(("ok", None))
+            break
+        try:
+            if method not in _SHARD_METHODS:
+                raise AttributeError(f"Shard does not serve '{method}'")
+            conn.send(("ok", getattr(store, method)(*args, **kwargs)))
+        except Exception as e:
+            conn.send(("error", e))
+    conn.close()
+
+
+def _merge(results: List[Dict[str, List]], n_results: int) -> Dict[str, List]:
+    """Merge per-shard result dicts (each sorted by distance) into the global top n_results."""
+    hits = heapq.merge(
+        *(zip(r["distances"], r["ids"], r["documents"], r["metadatas"]) for r in results),
+        key=lambda hit: hit[0]
+    )
+    merged = {"ids": [], "documents": [], "metadatas": [], "distances": []}
+    for distance, doc_id, document, metadata in islice(hits, n_results):
+        merged["ids"].append(doc_id)
+        merged["documents"].append(document)
+        merged["metadatas"].append(metadata)
+        merged["distances"].append(distance)
+    return merged
+
+
+def _fuse(lexical: Dict[str, List], dense: Dict[str, List], n_results: int, k: int) -> Dict[str, List]:
+    """Top n_results of one query by reciprocal rank fusion of its merged lexical and dense rankings."""
+    hits = dict(zip(lexical["ids"], zip(lexical["documents"], lexical["metadatas"])))
+    hits.update(zip(dense["ids"], zip(dense["documents"], dense["metadatas"])))
+    fused = reciprocal_rank_fusion([lexical["ids"], dense["ids"]], k)
+    top = heapq.nlargest(n_results, fused.items(), key=lambda item: item[1])
+    return {
+        "ids": [doc_id for doc_id, _ in top],
+        "documents": [hits[doc_id][0] for doc_id, _ in top],
+        "metadatas": [hits[doc_id][1] for doc_id, _ in top],
+        "distances": [fused_distance(score, 2, k) for _, score in top],
+    }
+
+
+class ShardedVectorStore:
+    """
+    Drop-in replacement for SimpleVectorStore that spreads documents over
+    ``shards`` worker processes.
+
+    Every shard scores its own partition in parallel; the parent merges the
+    per-shard top-k lists by distance. In hybrid mode the shards return
+    their unfused lexical and dense rankings, which the parent merges and
+    fuses once, since RRF distances are not comparable across shards. BM25
+    statistics (IDF, average length) are shard-local, which is close to
+    global once each shard holds a sizeable, hash-balanced partition.
+    Re-rankers run in the parent over the merged shortlist, so every
+    candidate is re-scored on the same terms.
+
+    Merged results are cached in the parent, keyed like SimpleVectorStore
+    and invalidated by the parent's generation, so a repeated query never
+    reaches the shards; the shards run without caches of their own.
+
+    Call close() (or use the store as a context manager) to stop the workers.
+    """
+
+    def __init__(
+        self,
+        shards: int = 2,
+        persist_dir: Optional[Path] = None,
+        scorer: Union[str, Scorer] = "jaccard",
+        mode: str = "lexical",
+        **store_kwargs
+    ):
+        """
+        Start the shard processes.
+
+        Args:
+            shards: Number of worker processes (at least 1)
+            persist_dir: Directory for on-disk snapshots; each shard writes
+                its own under shards-<n>/shard-<i>
+            scorer: Ranking function name (shared by every shard)
+            mode: "lexical", "dense" or "hybrid"
+            **store_kwargs: Further SimpleVectorStore options (embedder,
+                compact_threshold, cache_size, cache_ttl, rerank, rerank_depth)
+
+        Raises:
+            ValueError: If shards < 1, any store option is invalid (see
+                SimpleVectorStore) or an option cannot be pickled
+            TypeError: If a store option is unknown
+        """
+        if shards < 1:
+            raise ValueError("shards must be at least 1")
+        rerank = store_kwargs.pop("rerank", None)
+        self.rerank_depth = store_kwargs.pop("rerank_depth", 50)
+        # Validate the full configuration here: a bad option would otherwise only kill the workers
+        SimpleVectorStore(scorer=scorer, mode=mode, rerank=rerank, rerank_depth=self.rerank_depth, **store_kwargs)
+        try:
+            pickle.dumps((scorer, store_kwargs))
+        except Exception as e:
+            raise ValueError(f"Store options must be picklable to reach the shard processes: {e}") from e
+        self.rerankers = get_rerankers(rerank)
+        self.analyzer = store_kwargs.get("analyzer") or Analyzer()
+        # Hybrid rankings are merged over the shards and fused here
+        self.hybrid_candidates = store_kwargs.get("hybrid_candidates", 50)
+        self.rrf_k = store_kwargs.get("rrf_k", RRF_K)
+        self._embeds_tokens = store_kwargs.get("embedder") is None
+        self._cache = QueryCache(maxsize=store_kwargs.get("cache_size", 1024), ttl=store_kwargs.get("cache_ttl", 300.0))
+
+        self.n_shards = shards
+        self.persist_dir = Path(persist_dir) if persist_dir else None
+        self.scorer = get_scorer(scorer)  # configuration only; shards score with their own copies
+        self.mode = mode
+        self.generation = 0
+        self._lock = threading.Lock()
+        self._conns = []
+        self._processes = []
+
+        # spawn: workers must not inherit the parent's threads or locks
+        context = multiprocessing.get_context("spawn")
+        for i in range(shards):
+            kwargs = dict(store_kwargs, scorer=scorer, mode=mode, cache_size=0)
+            if self.persist_dir is not None:
+                kwargs["persist_dir"] = self.persist_dir / f"shards-{shards}" / f"shard-{i}"
+            parent_conn, child_conn = context.Pipe()
+            process = context.Process(
+                target=_serve_shard,
+                args=(child_conn, kwargs),
+                name=f"vector-store-shard-{i}",
+                daemon=True
+            )
+            process.start()
+            child_conn.close()
+            self._conns.append(parent_conn)
+            self._processes.append(process)
+        logger.info(f"Started {shards} vector store shards")
+
+    def _scatter(self, calls: Dict[int, Tuple[str, tuple, dict]]) -> Dict[int, Any]:
+        """
+        Send one call per shard, then gather the replies.
+
+        All requests go out before any reply is read, so shards work in parallel.
+
+        Raises:
+            Whatever exception a shard raised (the first one, by shard order)
+        """
+        if not self._conns:
+            raise RuntimeError("ShardedVectorStore is closed")
+        with self._lock:
+            for shard, call in calls.items():
+                self._conns[shard].send(call)
+            replies = {shard: self._conns[shard].recv() for shard in calls}
+        for status, value in replies.values():
+            if status == "error":
+                raise value
+        return {shard: value for shard, (_, value) in replies.items()}
+
+    def _broadcast(self, method: str, *args, **kwargs) -> List[Any]:
+        """Run the same call on every shard; replies in shard order."""
+        replies = self._scatter({i: (method, args, kwargs) for i in range(self.n_shards)})
+        return [replies[i] for i in range(self.n_shards)]
+
+    def __len__(self) -> int:
+        return sum(self._broadcast("__len__"))
+
+    def ingest_accelerators(self, accelerators: List[CatalogItem]) -> None:
+        """Index CatalogItems, replacing existing ids (see upsert())."""
+        self.upsert(accelerators)
+
+    def upsert(self, items: List[CatalogItem]) -> None:
+        """Insert or replace accelerators on the shards that own their ids."""
+        if not items:
+            return
+        partitions: Dict[int, List[CatalogItem]] = {}
+        for item in items:
+            partitions.setdefault(shard_for(item.id, self.n_shards), []).append(item)
+        self._scatter({shard: ("upsert", (part,), {}) for shard, part in partitions.items()})
+        self.generation += 1
+
+    def delete(self, ids: List[str]) -> int:
+        """Remove accelerators by ID; returns the number removed."""
+        partitions: Dict[int, List[str]] = {}
+        for doc_id in ids:
+            partitions.setdefault(shard_for(doc_id, self.n_shards), []).append(doc_id)
+        if not partitions:
+            return 0
+        removed = sum(self._scatter({shard: ("delete", (part,), {}) for shard, part in partitions.items()}).values())
+        if removed:
+            self.generation += 1
+        return removed
+
+    def compact(self) -> None:
+        """Compact every shard."""
+        self._broadcast("compact")
+
+    def search(
+        self,
+        query: str,
+        n_results: int = 5,
+        solution_area: Optional[FilterValue] = None,
+        complexity: Optional[FilterValue] = None,
+        filters: Optional[Dict[str, FilterValue]] = None,
+        exclude: Optional[Dict[str, FilterValue]] = None,
+        debug: bool = False,
+        complexity_min: Optional[FilterValue] = None,
+        complexity_max: Optional[FilterValue] = None
+    ) -> Dict[str, List]:
+        """Search every shard and merge their top n_results (see SimpleVectorStore.search)."""
+        include = dict(filters or {})
+        if solution_area:
+            include["solution_area"] = solution_area
+        complexity = with_range(complexity, complexity_min, complexity_max)
+        if complexity:
+            include["technical_complexity"] = complexity
+        return self.search_many([query], include, n_results, exclude, debug)[0]
+
+    def search_many(
+        self,
+        queries: List[str],
+        filters: Optional[Union[Dict[str, FilterValue], List[Optional[Dict[str, FilterValue]]]]] = None,
+        n_results: int = 5,
+        exclude: Optional[Union[Dict[str, FilterValue], List[Optional[Dict[str, FilterValue]]]]] = None,
+        debug: bool = False
+    ) -> List[Dict[str, List]]:
+        """
+        Run a batch of searches on every shard and merge per query (see SimpleVectorStore.search_many).
+
+        Queries answered from the parent's cache are not sent to the shards.
+        With debug, each result's 'debug' entry holds whether it was cached,
+        the scatter-gather, merge and re-rank times, and every shard's own
+        debug entry under 'shards' (empty for cached results).
+        """
+        include_list = SimpleVectorStore._per_query(filters, len(queries), "filters")
+        exclude_list = SimpleVectorStore._per_query(exclude, len(queries), "exclude")
+
+        start = time.perf_counter()
+        generation = self.generation
+        parsed = [parse_query(query, self.analyzer) for query in queries]
+        token_lists = [self.analyzer.analyze_query(text) for text, _ in parsed]
+        keys = [
+            self._cache_key(text, tokens, include, excluded, n_results, phrases)
+            for (text, phrases), tokens, include, excluded in zip(parsed, token_lists, include_list, exclude_list)
+        ]
+        results: List[Optional[Dict[str, List]]] = [self._cache.get(key, generation) for key in keys]
+        pending = [q for q, cached in enumerate(results) if cached is None]
+        per_shard: List[List[Dict]] = []
+        gathered = merged_at = time.perf_counter()
+        rerank_timings: Dict[str, float] = {}
+
+        if pending:
+            batch = [queries[q] for q in pending]
+            include = [include_list[q] for q in pending]
+            excluded = [exclude_list[q] for q in pending]
+            depth = max(n_results, self.rerank_depth) if self.rerankers else n_results
+            if self.mode == "hybrid":
+                # RRF distances are only comparable within one ranking: merge each ranking, then fuse once
+                candidates = max(depth, self.hybrid_candidates)
+                per_shard = self._broadcast("hybrid_rankings", batch, include, candidates, excluded, debug)
+                gathered = time.perf_counter()
+                merged = [
+                    _fuse(
+                        _merge([shard_results[i]["lexical"] for shard_results in per_shard], candidates),
+                        _merge([shard_results[i]["dense"] for shard_results in per_shard], candidates),
+                        depth,
+                        self.rrf_k
+                    )
+                    for i in range(len(batch))
+                ]
+            else:
+                per_shard = self._broadcast("search_many", batch, include, depth, excluded, debug)
+                gathered = time.perf_counter()
+                merged = [
+                    _merge([shard_results[i] for shard_results in per_shard], depth)
+                    for i in range(len(batch))
+                ]
+            merged_at = time.perf_counter()
+            for q, result in zip(pending, merged):
+                if self.rerankers:
+                    result = rerank_results(
+                        self.rerankers, token_lists[q], result, n_results, self.analyzer, rerank_timings
+                    )
+                results[q] = result
+                self._cache.put(keys[q], generation, result)
+
+        # Callers get their own lists; cached results stay untouched
+        output = [{name: list(values) for name, values in result.items()} for result in results]
+        if debug:
+            timings = {
+                "scatter_gather": round((gathered - start) * 1000, 3),
+                "merge": round((merged_at - gathered) * 1000, 3),
+            }
+            timings.update({stage: round(ms, 3) for stage, ms in rerank_timings.items()})
+            shard_debug = {q: [shard_results[i]["debug"] for shard_results in per_shard] for i, q in enumerate(pending)}
+            for q, result in enumerate(output):
+                result["debug"] = {
+                    "mode": self.mode,
+                    "cached": q not in shard_debug,
+                    "timings_ms": timings,
+                    "shards": shard_debug.get(q, [])
+                }
+        return output
+
+    def _cache_key(
+        self,
+        query: str,
+        tokens: List[str],
+        include: Optional[Dict],
+        exclude: Optional[Dict],
+        n_results: int,
+        phrases: Tuple = ()
+    ) -> Tuple:
+        """Normalized cache key, built as SimpleVectorStore._cache_key() builds it for the shards' settings."""
+        if self.mode == "lexical":
+            terms: Tuple = tuple(sorted(set(tokens)))
+        elif self._embeds_tokens:
+            terms = tuple(sorted(tokens))
+        else:
+            terms = (" ".join(query.split()),)
+        key = (terms, phrases, filter_key(include), filter_key(exclude), n_results)
+        if self.mode == "hybrid":
+            key += (self.hybrid_candidates, self.rrf_k)
+        if self.rerankers:
+            key += (self.rerank_depth, tuple(reranker.name for reranker in self.rerankers))
+        return key
+
+    def matching_ids(
+        self,
+        query: str,
+        n_results: int = 100,
+        filters: Optional[Dict[str, FilterValue]] = None,
+        exclude: Optional[Dict[str, FilterValue]] = None
+    ) -> Dict[str, List]:
+        """Top n_results matches over all shards (see SimpleVectorStore.matching_ids)."""
+        per_shard = self._broadcast("matching_ids", query, n_results, filters, exclude)
+        hits = heapq.merge(*(zip(r["distances"], r["ids"]) for r in per_shard), key=lambda hit: hit[0])
+        top = list(islice(hits, n_results))
+        return {"ids": [doc_id for _, doc_id in top], "distances": [distance for distance, _ in top]}
+
+    def facet_counts(
+        self,
+        query: Optional[str] = None,
+        n_results: int = 100,
+        filters: Optional[Dict[str, FilterValue]] = None,
+        exclude: Optional[Dict[str, FilterValue]] = None,
+        ids: Optional[List[str]] = None,
+        fields: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        """
+        Facet counts summed over the shards (see SimpleVectorStore.facet_counts).
+
+        With a query, the global top n_results are found first and each
+        shard counts only its own share of them.
+        """
+        if query is not None:
+            ids = self.matching_ids(query, n_results, filters, exclude)["ids"]
+        if ids is None:
+            per_shard = self._broadcast("facet_counts", None, n_results, filters, exclude, None, fields)
+        else:
+            partitions: Dict[int, List[str]] = {shard: [] for shard in range(self.n_shards)}
+            for doc_id in ids:
+                partitions[shard_for(doc_id, self.n_shards)].append(doc_id)
+            per_shard = list(self._scatter({
+                shard: ("facet_counts", (None, n_results, filters, exclude, part, fields), {})
+                for shard, part in partitions.items()
+            }).values())
+        return sum_facet_counts(per_shard)
+
+    def upsert_passages(
+        self,
+        parent_id: str,
+        passages: Iterable[Passage],
+        batch_size: int = 256,
+        replace: bool = True
+    ) -> int:
+        """
+        Stream passages to the shard that owns their parent (see SimpleVectorStore.upsert_passages).
+
+        Only one batch is held in the parent process at a time.
+        """
+        shard = shard_for(parent_id, self.n_shards)
+        passages = iter(passages)
+        count = 0
+        # The first batch is sent even if empty, so replace still clears old passages
+        batch = list(islice(passages, batch_size))
+        while True:
+            count += self._scatter({shard: ("upsert_passages", (parent_id, batch, batch_size, replace), {})})[shard]
+            replace = False  # later batches extend the first
+            batch = list(islice(passages, batch_size))
+            if not batch:
+                return count
+
+    def passage_count(self) -> int:
+        """Number of indexed passages over all shards."""
+        return sum(self._broadcast("passage_count"))
+
+    def search_passages(
+        self,
+        query: str,
+        n_results: int = 5,
+        filters: Optional[Dict[str, FilterValue]] = None,
+        exclude: Optional[Dict[str, FilterValue]] = None
+    ) -> Dict[str, List]:
+        """Rank passages on every shard and merge their top n_results."""
+        return _merge(self._broadcast("search_passages", query, n_results, filters, exclude), n_results)
+
+    def best_passages(self, query: str, parent_ids: List[str]) -> Dict[str, Dict]:
+        """Best-matching passage per accelerator, asking only the shards that own them."""
+        partitions: Dict[int, List[str]] = {}
+        for parent_id in parent_ids:
+            partitions.setdefault(shard_for(parent_id, self.n_shards), []).append(parent_id)
+        if not partitions:
+            return {}
+        replies = self._scatter({shard: ("best_passages", (query, part), {}) for shard, part in partitions.items()})
+        return {parent_id: best for reply in replies.values() for parent_id, best in reply.items()}
+
+    def get_by_id(self, accelerator_id: str) -> Optional[Dict]:
+        """Retrieve an accelerator from the shard that owns its id."""
+        shard = shard_for(accelerator_id, self.n_shards)
+        return self._scatter({shard: ("get_by_id", (accelerator_id,), {})})[shard]
+
+    def list_all(self) -> List[Dict]:
+        """All indexed accelerators, shard by shard."""
+        return [item for items in self._broadcast("list_all") for item in items]
+
+    def clear(self) -> None:
+        """Delete all items from every shard."""
+        self._broadcast("clear")
+        self.generation += 1
+
+    def save(self, source_hash: Optional[str] = None) -> Path:
+        """
+        Write one snapshot per shard under persist_dir/shards-<n>.
+
+        Raises:
+            ValueError: If the store has no persist_dir
+        """
+        if self.persist_dir is None:
+            raise ValueError("save() requires a persist_dir")
+        self._broadcast("save", source_hash)
+        return self.persist_dir / f"shards-{self.n_shards}"
+
+    def load(self, source_hash: Optional[str] = None) -> bool:
+        """
+        Load every shard's matching snapshot.
+
+        Returns:
+            True if all shards loaded; otherwise the shards are cleared and False
+        """
+        if self.persist_dir is None:
+            return False
+        loaded = self._broadcast("load", source_hash)
+        if all(loaded):
+            self.generation += 1
+            return True
+        if any(loaded):
+            self.clear()
+        return False
+
+    def cache_stats(self) -> Dict[str, Any]:
+        """Counters of the parent's query cache (see SimpleVectorStore.cache_stats)."""
+        return {**self._cache.stats(), "generation": self.generation, "shards": self.n_shards}
+
+    def memory_report(self) -> Dict[str, Any]:
+        """Memory reports of the shards, summed (see SimpleVectorStore.memory_report)."""
+        per_shard = self._broadcast("memory_report")
+        components: Dict[str, int] = {}
+        for report in per_shard:
+            for name, size in report["components"].items():
+                components[name] = components.get(name, 0) + size
+        documents = sum(r["documents"] for r in per_shard)
+        total = sum(r["total_bytes"] for r in per_shard)
+        return {
+            "documents": documents,
+            "components": components,
+            "total_bytes": total,
+            "mapped_bytes": sum(r["mapped_bytes"] for r in per_shard),
+            "bytes_per_document": total / documents if documents else 0.0,
+            "shards": self.n_shards,
+        }
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Stop the shard processes (terminating any that do not exit in time)."""
+        conns, processes = self._conns, self._processes
+        self._conns, self._processes = [], []
+        for conn in conns:
+            try:
+                conn.send(("close", (), {}))
+            except (OSError, BrokenPipeError):
+                pass
+        for conn, process in zip(conns, processes):
+            process.join(timeout)
+            if process.is_alive():
+                process.terminate()
+                process.join()
+            conn.close()
+        if processes:
+            logger.info(f"Stopped {len(processes)} vector store shards")
+
+    def __enter__(self) -> "ShardedVectorStore":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def __del__(self):
+        if getattr(self, "_processes", None):
+            self.close(timeout=1.0)
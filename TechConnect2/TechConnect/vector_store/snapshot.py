@@ -0,0 +1,141 @@
+"""
+On-disk snapshots for the TechConnect vector store.
+A snapshot is a versioned directory of flat binary buffers (postings,
+statistics, optional vectors) plus JSON tables, keyed by the content hash
+of the source catalog so a changed catalog.json invalidates it.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+import uuid
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_VERSION = 3
+MANIFEST_FILE = "manifest.json"
+
+
+def content_hash(path: Path) -> str:
+    """SHA-256 of a file's bytes (e.g. catalog.json)."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def snapshot_dir(persist_dir: Path, signature: Dict) -> Path:
+    """
+    Directory name for a snapshot with the given signature.
+
+    The signature holds everything that makes a snapshot reusable: the
+    format version, the source content hash and the store configuration.
+    """
+    key = hashlib.sha256(json.dumps(signature, sort_keys=True).encode('utf-8')).hexdigest()[:16]
+    return Path(persist_dir) / f"snapshot-v{SNAPSHOT_VERSION}-{key}"
+
+
+def _read_manifest(directory: Path) -> Optional[Dict]:
+    """Manifest of a snapshot directory, or None if missing or unreadable."""
+    try:
+        with open(directory / MANIFEST_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def find_snapshot(persist_dir: Path, signature: Dict) -> Optional[Path]:
+    """
+    Locate a complete snapshot matching the signature.
+
+    Returns:
+        Snapshot directory, or None if missing, incomplete or stale
+    """
+    directory = snapshot_dir(persist_dir, signature)
+    manifest = _read_manifest(directory)
+    if not manifest or manifest.get("signature") != signature:
+        return None
+    return directory
+
+
+def _replace_dir(source: Path, target: Path) -> None:
+    """
+    Rename source to target, replacing any existing target directory.
+
+    os.replace() cannot overwrite a non-empty directory, so the old target
+    is first renamed aside and removed once the new one is in place.
+    Processes that mapped its files keep their pages.
+
+    Raises:
+        OSError: If target could not be replaced (e.g. another publisher
+            renamed its own copy into place in between)
+    """
+    aside = None
+    if target.exists():
+        aside = target.parent / f".old-{uuid.uuid4().hex}"
+        try:
+            os.replace(target, aside)
+        except FileNotFoundError:
+            aside = None  # another publisher moved it first
+    try:
+        os.replace(source, target)
+    except OSError:
+        if aside is not None and not target.exists():
+            os.replace(aside, target)
+            aside = None
+        raise
+    finally:
+        if aside is not None:
+            shutil.rmtree(aside, ignore_errors=True)
+
+
+def write_snapshot(persist_dir: Path, signature: Dict, writer: Callable[[Path], None]) -> Path:
+    """
+    Write a snapshot atomically and remove stale ones.
+
+    The writer fills a private temporary directory; the manifest is written
+    last and the directory is renamed into place, so readers never see a
+    partial snapshot. An existing snapshot with the same signature is
+    replaced (its contents may differ even though the source hash does
+    not); only if another process publishes concurrently is its copy kept.
+
+    Once published, older snapshots of the same store configuration (built
+    from a different source hash) are removed.
+
+    Args:
+        persist_dir: Root directory for snapshots
+        signature: Snapshot signature with "source_hash" and "config" keys
+        writer: Callback that writes the snapshot files into a directory
+
+    Returns:
+        The published snapshot directory
+    """
+    persist_dir = Path(persist_dir)
+    persist_dir.mkdir(parents=True, exist_ok=True)
+    target = snapshot_dir(persist_dir, signature)
+    tmp = persist_dir / f".tmp-{uuid.uuid4().hex}"
+    tmp.mkdir()
+
+    try:
+        writer(tmp)
+        with open(tmp / MANIFEST_FILE, 'w', encoding='utf-8') as f:
+            json.dump({"version": SNAPSHOT_VERSION, "signature": signature}, f)
+        _replace_dir(tmp, target)
+    except OSError:
+        if find_snapshot(persist_dir, signature) is None:
+            raise
+        logger.info(f"Snapshot {target.name} already published by another process")
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    # Older snapshots are only unlinked; processes that mapped them keep their pages
+    for stale in persist_dir.glob("snapshot-v*"):
+        manifest = _read_manifest(stale)
+        if stale != target and manifest and manifest["signature"].get("config") == signature.get("config"):
+            shutil.rmtree(stale, ignore_errors=True)
+    return target
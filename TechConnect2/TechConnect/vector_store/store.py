@@ -1,173 +1,1007 @@
 """
 Module C: Vector Store - RAG Memory
 Lightweight in-memory semantic search with metadata filtering.
-Uses cosine similarity for document matching.
+Queries are resolved through an inverted index and ranked by a pluggable
+scorer (Jaccard token overlap or BM25), or, in dense mode, by cosine
+similarity over locally embedded vectors, optionally through an IVF
+approximate nearest-neighbour index and optionally stored as int8 codes
+re-scored in float32. Hybrid mode runs both and fuses the
+two rankings with reciprocal rank fusion.
+Documents can be upserted and deleted incrementally; removals leave
+tombstones that a background compaction reclaims.
+Quoted query parts are exact-phrase or proximity operators, checked
+against the forward index's term positions.
+The index can be saved to an on-disk snapshot and loaded back with its
+postings and vectors memory-mapped.
+Repeated searches are served from an LRU+TTL cache that every write
+invalidates by bumping the index generation.
+README and repo-file passages are indexed as child documents of their
+accelerator, so a query can also return its best-matching section.
 """
 
-from typing import List, Dict, Optional
+import copy
+import heapq
+import json
+import logging
+import sys
+import threading
+import time
+from enum import Enum
+from operator import itemgetter
+from typing import Any, Iterable, List, Dict, Optional, Sequence, Tuple, Union
 from pathlib import Path
-from dataclasses import dataclass, field
-import math
-from collections import defaultdict
+from ingestion.chunker import Passage
 from models.schemas import CatalogItem
+from vector_store.analyzer import Analyzer
+from vector_store.ann import IVFIndex
+from vector_store.cache import QueryCache
+from vector_store.dense import Embedder, HashingEmbedder, rescored_top_k
+from vector_store.embedding_cache import EmbeddingCache
+from vector_store.filters import Bitmap, FilterValue, filter_key, with_range
+from vector_store.fusion import RRF_K, fused_distance, reciprocal_rank_fusion, timed
+from vector_store.passages import PassageIndex
+from vector_store.phrases import Phrase, parse_query, phrase_filter
+from vector_store.rerank import Reranker, get_rerankers, rerank_results
+from vector_store.scoring import Scorer, get_scorer
+from vector_store.segment import Document, Segment
+from vector_store.snapshot import find_snapshot, write_snapshot
 
+logger = logging.getLogger(__name__)
 
-@dataclass
-class Document:
-    """Internal document representation for vector search."""
-    id: str
-    text: str
-    tokens: List[str] = field(default_factory=list)
-    metadata: Dict = field(default_factory=dict)
+SEARCH_MODES = ("lexical", "dense", "hybrid")
+ANN_INDEXES = ("ivf",)
+
+
+def _plain(value: Any) -> Any:
+    """Unwrap enum members so metadata holds plain JSON values."""
+    return value.value if isinstance(value, Enum) else value
 
 
 class SimpleVectorStore:
     """
     Lightweight in-memory vector store for semantic search.
-    Uses TF-IDF inspired token matching for simplicity.
-    Supports filtering by solution_area and complexity_level.
+    Ranks with Jaccard token overlap (default) or BM25 in lexical mode,
+    or by cosine similarity over a contiguous float32 matrix in dense mode;
+    hybrid mode fuses the lexical and dense rankings.
+    Supports facet filtering (solution_area, technical_complexity,
+    responsible_ai_tag, deployment_type) through a bitmap index, and
+    complexity ranges through one bitmap per level.
+    
+    Writes (upsert, delete, compaction) are serialized by a lock. Searches
+    do not take it: they read the current segment once, and compaction
+    publishes its rebuilt segment with a single reference swap. They only
+    hold the segment's own lock while resolving filters, which writers
+    hold per batch, so a compaction never blocks them.
     """
     
-    def __init__(self, persist_dir: Optional[Path] = None):
+    # Compaction starts once tombstones reach this count and compact_threshold
+    COMPACT_MIN_TOMBSTONES = 64
+    
+    def __init__(
+        self,
+        persist_dir: Optional[Path] = None,
+        scorer: Union[str, Scorer] = "jaccard",
+        mode: str = "lexical",
+        embedder: Optional[Embedder] = None,
+        compact_threshold: float = 0.25,
+        cache_size: int = 1024,
+        cache_ttl: float = 300.0,
+        ann: Optional[Union[str, IVFIndex]] = None,
+        nprobe: int = 8,
+        analyzer: Optional[Analyzer] = None,
+        hybrid_candidates: int = 50,
+        rrf_k: int = RRF_K,
+        quantize: bool = False,
+        rescore_factor: int = 4,
+        embedding_cache: Optional[EmbeddingCache] = None,
+        rerank: Optional[Union[str, Reranker, Sequence[Union[str, Reranker]]]] = None,
+        rerank_depth: int = 50
+    ):
         """
         Initialize in-memory vector store.
         
         Args:
-            persist_dir: Ignored in MVP (included for API compatibility)
+            persist_dir: Directory for on-disk snapshots (see save() and load())
+            scorer: Ranking function, "jaccard" or "bm25" (or a scorer instance)
+            mode: "lexical" (inverted index), "dense" (embedding matrix) or
+                "hybrid" (both, fused with reciprocal rank fusion)
+            embedder: Local embedder for dense and hybrid mode (defaults to
+                HashingEmbedder)
+            compact_threshold: Fraction of tombstoned ordinals that triggers
+                a background compaction
+            cache_size: Maximum number of cached search results (0 disables)
+            cache_ttl: Seconds a cached search result stays valid
+            ann: Approximate index for the vectors, "ivf" (or a configured
+                IVFIndex); None searches every vector exactly
+            nprobe: IVF partitions scored per query (higher = better recall)
+            analyzer: Tokenizer for documents and queries (defaults to
+                Analyzer(): stop words, no stemming)
+            hybrid_candidates: Candidates each ranking contributes to the
+                fusion in hybrid mode (at least n_results)
+            rrf_k: Reciprocal rank fusion offset (higher flattens the ranks)
+            quantize: Store vectors as int8 codes with per-vector scales
+                (about 4x smaller); hits are re-scored in float32
+            rescore_factor: Shortlist re-scored in float32 per query, as a
+                multiple of n_results (quantize only)
+            embedding_cache: On-disk cache of document vectors keyed by
+                content hash and embedder version, so re-ingesting unchanged
+                text skips the embedder (dense and hybrid modes)
+            rerank: Second-stage re-rankers applied to the first stage's
+                shortlist: "bm25f", "products", "priors", a comma-separated
+                list of them, or re-ranker instances (see vector_store.rerank)
+            rerank_depth: Shortlist size re-ranked per query (at least
+                n_results); re-ranking cost grows with it, not the corpus
+            
+        Raises:
+            ValueError: If mode, scorer, ann or a re-ranker is unknown, or
+                ann or quantize is set in lexical mode
         """
+        if mode not in SEARCH_MODES:
+            raise ValueError(f"Unknown mode '{mode}'. Choose from: {', '.join(SEARCH_MODES)}")
+        if isinstance(ann, str):
+            if ann not in ANN_INDEXES:
+                raise ValueError(f"Unknown ann index '{ann}'. Choose from: {', '.join(ANN_INDEXES)}")
+            ann = IVFIndex()
+        if ann is not None and mode == "lexical":
+            raise ValueError("An ann index requires mode='dense' or mode='hybrid'")
+        if quantize and mode == "lexical":
+            raise ValueError("quantize requires mode='dense' or mode='hybrid'")
+        
         self.documents: Dict[str, Document] = {}
-        self.metadata_index: Dict[str, List[str]] = defaultdict(list)  # field -> [ids]
-    
-    def _tokenize(self, text: str) -> List[str]:
-        """Simple tokenization for keyword matching."""
-        # Convert to lowercase and split on whitespace/punctuation
-        import re
-        tokens = re.findall(r'\w+', text.lower())
-        # Remove common stop words for better matching
-        stop_words = {'the', 'a', 'an', 'and', 'or', 'is', 'in', 'to', 'of', 'for', 'with'}
-        return [t for t in tokens if t not in stop_words and len(t) > 2]
-    
-    def _compute_similarity(self, query_tokens: List[str], doc_tokens: List[str]) -> float:
-        """Compute simple token overlap similarity."""
-        if not query_tokens or not doc_tokens:
-            return 0.0
+        self.persist_dir = Path(persist_dir) if persist_dir else None
+        self.mode = mode
+        self.compact_threshold = compact_threshold
+        self.analyzer = analyzer or Analyzer()
         
-        query_set = set(query_tokens)
-        doc_set = set(doc_tokens)
+        # Dense vectors share ordinals with the inverted index
+        self.embedder: Optional[Embedder] = None
+        if mode != "lexical":
+            self.embedder = embedder or HashingEmbedder(tokenizer=self._tokenize, tokenizer_version=self.analyzer.version)
+        # The default embedder sees only analyzed tokens, so tokens can key the cache
+        self._embeds_tokens = embedder is None
+        # Every segment gets an untrained copy of this index
+        self.ann: Optional[IVFIndex] = ann
+        self.nprobe = nprobe
+        self.quantize = quantize
+        self.rescore_factor = rescore_factor
+        # Document vectors only; query vectors are never cached on disk
+        self.embedding_cache = embedding_cache
+        self.hybrid_candidates = hybrid_candidates
+        self.rrf_k = rrf_k
+        self.rerankers = get_rerankers(rerank)
+        self.rerank_depth = rerank_depth
         
-        # Jaccard similarity
-        intersection = len(query_set & doc_set)
-        union = len(query_set | doc_set)
+        self._segment = self._new_segment(get_scorer(scorer))
+        self._lock = threading.RLock()
+        self._compactor: Optional[threading.Thread] = None
         
-        return intersection / union if union > 0 else 0.0
+        # Bumped by every write; cached results from older generations are stale
+        self.generation = 0
+        self._cache = QueryCache(maxsize=cache_size, ttl=cache_ttl)
+        
+        # Child passages (README sections, repo files) live in a sub-store of their own
+        self._passages = PassageIndex(lambda: SimpleVectorStore(
+            scorer=copy.copy(self.scorer),
+            mode=mode,
+            embedder=self.embedder,
+            compact_threshold=compact_threshold,
+            cache_size=cache_size,
+            cache_ttl=cache_ttl,
+            ann=self.ann.empty() if self.ann else None,
+            nprobe=nprobe,
+            analyzer=self.analyzer,
+            hybrid_candidates=hybrid_candidates,
+            rrf_k=rrf_k,
+            quantize=quantize,
+            rescore_factor=rescore_factor,
+            embedding_cache=embedding_cache
+        ))
+    
+    def __len__(self) -> int:
+        return len(self.documents)
+    
+    @property
+    def scorer(self) -> Scorer:
+        """Scorer of the current segment."""
+        return self._segment.scorer
+    
+    def _new_segment(self, scorer: Scorer) -> Segment:
+        return Segment(scorer, self.embedder.dim if self.embedder else None, self._new_ann(), self.quantize)
+    
+    def _new_ann(self) -> Optional[IVFIndex]:
+        return self.ann.empty() if self.ann is not None else None
+    
+    def _tokenize(self, text: str) -> List[str]:
+        """Document tokens for keyword matching (see vector_store.analyzer)."""
+        return self.analyzer.analyze(text)
     
     def ingest_accelerators(self, accelerators: List[CatalogItem]) -> None:
         """
         Index a list of CatalogItem objects into the vector store.
         
+        Ids that are already indexed are replaced (see upsert()).
+        
         Args:
             accelerators: List of CatalogItem objects to index
         """
-        if not accelerators:
+        self.upsert(accelerators)
+    
+    def upsert(self, items: List[CatalogItem]) -> None:
+        """
+        Insert or replace accelerators, touching only their own postings.
+        
+        A replaced document's old ordinal is tombstoned and the new version
+        is appended, so the cost is proportional to the items given rather
+        than to the catalog.
+        
+        Args:
+            items: CatalogItem objects to insert or replace
+        """
+        if not items:
             return
         
-        for acc in accelerators:
-            # Combine name and description for search
-            doc_text = f"{acc.name}. {acc.description}. {' '.join(acc.products_and_services)}"
-            tokens = self._tokenize(doc_text)
-            
-            doc = Document(
-                id=acc.id,
-                text=doc_text,
-                tokens=tokens,
-                metadata={
-                    "name": acc.name,
-                    "solution_area": acc.solution_area,
-                    "technical_complexity": acc.technical_complexity,
-                    "repository_url": acc.repository_url,
-                    "responsible_ai_tag": str(acc.responsible_ai_tag),
-                    "deployment_type": acc.deployment_type
-                }
-            )
+        docs = [self._document(acc) for acc in items]
+        with self._lock:
+            self._upsert_documents(docs)
+            # Passages inherit facet metadata; keep them filterable like their parent
+            for doc in docs:
+                self._passages.refresh(doc)
+    
+    @staticmethod
+    def _document(acc: CatalogItem) -> Document:
+        """Indexed document for one accelerator."""
+        # Combine name and description for search
+        doc_text = f"{acc.name}. {acc.description}. {' '.join(acc.products_and_services)}"
+        return Document(
+            id=acc.id,
+            text=doc_text,
+            metadata={
+                "name": acc.name,
+                "solution_area": _plain(acc.solution_area),
+                "technical_complexity": _plain(acc.technical_complexity),
+                "repository_url": acc.repository_url,
+                "responsible_ai_tag": str(acc.responsible_ai_tag),
+                "deployment_type": acc.deployment_type,
+                "products": list(acc.products_and_services),
+                "languages": list(acc.languages)
+            }
+        )
+    
+    def _upsert_documents(self, docs: List[Document]) -> None:
+        """Insert or replace prepared documents (see upsert())."""
+        with self._lock:
+            segment = self._segment
+            # Embed the whole batch at once, before searches are held off; rows line up with the new ordinals
+            vectors = self._embed_documents([doc.text for doc in docs]) if segment.vectors is not None else None
+            with segment.lock:
+                for doc in docs:
+                    segment.remove(doc.id)
+                    segment.add(doc, self._tokenize(doc.text))
+                    self.documents[doc.id] = doc
+                if vectors is not None:
+                    segment.append_vectors(vectors)
+            
+            self.generation += 1
+            self._maybe_compact()
+    
+    def _embed_documents(self, texts: List[str]):
+        """Document vectors, from the embedding cache where possible."""
+        if self.embedding_cache is not None:
+            return self.embedding_cache.embed(self.embedder, texts)
+        return self.embedder.embed(texts)
+    
+    def upsert_passages(
+        self,
+        parent_id: str,
+        passages: Iterable[Passage],
+        batch_size: int = 256,
+        replace: bool = True
+    ) -> int:
+        """
+        Index passages (e.g. from ingestion.chunker) as children of an accelerator.
+        
+        The iterable is consumed batch_size passages at a time, so a
+        generator over a large repo never has to fit in memory. Passages
+        inherit the parent's facet metadata and are removed with it.
+        
+        Args:
+            parent_id: ID of an indexed accelerator
+            passages: Passages to index
+            batch_size: Passages embedded and indexed per write
+            replace: Drop the parent's existing passages first
+            
+        Returns:
+            Number of passages indexed
+            
+        Raises:
+            ValueError: If parent_id is not indexed
+        """
+        parent = self.documents.get(parent_id)
+        if parent is None:
+            raise ValueError(f"Unknown parent accelerator '{parent_id}'")
+        return self._passages.upsert(parent, passages, batch_size, replace)
+    
+    def passage_count(self) -> int:
+        """Number of indexed passages."""
+        return len(self._passages)
+    
+    def search_passages(
+        self,
+        query: str,
+        n_results: int = 5,
+        filters: Optional[Dict[str, FilterValue]] = None,
+        exclude: Optional[Dict[str, FilterValue]] = None
+    ) -> Dict[str, List]:
+        """
+        Rank passages across all accelerators.
+        
+        Returns:
+            Dict with 'ids', 'documents', 'metadatas', 'distances'; each
+            metadata holds parent_id, path, heading and start_line
+        """
+        return self._passages.search(query, n_results=n_results, filters=filters, exclude=exclude)
+    
+    def best_passages(self, query: str, parent_ids: List[str]) -> Dict[str, Dict]:
+        """
+        Best-matching passage for each of the given accelerators.
+        
+        Only the passages of those accelerators are scored, so this is
+        cheap to run on the handful of ids a search returned.
+        
+        Args:
+            query: Natural language query
+            parent_ids: Accelerator IDs (e.g. search()["ids"])
             
-            self.documents[acc.id] = doc
+        Returns:
+            parent id -> dict with 'id', 'document', 'metadata', 'distance'
+            for every accelerator that has a matching passage
+        """
+        return self._passages.best(query, parent_ids)
+    
+    def delete(self, ids: List[str]) -> int:
+        """
+        Remove accelerators by ID.
+        
+        Their ordinals are tombstoned: excluded from every search at once
+        and reclaimed by the next compaction.
+        
+        Args:
+            ids: Accelerator IDs to remove (unknown IDs are ignored)
             
-            # Build metadata indices for filtering
-            self.metadata_index[f"area:{acc.solution_area}"].append(acc.id)
-            self.metadata_index[f"complexity:{acc.technical_complexity}"].append(acc.id)
+        Returns:
+            Number of documents removed
+        """
+        removed = 0
+        with self._lock, self._segment.lock:
+            for doc_id in ids:
+                if self.documents.pop(doc_id, None) is not None:
+                    self._segment.remove(doc_id)
+                    removed += 1
+            self._passages.remove(ids)
+            if removed:
+                self.generation += 1
+                self._maybe_compact()
+        return removed
+    
+    def _maybe_compact(self) -> None:
+        """Start a background compaction once tombstones pass the threshold."""
+        tombstones = self._segment.tombstones
+        if tombstones < self.COMPACT_MIN_TOMBSTONES:
+            return
+        if tombstones < self.compact_threshold * len(self._segment.index):
+            return
+        if self._compactor is not None and self._compactor.is_alive():
+            return
+        self._compactor = threading.Thread(target=self.compact, name="vector-store-compaction", daemon=True)
+        self._compactor.start()
+    
+    def compact(self) -> None:
+        """
+        Rebuild the index without tombstones and swap it in.
+        
+        Runs under the write lock, so upserts wait for it; searches keep
+        using the previous segment until the swap. Live documents keep their
+        relative order, so rankings (and cached results) are unchanged.
+        """
+        with self._lock:
+            segment = self._segment
+            if not segment.tombstones:
+                return
+            compacted = segment.compacted()
+            self._segment = compacted
+            logger.info(f"Compacted vector store: reclaimed {segment.tombstones} tombstones")
     
     def search(
         self, 
         query: str, 
         n_results: int = 5,
-        solution_area: Optional[str] = None,
-        complexity: Optional[str] = None
+        solution_area: Optional[FilterValue] = None,
+        complexity: Optional[FilterValue] = None,
+        filters: Optional[Dict[str, FilterValue]] = None,
+        exclude: Optional[Dict[str, FilterValue]] = None,
+        debug: bool = False,
+        complexity_min: Optional[FilterValue] = None,
+        complexity_max: Optional[FilterValue] = None
     ) -> Dict[str, List]:
         """
         Semantic search over accelerators with optional metadata filtering.
         
+        Filters are resolved against the facet bitmaps before any scoring.
+        Each filter value may be a single value or a list (OR within a field);
+        different fields are AND-ed together. complexity_min/complexity_max
+        bound the complexity level inclusively ("L250" is a valid bound).
+        
         Args:
-            query: Natural language search query
+            query: Natural language search query; quoted parts are phrase
+                operators (see search_many())
             n_results: Number of results to return
             solution_area: Optional filter by solution area
             complexity: Optional filter by complexity level
+            filters: Optional facet filters, e.g. {"deployment_type": ["Bicep/azd"]}
+            exclude: Optional negated facet filters, e.g. {"responsible_ai_tag": True}
+            debug: Add a 'debug' entry with per-stage timings (see search_many())
+            complexity_min: Optional lowest complexity level, e.g. "L250"
+            complexity_max: Optional highest complexity level, e.g. "L350"
             
         Returns:
             Dict with 'ids', 'documents', 'metadatas', 'distances'
+            
+        Raises:
+            ValueError: If a filter names an unknown field, or a complexity
+                bound is not a level
         """
-        if not self.documents:
-            return {"ids": [], "documents": [], "metadatas": [], "distances": []}
+        include = dict(filters or {})
+        if solution_area:
+            include["solution_area"] = solution_area
+        complexity = with_range(complexity, complexity_min, complexity_max)
+        if complexity:
+            include["technical_complexity"] = complexity
+        return self.search_many([query], include, n_results, exclude, debug)[0]
+    
+    def search_many(
+        self,
+        queries: List[str],
+        filters: Optional[Union[Dict[str, FilterValue], List[Optional[Dict[str, FilterValue]]]]] = None,
+        n_results: int = 5,
+        exclude: Optional[Union[Dict[str, FilterValue], List[Optional[Dict[str, FilterValue]]]]] = None,
+        debug: bool = False
+    ) -> List[Dict[str, List]]:
+        """
+        Run a batch of searches in one pass over the index.
         
-        # Tokenize query
-        query_tokens = self._tokenize(query)
+        Every query is tokenized once and each posting list is walked once
+        for all the queries that share its term; dense mode embeds the batch
+        and scores it with a single matrix-matrix product. Queries whose
+        terms, filters and n_results were seen at the current generation
+        are answered from the cache. Hybrid mode runs the lexical and dense
+        rankings in the same pass and fuses them. With re-rankers, the
+        first stage returns rerank_depth candidates per query and only
+        those are re-ordered before the top n_results are kept.
         
-        # Get candidate IDs based on filters
-        candidate_ids = set(self.documents.keys())
+        A quoted part of a query must match as a phrase: "unified data
+        foundation" exactly, "multi agent"~3 within three extra positions.
         
-        if solution_area:
-            # Filter by solution area (handle both string and enum values)
-            filtered_ids = {
-                doc_id for doc_id in candidate_ids
-                if str(self.documents[doc_id].metadata.get("solution_area", "")).endswith(solution_area)
-            }
-            candidate_ids &= filtered_ids if filtered_ids else set()
+        Args:
+            queries: Natural language search queries
+            filters: Facet filters for every query, or a list with one
+                filter dict (or None) per query; technical_complexity also
+                takes a filters.Range, e.g. Range("L250", "L350")
+            n_results: Number of results per query
+            exclude: Negated facet filters, shared or per query like filters
+            debug: Add a 'debug' entry to every result: the mode, whether
+                it came from the cache, candidate counts and 'timings_ms'
+                per stage (analyze, cache, filter, phrase, lexical, dense,
+                fuse, rerank_<name> per re-ranker, total), measured over
+                the whole batch
+            
+        Returns:
+            One dict with 'ids', 'documents', 'metadatas', 'distances' per query
+            
+        Raises:
+            ValueError: If a filter names an unknown field, or a per-query
+                filter list does not match the number of queries
+        """
+        include_list = self._per_query(filters, len(queries), "filters")
+        exclude_list = self._per_query(exclude, len(queries), "exclude")
         
-        if complexity:
-            # Filter by complexity (handle both string and enum values)
-            filtered_ids = {
-                doc_id for doc_id in candidate_ids
-                if str(self.documents[doc_id].metadata.get("technical_complexity", "")).endswith(complexity)
-            }
-            candidate_ids &= filtered_ids if filtered_ids else set()
+        start = time.perf_counter()
+        timings: Optional[Dict[str, float]] = {} if debug else None
+        candidates: Dict[str, int] = {}
+        generation = self.generation
+        segment = self._segment
+        with timed(timings, "analyze"):
+            parsed = [parse_query(query, self.analyzer) for query in queries]
+            queries = [text for text, _ in parsed]
+            phrase_lists = [phrases for _, phrases in parsed]
+            token_lists = [self.analyzer.analyze_query(query) for query in queries]
+        with timed(timings, "cache"):
+            keys = [
+                self._cache_key(query, tokens, include, excluded, n_results, phrases)
+                for query, tokens, include, excluded, phrases
+                in zip(queries, token_lists, include_list, exclude_list, phrase_lists)
+            ]
+            results: List[Optional[Dict[str, List]]] = [self._cache.get(key, generation) for key in keys]
+        pending = [q for q, cached in enumerate(results) if cached is None]
+        
+        if pending:
+            depth = max(n_results, self.rerank_depth) if self.rerankers else n_results
+            ranked = self._search_segment(
+                segment,
+                [queries[q] for q in pending],
+                [token_lists[q] for q in pending],
+                [include_list[q] for q in pending],
+                [exclude_list[q] for q in pending],
+                depth,
+                timings,
+                candidates,
+                phrase_lists=[phrase_lists[q] for q in pending]
+            )
+            for q, hits in zip(pending, ranked):
+                results[q] = self._results(hits)
+                if self.rerankers:
+                    candidates["rerank"] = candidates.get("rerank", 0) + len(hits)
+                    results[q] = rerank_results(
+                        self.rerankers, token_lists[q], results[q], n_results, self.analyzer, timings
+                    )
+                self._cache.put(keys[q], generation, results[q])
         
-        if not candidate_ids:
-            return {"ids": [], "documents": [], "metadatas": [], "distances": []}
+        # Callers get their own lists; cached results stay untouched
+        output = [{name: list(values) for name, values in result.items()} for result in results]
+        if debug:
+            timings["total"] = (time.perf_counter() - start) * 1000
+            missed = set(pending)
+            for q, result in enumerate(output):
+                result["debug"] = {
+                    "mode": self.mode,
+                    "cached": q not in missed,
+                    "candidates": dict(candidates),
+                    "timings_ms": {stage: round(ms, 3) for stage, ms in timings.items()}
+                }
+        return output
+    
+    def hybrid_rankings(
+        self,
+        queries: List[str],
+        filters: Optional[Union[Dict[str, FilterValue], List[Optional[Dict[str, FilterValue]]]]] = None,
+        depth: int = 50,
+        exclude: Optional[Union[Dict[str, FilterValue], List[Optional[Dict[str, FilterValue]]]]] = None,
+        debug: bool = False
+    ) -> List[Dict[str, Any]]:
+        """
+        The unfused lexical and dense rankings of a batch of hybrid queries.
+        
+        RRF distances depend on ranks within one index, so partitioned
+        stores merge these rankings across partitions and fuse once (see
+        ShardedVectorStore). Uncached.
+        
+        Args:
+            queries: Natural language search queries
+            filters: Facet filters, shared or per query (as in search_many())
+            depth: Hits per ranking
+            exclude: Negated facet filters, shared or per query
+            debug: Add a 'debug' entry (candidates, timings_ms) to every result
+        
+        Returns:
+            One dict per query with 'lexical' and 'dense' result dicts
+            ('ids', 'documents', 'metadatas', 'distances'), best first
+        
+        Raises:
+            ValueError: If the store is not in hybrid mode, or a filter is invalid
+        """
+        if self.mode != "hybrid":
+            raise ValueError("hybrid_rankings() requires mode='hybrid'")
+        include_list = self._per_query(filters, len(queries), "filters")
+        exclude_list = self._per_query(exclude, len(queries), "exclude")
+        
+        start = time.perf_counter()
+        timings: Optional[Dict[str, float]] = {} if debug else None
+        candidates: Dict[str, int] = {}
+        with timed(timings, "analyze"):
+            parsed = [parse_query(query, self.analyzer) for query in queries]
+            queries = [text for text, _ in parsed]
+            phrase_lists = [phrases for _, phrases in parsed]
+            token_lists = [self.analyzer.analyze_query(query) for query in queries]
+        ranked = self._search_segment(
+            self._segment, queries, token_lists, include_list, exclude_list, depth,
+            timings, candidates, fuse=False, phrase_lists=phrase_lists
+        )
+        output = [
+            {"lexical": self._results(lexical_hits), "dense": self._results(dense_hits)}
+            for lexical_hits, dense_hits in ranked
+        ]
+        if debug:
+            timings["total"] = (time.perf_counter() - start) * 1000
+            for result in output:
+                result["debug"] = {
+                    "mode": self.mode,
+                    "cached": False,
+                    "candidates": dict(candidates),
+                    "timings_ms": {stage: round(ms, 3) for stage, ms in timings.items()}
+                }
+        return output
+        
+    def _search_segment(
+        self,
+        segment: Segment,
+        queries: List[str],
+        token_lists: List[Sequence[str]],
+        include_list: List[Optional[Dict]],
+        exclude_list: List[Optional[Dict]],
+        n_results: int,
+        timings: Optional[Dict[str, float]] = None,
+        candidates: Optional[Dict[str, int]] = None,
+        fuse: bool = True,
+        phrase_lists: Optional[List[Tuple[Phrase, ...]]] = None
+    ) -> List[Any]:
+        """
+        Resolve filters and rank one batch of queries against a segment.
+        
+        Phrase operators (see vector_store.phrases) narrow each query's
+        allowed documents before ranking, in every mode. Stage times (ms)
+        are added to timings and candidate counts to candidates, when
+        given. In hybrid mode, fuse=False returns each
+        query's unfused (lexical hits, dense hits), n_results deep, so
+        several segments can be fused together (see SegmentedVectorStore).
+        """
+        unfused = self.mode == "hybrid" and not fuse
+        ranked: List[Any] = [([], []) if unfused else [] for _ in queries]
+        if not self.documents:
+            return ranked
+        with timed(timings, "filter"), segment.lock:
+            segment.prepare()
+            allowed = [
+                segment.facets.resolve(include, excluded)
+                for include, excluded in zip(include_list, exclude_list)
+            ]
+        if phrase_lists and any(phrase_lists):
+            with timed(timings, "phrase"):
+                allowed = [
+                    phrase_filter(segment.index, phrases, bitmap) if phrases and bitmap else bitmap
+                    for phrases, bitmap in zip(phrase_lists, allowed)
+                ]
+        
+        active = [q for q, bitmap in enumerate(allowed) if bitmap]
+        if active:
+            queries = [queries[q] for q in active]
+            token_lists = [token_lists[q] for q in active]
+            allowed = [allowed[q] for q in active]
+            if unfused:
+                batch = self._hybrid_rankings(segment, queries, token_lists, n_results, allowed, timings, candidates)
+            elif self.mode == "hybrid":
+                batch = self._hybrid_search(segment, queries, token_lists, n_results, allowed, timings, candidates)
+            elif self.mode == "dense":
+                with timed(timings, "dense"):
+                    batch = self._dense_search(segment, queries, n_results, allowed)
+            else:
+                with timed(timings, "lexical"):
+                    batch = self._lexical_search(segment, token_lists, n_results, allowed)
+            for q, hits in zip(active, batch):
+                ranked[q] = hits if unfused else self._live(hits)
+        return ranked
+    
+    @staticmethod
+    def _live(hits: List[Tuple[Optional[Document], float]]) -> List[Tuple[Document, float]]:
+        """Drop hits on ordinals a concurrent delete tombstoned after the filters were resolved."""
+        return [hit for hit in hits if hit[0] is not None]
+    
+    def _cache_key(
+        self,
+        query: str,
+        tokens: Sequence[str],
+        include: Optional[Dict],
+        exclude: Optional[Dict],
+        n_results: int,
+        phrases: Tuple[Phrase, ...] = ()
+    ) -> Tuple:
+        """Normalized cache key: analyzed query terms, phrases, filters and result count."""
+        if self.mode == "lexical":
+            # Lexical scorers only see the distinct terms
+            terms: Tuple = tuple(sorted(set(tokens)))
+        elif self._embeds_tokens:
+            # The hashing embedder is order-insensitive but counts repeats
+            terms = tuple(sorted(tokens))
+        else:
+            terms = (" ".join(query.split()),)
+        key = (terms, phrases, filter_key(include), filter_key(exclude), n_results)
+        # nprobe, the fusion settings and the rerank depth can be tuned at runtime and change results
+        if self.ann is not None:
+            key += (self.nprobe,)
+        if self.mode == "hybrid":
+            key += (self.hybrid_candidates, self.rrf_k)
+        if self.rerankers:
+            key += (self.rerank_depth, tuple(reranker.name for reranker in self.rerankers))
+        return key
+    
+    def matching_ids(
+        self,
+        query: str,
+        n_results: int = 100,
+        filters: Optional[Dict[str, FilterValue]] = None,
+        exclude: Optional[Dict[str, FilterValue]] = None
+    ) -> Dict[str, List]:
+        """
+        Ids and distances of the query's top n_results matches.
         
-        # Score documents
-        scores = []
-        for doc_id in candidate_ids:
-            doc = self.documents[doc_id]
-            similarity = self._compute_similarity(query_tokens, doc.tokens)
-            scores.append((doc_id, similarity))
+        Unlike search(), lexical mode does not backfill with documents
+        that share no query term, so every id actually matches the query.
         
-        # Sort by score descending
-        scores.sort(key=lambda x: x[1], reverse=True)
+        Returns:
+            Dict with 'ids' and 'distances', best first
+        """
+        if self.mode != "lexical":
+            result = self.search(query, n_results=n_results, filters=filters, exclude=exclude)
+            return {"ids": result["ids"], "distances": result["distances"]}
+        segment = self._segment
+        text, phrases = parse_query(query, self.analyzer)
+        with segment.lock:
+            segment.prepare()
+            allowed = segment.facets.resolve(filters, exclude)
+        if phrases and allowed:
+            allowed = phrase_filter(segment.index, phrases, allowed)
+        hits: List[Tuple[Document, float]] = []
+        if allowed and self.documents:
+            tokens = self.analyzer.analyze_query(text)
+            hits = self._live(self._lexical_search(segment, [tokens], n_results, [allowed], backfill=False)[0])
+        return {"ids": [doc.id for doc, _ in hits], "distances": [distance for _, distance in hits]}
+    
+    def facet_counts(
+        self,
+        query: Optional[str] = None,
+        n_results: int = 100,
+        filters: Optional[Dict[str, FilterValue]] = None,
+        exclude: Optional[Dict[str, FilterValue]] = None,
+        ids: Optional[List[str]] = None,
+        fields: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        """
+        Document counts per facet value, from the filter bitmaps.
         
-        # Return top-n results
-        results = scores[:n_results]
+        Counts cover the documents passing filters and exclude, narrowed
+        to the given ids or to the query's top n_results matches (see
+        matching_ids()). No document is read or returned.
         
-        ids = [doc_id for doc_id, _ in results]
-        documents = [self.documents[doc_id].text for doc_id in ids]
-        metadatas = [self.documents[doc_id].metadata for doc_id in ids]
-        distances = [1.0 - score for _, score in results]  # Convert similarity to distance
+        Args:
+            query: Optional query whose result set is counted
+            n_results: Size of the query's result set
+            filters: Facet filters, as in search()
+            exclude: Negated facet filters, as in search()
+            ids: Optional document ids to count (instead of a query)
+            fields: Facet fields to count (default: all, see FACET_FIELDS)
+            
+        Returns:
+            Dict with 'total' (documents counted) and 'facets'
+            (field -> value -> count, most frequent first)
+            
+        Raises:
+            ValueError: If a filter or facet names an unknown field
+        """
+        if query is not None:
+            ids = self.matching_ids(query, n_results, filters, exclude)["ids"]
+        segment = self._segment
+        with segment.lock:
+            allowed = segment.facets.resolve(filters, exclude)
+        if ids is not None:
+            ordinals = segment.ordinals
+            allowed = allowed & Bitmap.of(ordinals[doc_id] for doc_id in ids if doc_id in ordinals)
+        return {"total": len(allowed), "facets": segment.facets.counts(allowed, fields)}
+    
+    def cache_stats(self) -> Dict[str, Any]:
+        """Query cache counters plus the current index generation."""
+        return {**self._cache.stats(), "generation": self.generation}
+    
+    def memory_report(self) -> Dict[str, Any]:
+        """
+        Approximate resident memory of the store, by component.
         
+        Returns:
+            Dict with 'documents' (count), 'components' (bytes per part,
+            including the passage sub-store), 'total_bytes' (private heap),
+            'mapped_bytes' (snapshot buffers in the page cache) and
+            'bytes_per_document'
+        """
+        usage = self._segment.memory_usage()
+        mapped = usage.pop("mapped")
+        usage["documents"] += sys.getsizeof(self.documents)
+        if len(self._passages):
+            passages = self._passages.store.memory_report()
+            usage["passages"] = passages["total_bytes"]
+            mapped += passages["mapped_bytes"]
+        total = sum(usage.values())
         return {
-            "ids": ids,
-            "documents": documents,
-            "metadatas": metadatas,
-            "distances": distances
+            "documents": len(self.documents),
+            "components": usage,
+            "total_bytes": total,
+            "mapped_bytes": mapped,
+            "bytes_per_document": total / len(self.documents) if self.documents else 0.0,
         }
     
+    @staticmethod
+    def _per_query(value: Any, n_queries: int, name: str) -> List[Optional[Dict]]:
+        """Broadcast a shared filter dict to every query, or validate a per-query list."""
+        if isinstance(value, list):
+            if len(value) != n_queries:
+                raise ValueError(f"{name} has {len(value)} entries for {n_queries} queries")
+            return value
+        return [value] * n_queries
+    
+    @staticmethod
+    def _results(results: List[Tuple[Document, float]]) -> Dict[str, List]:
+        """Build the ids/documents/metadatas/distances dict straight from ranked documents."""
+        return {
+            "ids": [doc.id for doc, _ in results],
+            "documents": [doc.text for doc, _ in results],
+            "metadatas": [doc.metadata for doc, _ in results],
+            "distances": [distance for _, distance in results]
+        }
+    
+    def _lexical_search(
+        self,
+        segment: Segment,
+        token_lists: List[Sequence[str]],
+        n_results: int,
+        allowed: List[Bitmap],
+        backfill: bool = True
+    ) -> List[List[Tuple[Document, float]]]:
+        """
+        Rank allowed documents through the inverted index; returns (document, distance) pairs per query.
+        
+        With backfill=False only documents sharing a query term are returned.
+        """
+        term_sets = [set(tokens) for tokens in token_lists]
+        scorer = segment.scorer
+        
+        # Walk only the posting lists of the query terms
+        if len(term_sets) == 1:
+            batch = [scorer.score(segment.index, term_sets[0], allowed[0])]
+        else:
+            batch = scorer.score_many(segment.index, term_sets, allowed)
+        
+        return [
+            self._rank_lexical(segment, scores, n_results, bitmap, backfill)
+            for scores, bitmap in zip(batch, allowed)
+        ]
+    
+    @staticmethod
+    def _rank_lexical(
+        segment: Segment,
+        scores: Dict[int, float],
+        n_results: int,
+        allowed: Bitmap,
+        backfill: bool = True
+    ) -> List[Tuple[Document, float]]:
+        """Top n_results of one query's sparse scores, backfilled from the allowed set."""
+        docs = segment.docs
+        to_distance = segment.scorer.to_distance
+        
+        # Bounded heap over the candidates: O(m log n_results), and only the
+        # winners are sorted or turned into results (ties keep posting order)
+        top = heapq.nlargest(n_results, scores.items(), key=itemgetter(1))
+        results = [(docs[ordinal], to_distance(score)) for ordinal, score in top]
+        
+        # Backfill with non-matching allowed documents so callers still get
+        # up to n_results hits (score 0, as the full scan returned)
+        if backfill and len(results) < n_results:
+            zero = to_distance(0.0)
+            for ordinal in allowed:
+                if len(results) >= n_results:
+                    break
+                if ordinal not in scores:
+                    results.append((docs[ordinal], zero))
+        
+        return results
+    
+    def _dense_search(
+        self,
+        segment: Segment,
+        queries: List[str],
+        n_results: int,
+        allowed: List[Bitmap]
+    ) -> List[List[Tuple[Document, float]]]:
+        """Rank allowed documents by cosine similarity; returns (document, distance) pairs per query."""
+        query_vectors = self.embedder.embed(queries)
+        vectors = segment.vectors
+        n_rows = len(vectors)
+        if segment.ann is not None and segment.ann.trained:
+            return [
+                self._ann_search(segment, query_vector, n_results, bitmap)
+                for query_vector, bitmap in zip(query_vectors, allowed)
+            ]
+        if len(queries) == 1:
+            batch = [vectors.scores(query_vectors[0], allowed[0].to_bytes(n_rows))]
+        else:
+            batch = vectors.scores_many(query_vectors, [bitmap.to_bytes(n_rows) for bitmap in allowed])
+        
+        # argpartition top-k: only the selected rows are sorted (and, for
+        # int8 vectors, only a shortlist is re-scored in float32)
+        docs = segment.docs
+        ranked = []
+        for query_vector, scores in zip(query_vectors, batch):
+            ordinals, similarities = rescored_top_k(vectors, query_vector, scores, n_results, self.rescore_factor)
+            ranked.append([(docs[o], 1.0 - s) for o, s in zip(ordinals.tolist(), similarities.tolist())])
+        return ranked
+    
+    def _hybrid_search(
+        self,
+        segment: Segment,
+        queries: List[str],
+        token_lists: List[Sequence[str]],
+        n_results: int,
+        allowed: List[Bitmap],
+        timings: Optional[Dict[str, float]] = None,
+        candidates: Optional[Dict[str, int]] = None
+    ) -> List[List[Tuple[Document, float]]]:
+        """
+        Rank allowed documents by reciprocal rank fusion of the lexical and dense rankings.
+        
+        Each ranking contributes at most max(n_results, hybrid_candidates)
+        documents; lexical candidates must share a query term. Distances are
+        fused_distance() of the RRF score: 0 for a document ranked first by both.
+        """
+        depth = max(n_results, self.hybrid_candidates)
+        rankings = self._hybrid_rankings(segment, queries, token_lists, depth, allowed, timings, candidates)
+        with timed(timings, "fuse"):
+            return [self._fuse(lexical_hits, dense_hits, n_results) for lexical_hits, dense_hits in rankings]
+    
+    def _hybrid_rankings(
+        self,
+        segment: Segment,
+        queries: List[str],
+        token_lists: List[Sequence[str]],
+        depth: int,
+        allowed: List[Bitmap],
+        timings: Optional[Dict[str, float]] = None,
+        candidates: Optional[Dict[str, int]] = None
+    ) -> List[Tuple[List[Tuple[Document, float]], List[Tuple[Document, float]]]]:
+        """The unfused (lexical hits, dense hits) of every query, depth deep."""
+        with timed(timings, "lexical"):
+            lexical = self._lexical_search(segment, token_lists, depth, allowed, backfill=False)
+        with timed(timings, "dense"):
+            dense = self._dense_search(segment, queries, depth, allowed)
+        if candidates is not None:
+            candidates["lexical"] = candidates.get("lexical", 0) + sum(map(len, lexical))
+            candidates["dense"] = candidates.get("dense", 0) + sum(map(len, dense))
+        return [(self._live(lexical_hits), self._live(dense_hits)) for lexical_hits, dense_hits in zip(lexical, dense)]
+    
+    def _fuse(
+        self,
+        lexical_hits: List[Tuple[Document, float]],
+        dense_hits: List[Tuple[Document, float]],
+        n_results: int
+    ) -> List[Tuple[Document, float]]:
+        """Top n_results of one query by reciprocal rank fusion of its two rankings."""
+        docs = {doc.id: doc for doc, _ in lexical_hits}
+        docs.update((doc.id, doc) for doc, _ in dense_hits)
+        fused = reciprocal_rank_fusion(
+            [[doc.id for doc, _ in lexical_hits], [doc.id for doc, _ in dense_hits]],
+            self.rrf_k
+        )
+        top = heapq.nlargest(n_results, fused.items(), key=itemgetter(1))
+        return [(docs[doc_id], fused_distance(score, 2, self.rrf_k)) for doc_id, score in top]
+    
+    def _ann_search(
+        self,
+        segment: Segment,
+        query_vector,
+        n_results: int,
+        allowed: Bitmap
+    ) -> List[Tuple[Document, float]]:
+        """
+        Rank one query over the rows of its nprobe closest IVF partitions.
+        
+        Falls back to the exact scan when the probed partitions hold fewer
+        than n_results allowed rows (e.g. under a selective filter).
+        """
+        vectors = segment.vectors
+        mask = allowed.to_bytes(len(vectors))
+        rows = segment.ann.probe(query_vector, self.nprobe)
+        scores = vectors.scores_rows(query_vector, rows, mask)
+        ordinals, similarities = rescored_top_k(vectors, query_vector, scores, n_results, self.rescore_factor, rows)
+        if len(ordinals) < n_results and len(ordinals) < len(allowed):
+            scores = vectors.scores(query_vector, mask)
+            ordinals, similarities = rescored_top_k(vectors, query_vector, scores, n_results, self.rescore_factor)
+        docs = segment.docs
+        return [(docs[o], 1.0 - s) for o, s in zip(ordinals.tolist(), similarities.tolist())]
+    
     def get_by_id(self, accelerator_id: str) -> Optional[Dict]:
         """
         Retrieve a specific accelerator by ID.
@@ -207,8 +1041,100 @@ class SimpleVectorStore:
     
     def clear(self) -> None:
         """Delete all items from the vector store."""
-        self.documents.clear()
-        self.metadata_index.clear()
+        with self._lock:
+            self.documents.clear()
+            self._segment = self._new_segment(self.scorer)
+            self._passages.clear()
+            self.generation += 1
+
+
+    def _snapshot_signature(self, source_hash: Optional[str]) -> Dict:
+        """Everything that must match for a snapshot to be reused."""
+        return {
+            "source_hash": source_hash,
+            "config": {
+                "mode": self.mode,
+                "embedder": self.embedder.version if self.embedder else None,
+                "quantize": self.quantize,
+                "analyzer": self.analyzer.version,
+                "byteorder": sys.byteorder,
+            },
+        }
+    
+    def save(self, source_hash: Optional[str] = None) -> Path:
+        """
+        Write the index to a versioned snapshot under persist_dir.
+        
+        Args:
+            source_hash: Content hash of the data the index was built from
+                (e.g. snapshot.content_hash(catalog.json))
+            
+        Returns:
+            The snapshot directory
+            
+        Raises:
+            ValueError: If the store has no persist_dir
+        """
+        if self.persist_dir is None:
+            raise ValueError("save() requires a persist_dir")
+        
+        with self._lock:
+            return write_snapshot(self.persist_dir, self._snapshot_signature(source_hash), self._write)
+    
+    def _write(self, directory: Path) -> None:
+        """Write the segment, documents and passages into a snapshot directory."""
+        segment = self._segment
+        segment.save(directory)
+        docs = [[doc.id, doc.text, doc.metadata] for doc in segment.live_documents()]
+        with open(directory / "documents.json", 'w', encoding='utf-8') as f:
+            json.dump(docs, f)
+        self._passages.save(directory / "passages")
+    
+    def load(self, source_hash: Optional[str] = None) -> bool:
+        """
+        Replace the store contents with a matching snapshot from persist_dir.
+        
+        Postings, statistics and vectors are memory-mapped rather than read,
+        so startup does no tokenization or embedding and workers share those
+        pages through the OS page cache. Documents are not: documents.json
+        is parsed and every Document and facet bitmap is rebuilt, so load
+        time and heap still grow linearly with the number of documents.
+        
+        Args:
+            source_hash: Expected content hash; snapshots built from other
+                data (or with another mode/embedder or format) are ignored
+            
+        Returns:
+            True if a snapshot was loaded, False if none matched
+        """
+        if self.persist_dir is None:
+            return False
+        directory = find_snapshot(self.persist_dir, self._snapshot_signature(source_hash))
+        if directory is None:
+            return False
+        
+        self._read(directory)
+        logger.info(f"Loaded vector store snapshot {directory.name} ({len(self.documents)} documents)")
+        return True
+    
+    def _read(self, directory: Path) -> None:
+        """Replace the segment, documents and passages with those in a snapshot directory."""
+        with open(directory / "documents.json", 'r', encoding='utf-8') as f:
+            docs = [Document(id=d[0], text=d[1], metadata=d[2]) for d in json.load(f)]
+        segment = Segment.load(
+            directory,
+            self.scorer,
+            {doc.id: doc for doc in docs},
+            dense=self.embedder is not None,
+            ann=self._new_ann(),
+            quantized=self.quantize
+        )
+        
+        with self._lock:
+            self.documents = {doc.id: doc for doc in docs}
+            self._segment = segment
+            self._passages.load(directory / "passages")
+            self.generation += 1
 
 
 # For API compatibility, export as VectorStore